@@ -0,0 +1,65 @@
+# Backends de armazenamento do G-MONT. Todo backend expõe abrir(nome), que
+# devolve um objeto com a interface de gspread.Worksheet usada pelo app:
+# get_all_values, row_values, col_values, batch_get, update, batch_update,
+# append_row, append_rows, find e delete_rows.
+import argparse
+import base64
+import json
+import os
+
+from planilha_local import PlanilhaSQLite
+
+
+ESCOPOS_GOOGLE = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+
+def autorizar_google(b64_creds):
+    # Conta de serviço em JSON codificado em base64 (GOOGLE_CREDENTIALS_BASE64)
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_info(json.loads(base64.b64decode(b64_creds)), scopes=ESCOPOS_GOOGLE)
+    return gspread.authorize(creds)
+
+
+class BackendGoogleSheets:
+    nome = "google"
+
+    def __init__(self, client):
+        self.client = client
+
+    def abrir(self, nome_planilha):
+        return self.client.open(nome_planilha).get_worksheet(0)
+
+
+class BackendSQLite:
+    nome = "sqlite"
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+    def abrir(self, nome_planilha):
+        return PlanilhaSQLite(self.caminho, nome_planilha)
+
+    def gravar_planilha(self, nome_planilha, matriz):
+        self.abrir(nome_planilha).substituir(matriz)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Carrega um Excel/CSV como planilha no backend SQLite local.")
+    parser.add_argument("planilha", help="Nome da planilha (ex.: BD_ELE)")
+    parser.add_argument("arquivo", help="Arquivo .xlsx ou .csv com cabeçalho na primeira linha")
+    parser.add_argument("--db", default=".gmont/planilhas.db")
+    args = parser.parse_args()
+
+    if args.arquivo.lower().endswith(".csv"):
+        df_arq = pd.read_csv(args.arquivo, dtype=str, keep_default_na=False)
+    else:
+        df_arq = pd.read_excel(args.arquivo, dtype=str).fillna("")
+    BackendSQLite(args.db).gravar_planilha(args.planilha, [list(df_arq.columns)] + df_arq.values.tolist())
+    print(f"{len(df_arq)} linhas gravadas em {args.db} ({args.planilha})")
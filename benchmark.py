@@ -0,0 +1,185 @@
+# Benchmark offline dos caminhos quentes do app contra planilhas sintéticas
+# em memória. Compara a vazão (linhas/s) com uma base gravada e sai com
+# código 1 se algum caso regrediu além da tolerância.
+#
+#   python benchmark.py --linhas 5000 20000 100000 --salvar-base
+#   python benchmark.py --linhas 5000 20000 100000
+#   python benchmark.py --linhas 100000 --casos status extrair_dados
+#   python benchmark.py --linhas 30000 --disciplinas ESTRUTURA --casos exportar_excel exportar_excel_pandas
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import pandas as pd
+
+from carregamento import extrair_dados, ler_colunas, montar_modelo
+from curva_s import COLUNAS_CURVA, calcular_curva_s
+from dados_sinteticos import DATA_INICIO_OBRA, PLANILHAS, gerar_planilha
+from esquema import bytes_por_linha, colunas_planilha
+from exportacao import gerar_excel
+from importacao import aplicar_importacao, importar_blocos
+from leitura_arquivos import ler_blocos
+from planilha_local import PlanilhaMemoria
+from regras_status import calcular_status, colunas_regras, regras_de
+
+BASE_PADRAO = ".gmont/benchmark_base.json"
+
+
+def cronometrar(funcao, repeticoes):
+    # Melhor tempo entre as repetições (menos ruído de GC e do sistema)
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    return melhor
+
+
+def excel_via_pandas(df, titulo_relatorio):
+    # Exportação anterior (pd.ExcelWriter + to_excel, tudo convertido para
+    # texto): base de comparação do caso exportar_excel
+    output = io.BytesIO()
+    df_excel = df.copy()
+    for col in df_excel.columns:
+        df_excel[col] = df_excel[col].fillna("").astype(str)
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df_excel.to_excel(writer, index=False, sheet_name='Relatorio', startrow=8)
+        worksheet = writer.sheets['Relatorio']
+        fmt_titulo = writer.book.add_format({'bold': True, 'font_size': 14, 'align': 'center', 'valign': 'vcenter'})
+        worksheet.merge_range('C3:F5', str(titulo_relatorio).upper(), fmt_titulo)
+        for i, col in enumerate(df_excel.columns):
+            maior = df_excel[col].str.len().max()
+            worksheet.set_column(i, i, max(0 if pd.isna(maior) else int(maior), len(str(col))) + 3)
+    return output.getvalue()
+
+
+def planilha_importacao(matriz, semente=2026, fracao=0.2, fracao_novas=0.02):
+    # Upload típico: parte das TAGs existentes reprogramadas e algumas novas
+    rnd = random.Random(semente)
+    tags = [linha[0] for linha in matriz[1:]]
+    escolhidas = rnd.sample(tags, int(len(tags) * fracao))
+    novas = [f"NOVA-{i:06d}" for i in range(int(len(tags) * fracao_novas))]
+    semanas = [str(rnd.randint(1, 60)) for _ in escolhidas + novas]
+    return pd.DataFrame({
+        'TAG': escolhidas + novas,
+        'SEMANA OBRA': semanas,
+        'DATA MONT': [rnd.choice(["", "15/12/2025", "2026-01-20"]) for _ in semanas],
+    })
+
+
+def medir_disciplina(disciplina, linhas, repeticoes, filtro=None):
+    matriz = gerar_planilha(disciplina, linhas)
+    ws = PlanilhaMemoria(matriz, PLANILHAS[disciplina])
+    df, _ = extrair_dados(ws, disciplina)
+    df_up = planilha_importacao(matriz)
+    colunas = colunas_planilha(df)
+    csv_up = df_up.to_csv(index=False, sep=';').encode('utf-8')
+    padrao = {'DISCIPLINA': disciplina}
+    colunas_curva = COLUNAS_CURVA + sorted(colunas_regras(disciplina))
+
+    casos = {
+        'extrair_dados': (lambda: extrair_dados(ws, disciplina), linhas),
+        'status': (lambda: calcular_status(df, disciplina), linhas),
+        # Só as colunas da curva e do STATUS, em um batch_get (painel consolidado)
+        'leitura_colunas': (lambda: montar_modelo(ler_colunas(ws, colunas_curva, matriz[0])[0], disciplina), linhas),
+        'curva_s': (lambda: calcular_curva_s(df, DATA_INICIO_OBRA, regras_de(disciplina)['montados']), linhas),
+        # Cada repetição parte da planilha original (o fake é alterado pela importação)
+        'importacao': (lambda: aplicar_importacao(PlanilhaMemoria(matriz), df_up, padrao_nova=padrao,
+                                                  disciplina=disciplina), len(df_up)),
+        'importacao_csv': (lambda: importar_blocos(PlanilhaMemoria(matriz), ler_blocos(io.BytesIO(csv_up), 'up.csv'),
+                                                   padrao_nova=padrao, disciplina=disciplina), len(df_up)),
+        # Matriz guardada da última leitura completa (CarregadorPlanilhas.matriz_planilha)
+        'importacao_matriz_cache': (lambda: importar_blocos(PlanilhaMemoria(matriz), ler_blocos(io.BytesIO(csv_up), 'up.csv'),
+                                                            matriz=matriz, padrao_nova=padrao,
+                                                            disciplina=disciplina), len(df_up)),
+        'exportar_excel': (lambda: gerar_excel(df[colunas], f"Base {disciplina}"), linhas),
+        'exportar_excel_pandas': (lambda: excel_via_pandas(df[colunas], f"Base {disciplina}"), linhas),
+    }
+    resultados = {}
+    for caso, (funcao, n) in casos.items():
+        if filtro and caso not in filtro:
+            continue
+        lidas_antes = ws.celulas_lidas
+        segundos = cronometrar(funcao, repeticoes)
+        resultados[f"{PLANILHAS[disciplina]}/{linhas}/{caso}"] = {
+            'segundos': round(segundos, 4),
+            'linhas': n,
+            'linhas_por_seg': round(n / segundos, 1) if segundos > 0 else 0.0,
+        }
+        if ws.celulas_lidas > lidas_antes:
+            # Células vindas da planilha por repetição (tamanho da resposta da API)
+            resultados[f"{PLANILHAS[disciplina]}/{linhas}/{caso}"]['celulas_lidas'] = \
+                (ws.celulas_lidas - lidas_antes) // repeticoes
+    chave = f"{PLANILHAS[disciplina]}/{linhas}/extrair_dados"
+    if chave in resultados:
+        resultados[chave]['bytes_por_linha'] = round(bytes_por_linha(df), 1)
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if not anterior:
+            continue
+        variacao = atual['linhas_por_seg'] / anterior['linhas_por_seg'] - 1
+        atual['variacao'] = round(variacao, 3)
+        if variacao < -tolerancia:
+            regressoes.append(chave)
+    return regressoes
+
+
+def imprimir(resultados, regressoes):
+    print(f"{'caso':<40} {'segundos':>10} {'linhas/s':>12} {'vs base':>9}")
+    for chave, r in resultados.items():
+        variacao = f"{r['variacao']:+.0%}" if 'variacao' in r else "-"
+        marca = "  << REGRESSÃO" if chave in regressoes else ""
+        print(f"{chave:<40} {r['segundos']:>10.4f} {r['linhas_por_seg']:>12.0f} {variacao:>9}{marca}")
+    for chave, r in resultados.items():
+        if 'celulas_lidas' in r:
+            print(f"{chave}: {r['celulas_lidas']} células lidas da planilha")
+    for chave, r in resultados.items():
+        if 'bytes_por_linha' in r:
+            print(f"{chave.rsplit('/', 1)[0]}: {r['bytes_por_linha']:.0f} bytes/linha em memória")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline dos caminhos quentes do G-MONT.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[5000, 20000], help="Tamanhos por disciplina")
+    parser.add_argument("--disciplinas", nargs="+", default=list(PLANILHAS), choices=list(PLANILHAS))
+    parser.add_argument("--casos", nargs="+", help="Só estes casos (ex.: status importacao)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--base", default=BASE_PADRAO, help="Arquivo JSON com a base de comparação")
+    parser.add_argument("--salvar-base", action="store_true", help="Grava os resultados como nova base")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Queda de vazão aceita (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    resultados = {}
+    for n in args.linhas:
+        for disciplina in args.disciplinas:
+            resultados.update(medir_disciplina(disciplina, n, args.repeticoes, args.casos))
+
+    base = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)['resultados']
+    regressoes = comparar(resultados, base, args.tolerancia)
+    imprimir(resultados, regressoes)
+
+    if args.salvar_base:
+        pasta = os.path.dirname(args.base)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump({'gerado_em': time.strftime("%Y-%m-%d %H:%M:%S"), 'python': platform.python_version(),
+                       'pandas': pd.__version__, 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"Base gravada em {args.base}")
+    elif regressoes:
+        print(f"{len(regressoes)} caso(s) abaixo da base (tolerância {args.tolerancia:.0%})")
+        sys.exit(1)
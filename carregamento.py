@@ -0,0 +1,465 @@
+# Camada de carga das planilhas: uma entrada de cache por disciplina,
+# carregada sob demanda e compartilhada entre as sessões do Streamlit.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from diagnostico import contar, medir
+from esquema import TIPO_TEXTO, atualizar_tipos, bytes_por_linha, colunas_planilha, compactar, gravar_celula, tipar_dados
+from regras_status import calcular_status, colunas_regras
+
+COLUNAS_OBRIGATORIAS = ['TAG', 'SEMANA OBRA', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'STATUS', 'OBS', 'DESCRIÇÃO', 'ÁREA', 'DOCUMENTO', 'PREVISTO']
+VALORES_VAZIOS = ['nan', 'None', 'NaT', '-']
+
+
+def montar_dataframe(data):
+    if len(data) > 1:
+        df = pd.DataFrame(data[1:], columns=[str(c).strip() for c in data[0]], dtype=TIPO_TEXTO)
+        # Coluna a coluna e por posição (aceita cabeçalho repetido), sem cópia extra do frame
+        for i in range(df.shape[1]):
+            valores = df.iloc[:, i].str.strip()
+            df.isetitem(i, valores.mask(valores.isin(VALORES_VAZIOS), ""))
+        for c in COLUNAS_OBRIGATORIAS:
+            if c not in df.columns:
+                df[c] = ""
+        return compactar(df)
+    return pd.DataFrame()
+
+
+def normalizar_valor(val):
+    val = str(val).strip()
+    return "" if val in VALORES_VAZIOS else val
+
+
+def montar_modelo(data, disciplina=None):
+    # DataFrame normalizado + colunas tipadas, e o relatório de datas inválidas.
+    # Com a disciplina, o STATUS sai das regras (uma vez por versão dos dados)
+    with medir('normalizacao', len(data)):
+        df = montar_dataframe(data)
+    with medir('tipagem', len(df)):
+        erros = tipar_dados(df) if not df.empty else {}
+    if disciplina and not df.empty:
+        with medir('status', len(df)):
+            df['STATUS'] = calcular_status(df, disciplina)
+    return df, erros
+
+
+def gravar_valores(df, linhas, disciplina=None):
+    # linhas: {posição: {coluna: valor}}; reconverte os tipos das células tocadas
+    alteradas = set()
+    for pos, valores in linhas.items():
+        for col, val in valores.items():
+            if col not in df.columns:
+                df[col] = ""
+            gravar_celula(df, pos, col, normalizar_valor(val))
+            alteradas.add(col)
+    if linhas:
+        atualizar_tipos(df, linhas.keys(), alteradas)
+    if disciplina and alteradas & colunas_regras(disciplina):
+        for pos, status in calcular_status(df.loc[list(linhas)], disciplina).items():
+            gravar_celula(df, pos, 'STATUS', status)
+
+
+def extrair_dados(ws, disciplina=None):
+    return montar_modelo(ws.get_all_values(), disciplina)
+
+
+def letra_coluna(indice):
+    # 0 -> "A"
+    return rowcol_to_a1(1, indice + 1)[:-1]
+
+
+def faixas_contiguas(posicoes):
+    # [0, 1, 2, 5, 6] -> [(0, 2), (5, 6)]: colunas vizinhas vão no mesmo range
+    faixas = []
+    for pos in sorted(set(posicoes)):
+        if faixas and pos == faixas[-1][1] + 1:
+            faixas[-1] = (faixas[-1][0], pos)
+        else:
+            faixas.append((pos, pos))
+    return faixas
+
+
+def ler_cabecalho(ws):
+    return [str(c).strip() for c in ws.row_values(1)]
+
+
+def ler_colunas(ws, colunas, cabecalho=None):
+    # Matriz (cabeçalho + linhas) só com as colunas pedidas, em um único
+    # batch_get com um range por bloco de colunas vizinhas. O cabeçalho vem
+    # junto (linha 1 de cada range) e confere as posições; se a planilha
+    # ganhou/perdeu colunas, relê o cabeçalho e tenta de novo.
+    # Devolve (matriz, cabeçalho completo usado).
+    for tentativa in range(2):
+        if cabecalho is None or tentativa:
+            cabecalho = ler_cabecalho(ws)
+        posicoes = [cabecalho.index(c) for c in dict.fromkeys(['TAG'] + list(colunas)) if c in cabecalho]
+        if not posicoes:
+            return [], cabecalho
+        faixas = faixas_contiguas(posicoes)
+        blocos = ws.batch_get([f"{letra_coluna(ini)}1:{letra_coluna(fim)}" for ini, fim in faixas])
+
+        nomes = []
+        for (ini, fim), bloco in zip(faixas, blocos):
+            topo = list(bloco[0]) if bloco else []
+            nomes += [str(v).strip() for v in topo] + [""] * (fim - ini + 1 - len(topo))
+        if nomes == [cabecalho[p] for ini, fim in faixas for p in range(ini, fim + 1)]:
+            break
+    else:
+        raise ValueError("Cabeçalho da planilha mudou durante a leitura por colunas.")
+
+    total = max(len(bloco) for bloco in blocos)
+    linhas = [[] for _ in range(total - 1)]
+    for (ini, fim), bloco in zip(faixas, blocos):
+        # A API omite linhas e células vazias do fim de cada range
+        largura = fim - ini + 1
+        for i, linha in enumerate(linhas, start=1):
+            valores = list(bloco[i]) if i < len(bloco) else []
+            linha.extend(valores + [""] * (largura - len(valores)))
+    return [nomes] + linhas, cabecalho
+
+
+def ler_revisao(ws):
+    # Sinal barato de alteração (modifiedTime do Drive); None se indisponível
+    try:
+        return ws.spreadsheet.get_lastUpdateTime()
+    except Exception:
+        contar('erro:revisao')
+        return None
+
+
+class CarregadorPlanilhas:
+    # Com revisão disponível, a cada intervalo_verificacao segundos só a revisão
+    # é consultada e a planilha inteira só é lida se ela mudou; sem revisão,
+    # vale o ttl de recarga completa
+    def __init__(self, abrir_planilha, ttl=600, snapshots=None, intervalo_verificacao=30, disciplinas=None):
+        self._abrir_planilha = abrir_planilha
+        # nome da planilha -> disciplina (regras de STATUS)
+        self.disciplinas = disciplinas or {}
+        self.ttl = ttl
+        self.intervalo_verificacao = intervalo_verificacao
+        self.snapshots = snapshots
+        self._entradas = {}
+        self._travas = {}
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="gmont-carga")
+        self._tarefas = {}
+        self._versoes = {}
+        self._invalidadas = set()
+        self._erros_leitura = {}
+        # Cabeçalho da planilha por nome: posições das colunas nas leituras parciais
+        self._cabecalhos = {}
+        # Callable nome -> {TAG: {coluna: valor}} com edições ainda não gravadas
+        self.alteracoes_pendentes = None
+        # Callable (nome, df) chamado a cada versão nova (ex.: histórico da Curva S),
+        # numa thread própria: fora da trava e na ordem das versões
+        self.ao_publicar = None
+        self._avisos = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gmont-avisos")
+
+    def _trava_de(self, nome):
+        with self._trava:
+            return self._travas.setdefault(nome, threading.RLock())
+
+    def _fresca(self, entrada):
+        if entrada is None:
+            return False
+        if entrada.get('revisao') is None:
+            return time.time() - entrada['carregado_em'] < self.ttl
+        return time.time() - entrada['verificado_em'] < self.intervalo_verificacao
+
+    def _publicar(self, nome, entrada, avisar=True):
+        # Toda troca de dados (carga ou escrita) gera uma nova versão
+        entrada['versao'] = self._versoes.get(nome, 0) + 1
+        self._versoes[nome] = entrada['versao']
+        self._entradas[nome] = entrada
+        if avisar:
+            self._notificar(nome, entrada)
+
+    def _notificar(self, nome, entrada):
+        if self.ao_publicar is not None and not entrada['df'].empty:
+            self._avisos.submit(self._avisar, nome, entrada['df'])
+
+    def _avisar(self, nome, df):
+        try:
+            self.ao_publicar(nome, df)
+        except Exception:
+            contar('erro:ao_publicar')
+
+    def _abrir_snapshot(self, nome):
+        matriz, sincronizado_em = self.snapshots.ler(nome)
+        if not matriz:
+            return None
+        df, erros = montar_modelo(matriz, self.disciplinas.get(nome))
+        self._sobrepor_pendentes(nome, df)
+        # carregado_em = 0 força a sincronização com a planilha logo em seguida
+        return {'df': df, 'erros': erros, 'ws': None, 'carregado_em': 0,
+                'sincronizado_em': sincronizado_em, 'origem': 'snapshot'}
+
+    def _sincronizar(self, nome, colunas=None):
+        # colunas: leitura parcial (só essas colunas + TAG); a entrada fica
+        # marcada e quem precisar da planilha inteira força a leitura completa
+        try:
+            with medir(f'leitura_planilha:{nome}'):
+                ws = self._abrir_planilha(nome)
+                # Revisão lida antes dos dados: uma edição no meio gera nova carga depois
+                revisao = ler_revisao(ws)
+                if colunas is None:
+                    matriz = ws.get_all_values()
+                    if matriz:
+                        self._cabecalhos[nome] = [str(c).strip() for c in matriz[0]]
+                else:
+                    matriz, self._cabecalhos[nome] = ler_colunas(ws, colunas, self._cabecalhos.get(nome))
+        except Exception as e:
+            # Já passou pelas novas tentativas do cliente; fica visível na tela
+            contar('erro:leitura_planilha')
+            self._erros_leitura[nome] = f"{type(e).__name__}: {e}"
+            return None
+        self._erros_leitura.pop(nome, None)
+
+        agora = time.time()
+        with self._trava_de(nome):
+            entrada = self._entradas.get(nome)
+            mudou = True
+            if self.snapshots is not None and colunas is None:
+                delta = self.snapshots.sincronizar(nome, matriz)
+                # Entrada parcial sempre dá lugar à leitura completa, mesmo sem delta
+                mudou = (entrada is None or entrada.get('colunas') is not None
+                         or delta['alteradas'] > 0 or delta['removidas'] > 0)
+
+            if mudou:
+                df, erros = montar_modelo(matriz, self.disciplinas.get(nome))
+                self._sobrepor_pendentes(nome, df)
+                # matriz: o get_all_values como veio (a importação compara com o
+                # gravado na planilha, não com o STATUS calculado nem a fila)
+                entrada = {'df': df, 'erros': erros, 'ws': ws if not df.empty else None,
+                           'colunas': tuple(colunas) if colunas is not None else None,
+                           'matriz': matriz if colunas is None else None}
+                entrada.update({'carregado_em': agora, 'sincronizado_em': agora, 'verificado_em': agora,
+                                'revisao': revisao, 'origem': 'planilha'})
+                self._publicar(nome, entrada)
+                self._invalidadas.discard(nome)
+            else:
+                # Planilha igual ao snapshot: mantém os dados e a versão atuais;
+                # o aviso que faltou na abertura do snapshot sai agora
+                if entrada.get('origem') == 'snapshot':
+                    self._notificar(nome, entrada)
+                entrada.update({'ws': ws if not entrada['df'].empty else None, 'matriz': matriz, 'carregado_em': agora,
+                                'sincronizado_em': agora, 'verificado_em': agora, 'revisao': revisao,
+                                'origem': 'planilha'})
+            return entrada
+
+    def _sobrepor_pendentes(self, nome, df):
+        # Edições na fila de gravação continuam valendo sobre a leitura nova
+        pendentes = self.alteracoes_pendentes(nome) if self.alteracoes_pendentes and not df.empty else {}
+        if not pendentes:
+            return
+        linhas = {}
+        mascara = df['TAG'].isin(list(pendentes))
+        for pos, tag in zip(df.index[mascara], df.loc[mascara, 'TAG']):
+            linhas.setdefault(pos, pendentes[tag])
+        gravar_valores(df, linhas, self.disciplinas.get(nome))
+
+    def _verificar(self, nome, completa=False):
+        # Consulta só a revisão; a leitura completa fica para quando ela muda
+        entrada = self._entradas.get(nome)
+        colunas = entrada.get('colunas') if entrada is not None and not completa else None
+        if entrada is not None and entrada.get('colunas') is not None and colunas is None:
+            return self._sincronizar(nome)
+        if entrada is None or entrada.get('revisao') is None or entrada.get('ws') is None:
+            return self._sincronizar(nome, colunas)
+        revisao = ler_revisao(entrada['ws'])
+        if revisao is None or revisao != entrada['revisao']:
+            contar('revisao:alterada')
+            return self._sincronizar(nome, colunas)
+        contar('revisao:igual')
+        agora = time.time()
+        entrada.update({'verificado_em': agora, 'sincronizado_em': agora})
+        return entrada
+
+    def sincronizar_em_segundo_plano(self, nome, completa=False):
+        tarefa = self._tarefas.get(nome)
+        if tarefa is None or tarefa.done():
+            self._tarefas[nome] = self._executor.submit(self._verificar, nome, completa)
+
+    def sincronizando(self, nome):
+        tarefa = self._tarefas.get(nome)
+        return tarefa is not None and not tarefa.done()
+
+    @staticmethod
+    def _atende(entrada, colunas):
+        # Entrada completa atende qualquer pedido; parcial, só um subconjunto
+        if entrada is None:
+            return False
+        if entrada.get('colunas') is None:
+            return True
+        return colunas is not None and set(colunas) <= set(entrada['colunas'])
+
+    def obter(self, nome, colunas=None):
+        # colunas=None: planilha inteira; com colunas, basta uma leitura parcial
+        entrada = self._entradas.get(nome)
+        contar('cache_hit:planilha' if self._atende(entrada, colunas) else 'cache_miss:planilha')
+        if not self._atende(entrada, colunas):
+            with self._trava_de(nome):
+                entrada = self._entradas.get(nome)
+                if entrada is None and self.snapshots is not None and nome not in self._invalidadas:
+                    entrada = self._abrir_snapshot(nome)
+                    if entrada is not None:
+                        # Dado da última sessão: sem aviso até a planilha confirmar
+                        self._publicar(nome, entrada, avisar=False)
+                if not self._atende(entrada, colunas):
+                    # Sem cache nem snapshot: a primeira leitura é bloqueante
+                    entrada = self._sincronizar(nome, colunas)
+
+        if entrada is None:
+            return pd.DataFrame(), None, 0
+        if not self._fresca(entrada):
+            # Serve o dado atual e atualiza em segundo plano
+            self.sincronizar_em_segundo_plano(nome)
+        return entrada['df'], entrada['ws'], entrada['versao']
+
+    def obter_varios(self, nomes, colunas=None):
+        # Cargas em paralelo: o tempo total é o da planilha mais lenta, não a soma.
+        # colunas: {nome: colunas} para leituras parciais
+        colunas = colunas or {}
+        futuros = {nome: self._executor.submit(self.obter, nome, colunas.get(nome)) for nome in nomes}
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    def carregada(self, nome):
+        entrada = self._entradas.get(nome)
+        return entrada is not None and entrada.get('colunas') is None
+
+    def idade(self, nome):
+        entrada = self._entradas.get(nome)
+        if entrada is None or entrada.get('sincronizado_em') is None:
+            return None
+        return time.time() - entrada['sincronizado_em']
+
+    def erros_datas(self, nome):
+        entrada = self._entradas.get(nome)
+        return entrada.get('erros', {}) if entrada else {}
+
+    def memoria(self, nome):
+        # (bytes do DataFrame em cache, bytes por linha)
+        entrada = self._entradas.get(nome)
+        if entrada is None or entrada['df'].empty:
+            return None
+        df = entrada['df']
+        return int(df.memory_usage(deep=True, index=False).sum()), bytes_por_linha(df)
+
+    def erro_leitura(self, nome):
+        return self._erros_leitura.get(nome)
+
+    def origem(self, nome):
+        entrada = self._entradas.get(nome)
+        return entrada.get('origem') if entrada else None
+
+    def prefetch(self, nomes):
+        for nome in nomes:
+            if not self.carregada(nome):
+                self.sincronizar_em_segundo_plano(nome, completa=True)
+
+    def invalidar(self, nome=None):
+        # Após invalidar, a próxima leitura vai à planilha (não ao snapshot)
+        nomes = list(self._entradas) if nome is None else [nome]
+        for n in nomes:
+            self._entradas.pop(n, None)
+            self._invalidadas.add(n)
+
+    def versao(self, nome):
+        return self._versoes.get(nome, 0)
+
+    def matriz_planilha(self, nome, ws=None):
+        # Matriz da última leitura completa (cabeçalho + linhas), sem novo
+        # get_all_values, se a revisão ainda é a da carga; senão None
+        entrada = self._entradas.get(nome)
+        if entrada is None or not entrada.get('matriz') or entrada.get('revisao') is None or entrada['df'].empty:
+            return None
+        if ler_revisao(ws or entrada['ws']) != entrada['revisao']:
+            contar('matriz:revisao_alterada')
+            return None
+        contar('matriz:reaproveitada')
+        return entrada['matriz']
+
+    def recarregar_linha(self, nome, pos):
+        # Relê só a linha da posição (row_values) e aplica no cache o que mudou;
+        # False se a linha da planilha já não é a mesma TAG (cache descartado)
+        entrada = self._entradas.get(nome)
+        cabecalho = self._cabecalhos.get(nome)
+        if entrada is None or entrada.get('ws') is None or not cabecalho or pos >= len(entrada['df']):
+            return False
+        df = entrada['df']
+        tag = df.at[pos, 'TAG']
+        linha = entrada['ws'].row_values(pos + 2)
+        valores = {col: normalizar_valor(linha[i]) if i < len(linha) else ""
+                   for i, col in enumerate(cabecalho) if col and col in df.columns}
+        if valores.get('TAG') != tag:
+            self.invalidar(nome)
+            return False
+        if self.disciplinas.get(nome):
+            # STATUS vem das regras, não do texto gravado na planilha
+            valores.pop('STATUS', None)
+        pendentes = self.alteracoes_pendentes(nome).get(tag, {}) if self.alteracoes_pendentes else {}
+        valores.update(pendentes)
+        mudou = {col: val for col, val in valores.items() if str(df.at[pos, col]) != normalizar_valor(val)}
+        if not mudou:
+            return True
+        return self.atualizar_linhas(nome, {pos: (tag, mudou)})
+
+    # Write-through: depois de uma escrita confirmada na planilha, aplica a
+    # mesma alteração no DataFrame em cache. Se a TAG esperada não bater com
+    # a linha em cache, descarta a entrada e a próxima leitura recarrega tudo.
+    def _alterar(self, nome, funcao):
+        with self._trava_de(nome):
+            entrada = self._entradas.get(nome)
+            if entrada is None:
+                return False
+            df = entrada['df'].copy()
+            # Entrada parcial não recebe escrita: a próxima leitura traz o dado novo
+            if df.empty or entrada.get('colunas') is not None or not funcao(df):
+                self.invalidar(nome)
+                return False
+            self._publicar(nome, {**entrada, 'df': df})
+            return True
+
+    def atualizar_linhas(self, nome, linhas):
+        def aplicar(df):
+            for pos, (tag, valores) in linhas.items():
+                if pos >= len(df) or df.at[pos, 'TAG'] != tag:
+                    return False
+            gravar_valores(df, {pos: valores for pos, (tag, valores) in linhas.items()}, self.disciplinas.get(nome))
+            return True
+        return self._alterar(nome, aplicar)
+
+    def anexar_linhas(self, nome, linhas):
+        with self._trava_de(nome):
+            entrada = self._entradas.get(nome)
+            if entrada is None:
+                return False
+            df = entrada['df']
+            if df.empty or entrada.get('colunas') is not None:
+                self.invalidar(nome)
+                return False
+            colunas = colunas_planilha(df)
+            novas = pd.DataFrame([
+                [normalizar_valor(v) for v in linha[:len(colunas)]] + [""] * (len(colunas) - len(linha))
+                for linha in linhas
+            ], columns=colunas)
+            tipar_dados(novas)
+            if self.disciplinas.get(nome):
+                novas['STATUS'] = calcular_status(novas, self.disciplinas[nome])
+            df = compactar(pd.concat([df, novas], ignore_index=True))
+            self._publicar(nome, {**entrada, 'df': df})
+            return True
+
+    def remover_linhas(self, nome, linhas):
+        def aplicar(df):
+            for pos, tag in linhas.items():
+                if pos >= len(df) or df.at[pos, 'TAG'] != tag:
+                    return False
+            df.drop(index=list(linhas), inplace=True)
+            df.reset_index(drop=True, inplace=True)
+            return True
+        return self._alterar(nome, aplicar)
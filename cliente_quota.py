@@ -0,0 +1,219 @@
+# Cliente da API com cota: balde de tokens para leituras e escritas, novas
+# tentativas com backoff exponencial e jitter em 429/5xx (escritas que não são
+# idempotentes só em 429: um 5xx pode vir depois de aplicada), métricas por método,
+# leituras idênticas simultâneas unidas em uma só requisição e as planilhas
+# abertas guardadas (sem client.open() a cada gravação).
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from diagnostico import contar
+
+LEITURAS = {'get_all_values', 'row_values', 'col_values', 'batch_get', 'find', 'get_lastUpdateTime'}
+ESCRITAS = {'update', 'batch_update', 'append_row', 'append_rows', 'delete_rows'}
+# Gravação de valores em faixas fixas: repetir regrava o mesmo conteúdo. Anexar
+# linhas ou excluir faixas (inclusive spreadsheet.batch_update) não
+ESCRITAS_IDEMPOTENTES = {'update', 'batch_update'}
+CODIGOS_TRANSITORIOS = {429, 500, 502, 503, 504}
+# 429 = recusada antes de aplicar
+CODIGOS_RECUSA = {429}
+
+
+def codigo_erro(exc):
+    # gspread.exceptions.APIError traz .code (6.x) e .response.status_code
+    codigo = getattr(exc, 'code', None)
+    if codigo is None:
+        codigo = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return codigo
+
+
+def erro_transitorio(exc, codigos=CODIGOS_TRANSITORIOS):
+    return codigo_erro(exc) in codigos
+
+
+class BaldeTokens:
+    def __init__(self, por_minuto, rajada=None):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = float(rajada if rajada is not None else max(1, por_minuto // 6))
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def consumir(self):
+        # Bloqueia até haver token; devolve quanto tempo esperou
+        esperou = 0.0
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return esperou
+                falta = (1 - self._tokens) / self.taxa
+            time.sleep(falta)
+            esperou += falta
+
+
+class ClienteQuota:
+    def __init__(self, leituras_por_minuto=60, escritas_por_minuto=60, max_tentativas=5,
+                 espera_base=1.0, espera_max=32.0):
+        self.baldes = {'leitura': BaldeTokens(leituras_por_minuto), 'escrita': BaldeTokens(escritas_por_minuto)}
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self._trava = threading.Lock()
+        self._em_andamento = {}
+        # Toda escrita muda a geração da planilha: leitura posterior não se une a uma anterior
+        self._geracao = defaultdict(int)
+        self._metricas = defaultdict(lambda: {'chamadas': 0, 'erros': 0, 'repeticoes': 0, 'coalescidas': 0,
+                                              'segundos': 0.0, 'espera_quota': 0.0})
+
+    def _registrar(self, metodo, **valores):
+        with self._trava:
+            m = self._metricas[metodo]
+            for chave, valor in valores.items():
+                m[chave] += valor
+
+    def metricas(self):
+        with self._trava:
+            return {metodo: dict(m) for metodo, m in self._metricas.items()}
+
+    def _chamar(self, metodo, tipo, funcao, codigos=CODIGOS_TRANSITORIOS):
+        for tentativa in range(1, self.max_tentativas + 1):
+            espera = self.baldes[tipo].consumir()
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao()
+            except Exception as e:
+                self._registrar(metodo, erros=1, espera_quota=espera, segundos=time.perf_counter() - inicio)
+                if not erro_transitorio(e, codigos) or tentativa == self.max_tentativas:
+                    raise
+                contar('api:repeticao')
+                self._registrar(metodo, repeticoes=1)
+                time.sleep(min(self.espera_max, self.espera_base * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.0))
+                continue
+            self._registrar(metodo, chamadas=1, espera_quota=espera, segundos=time.perf_counter() - inicio)
+            return resultado
+
+    def ler(self, nome, metodo, funcao, *args, **kwargs):
+        with self._trava:
+            chave = (nome, self._geracao[nome], metodo, repr(args), repr(sorted(kwargs.items())))
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_andamento[chave] = Future()
+        if not dono:
+            # Mesmo resultado para todas as sessões: tratar como somente leitura
+            contar('api:coalescida')
+            self._registrar(metodo, coalescidas=1)
+            return futuro.result()
+        try:
+            resultado = self._chamar(metodo, 'leitura', lambda: funcao(*args, **kwargs))
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._trava:
+                self._em_andamento.pop(chave, None)
+
+    def escrever(self, nome, metodo, funcao, *args, idempotente=False, **kwargs):
+        codigos = CODIGOS_TRANSITORIOS if idempotente else CODIGOS_RECUSA
+        with self._trava:
+            self._geracao[nome] += 1
+        try:
+            return self._chamar(metodo, 'escrita', lambda: funcao(*args, **kwargs), codigos)
+        finally:
+            with self._trava:
+                self._geracao[nome] += 1
+
+
+class ObjetoComQuota:
+    # Proxy de Worksheet/Spreadsheet que passa as chamadas de API pelo cliente
+    def __init__(self, alvo, cliente, nome, pasta=False):
+        self._alvo = alvo
+        self._cliente = cliente
+        self._nome = nome
+        # Na pasta (Spreadsheet), batch_update são requisições estruturais (deleteDimension)
+        self._pasta = pasta
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._alvo, atributo)
+        if atributo == 'spreadsheet':
+            return ObjetoComQuota(valor, self._cliente, self._nome, pasta=True)
+        if atributo in LEITURAS:
+            return lambda *args, **kwargs: self._cliente.ler(self._nome, atributo, valor, *args, **kwargs)
+        if atributo in ESCRITAS:
+            idempotente = atributo in ESCRITAS_IDEMPOTENTES and not self._pasta
+            return lambda *args, **kwargs: self._cliente.escrever(self._nome, atributo, valor, *args,
+                                                                  idempotente=idempotente, **kwargs)
+        return valor
+
+
+class BackendComQuota:
+    def __init__(self, backend, cliente=None):
+        self._backend = backend
+        self.nome = backend.nome
+        self.cliente = cliente or ClienteQuota()
+        self._abertas = {}
+        self._trava = threading.Lock()
+
+    def abrir(self, nome_planilha):
+        with self._trava:
+            ws = self._abertas.get(nome_planilha)
+        if ws is None:
+            ws = self.cliente.ler(nome_planilha, 'open', self._backend.abrir, nome_planilha)
+            with self._trava:
+                ws = self._abertas.setdefault(nome_planilha, ws)
+        return ObjetoComQuota(ws, self.cliente, nome_planilha)
+
+    def esquecer(self, nome_planilha=None):
+        # Descarta o handle guardado (ex.: planilha recriada no Drive)
+        with self._trava:
+            if nome_planilha is None:
+                self._abertas.clear()
+            else:
+                self._abertas.pop(nome_planilha, None)
+
+    def __getattr__(self, nome):
+        return getattr(self._backend, nome)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    from dados_sinteticos import gerar_planilha
+    from planilha_local import PlanilhaComLimite, PlanilhaMemoria
+
+    class BackendFalso:
+        nome = "falso"
+
+        def __init__(self):
+            # 20 chamadas por segundo na "planilha"; o cliente tenta mais rápido que isso
+            self.planilha = PlanilhaComLimite(PlanilhaMemoria(gerar_planilha("ELÉTRICA", 2000), "BD_ELE"),
+                                              limite=20, janela=1.0)
+
+        def abrir(self, nome_planilha):
+            return self.planilha
+
+    falso = BackendFalso()
+    backend = BackendComQuota(falso, ClienteQuota(leituras_por_minuto=480, escritas_por_minuto=480,
+                                                  max_tentativas=8, espera_base=0.25, espera_max=4.0))
+
+    def sessao(i):
+        ws = backend.abrir("BD_ELE")
+        ws.get_all_values()
+        ws.update([[str(i)]], f"B{i + 2}")
+        return ws.row_values(i + 2)[1]
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        valores = list(executor.map(sessao, range(40)))
+    print(f"40 sessões em {time.perf_counter() - inicio:.1f}s; valores gravados corretos: {valores == [str(i) for i in range(40)]}")
+    print(f"429 simulados: {falso.planilha.recusadas}; chamadas que chegaram à planilha: {dict(falso.planilha.planilha.chamadas)}")
+    for metodo, m in backend.cliente.metricas().items():
+        print(f"  {metodo}: {m}")
@@ -0,0 +1,13 @@
+# Configurações do G-MONT: variável de ambiente GMONT_<CHAVE> ou st.secrets[<CHAVE>].
+import os
+
+
+def obter_config(chave, padrao=None):
+    valor = os.environ.get(f"GMONT_{chave}")
+    if valor is not None:
+        return valor
+    try:
+        import streamlit as st
+        return st.secrets.get(chave, padrao)
+    except Exception:
+        return padrao
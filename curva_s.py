@@ -0,0 +1,97 @@
+# Agregação da Curva S: histogramas semanais e acumulados com aritmética
+# inteira de semanas, sem apply linha a linha.
+import numpy as np
+import pandas as pd
+
+from esquema import COLUNA_SEMANA, coluna_tipada
+
+# Colunas da planilha que a curva usa (leitura parcial no painel consolidado)
+COLUNAS_CURVA = ['SEMANA OBRA', 'PREVISTO', 'DATA MONT']
+
+
+def semanas_obra(datas, data_inicio):
+    # Semana 1 começa em data_inicio; datas vazias viram 0
+    dias = (datas - pd.Timestamp(data_inicio)).dt.days.to_numpy(dtype=float, na_value=np.nan)
+    semanas = np.floor_divide(dias, 7) + 1
+    return np.nan_to_num(semanas, nan=0).astype(np.int64)
+
+
+def histograma_semanal(semanas, ultima):
+    validas = semanas[(semanas >= 1) & (semanas <= ultima)]
+    return np.bincount(validas, minlength=ultima + 1)[1:]
+
+
+def calcular_curva_s(df, data_inicio, status_montado=('MONTADO',)):
+    # Usa as colunas tipadas na carga (esquema.tipar_dados); status_montado
+    # vem das regras da disciplina (regras_status)
+    sem_prog = df[COLUNA_SEMANA].to_numpy()
+    sem_prev = semanas_obra(df[coluna_tipada('PREVISTO')], data_inicio)
+    sem_real = semanas_obra(df[coluna_tipada('DATA MONT')], data_inicio)
+
+    total = len(df)
+    montados = int(df['STATUS'].isin(list(status_montado)).sum()) if 'STATUS' in df.columns else 0
+    ultima = int(max(sem_prev.max(initial=0), sem_prog.max(initial=0), sem_real.max(initial=0)))
+
+    curva = {
+        'total': total,
+        'montados': montados,
+        'percentual': (montados / total * 100) if total > 0 else 0,
+        'semanas': np.arange(1, ultima + 1),
+    }
+    for chave, semanas in (('previsto', sem_prev), ('programado', sem_prog), ('realizado', sem_real)):
+        curva[chave] = histograma_semanal(semanas, ultima)
+        curva[f'{chave}_acum'] = np.cumsum(curva[chave])
+    return curva
+
+
+def resumo_semanal(curva):
+    return pd.DataFrame({
+        "Semana": curva['semanas'],
+        "Previsto": curva['previsto_acum'],
+        "Programado": curva['programado_acum'],
+        "Realizado": curva['realizado_acum'],
+    }).set_index("Semana")
+
+
+def combinar_curvas(curvas):
+    # Soma curvas de várias disciplinas; todas começam na semana 1
+    ultima = max((len(c['semanas']) for c in curvas), default=0)
+    total = sum(c['total'] for c in curvas)
+    montados = sum(c['montados'] for c in curvas)
+    combinada = {
+        'total': total,
+        'montados': montados,
+        'percentual': (montados / total * 100) if total > 0 else 0,
+        'semanas': np.arange(1, ultima + 1),
+    }
+    for chave in ('previsto', 'programado', 'realizado'):
+        soma = np.zeros(ultima, dtype=np.int64)
+        for c in curvas:
+            soma[:len(c[chave])] += c[chave]
+        combinada[chave] = soma
+        combinada[f'{chave}_acum'] = np.cumsum(soma)
+    return combinada
+
+
+def _acumulado(curva, chave, ultima):
+    semanal = np.zeros(ultima, dtype=np.int64)
+    semanal[:len(curva[chave])] = curva[chave]
+    return np.cumsum(semanal)
+
+
+def desvio_curvas(atual, referencia):
+    # Semana a semana, contra uma curva gravada (linha de base ou registro
+    # anterior): desvio < 0 = atrasado em relação ao que a referência programava
+    ultima = max(len(atual['semanas']), len(referencia['semanas']))
+    prog_ref = _acumulado(referencia, 'programado', ultima)
+    prog = _acumulado(atual, 'programado', ultima)
+    real = _acumulado(atual, 'realizado', ultima)
+    return pd.DataFrame({
+        "Semana": np.arange(1, ultima + 1),
+        "Programado (ref.)": prog_ref,
+        "Realizado (ref.)": _acumulado(referencia, 'realizado', ultima),
+        "Programado": prog,
+        "Realizado": real,
+        "Desvio Programação": prog - prog_ref,
+        "Desvio Realizado": real - prog_ref,
+    }).set_index("Semana")
@@ -0,0 +1,97 @@
+# Gerador de planilhas sintéticas no formato das BD_ELE / BD_INST / BD_ESTR,
+# para medir o app com volumes de obra completa (100k+ TAGs) sem credenciais.
+import random
+from datetime import datetime, timedelta
+
+CABECALHO = ['TAG', 'SEMANA OBRA', 'PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'STATUS',
+             'DISCIPLINA', 'DESCRIÇÃO', 'ÁREA', 'DOCUMENTO', 'FAMÍLIA', 'OBS', 'UNIDADE',
+             'DATA FABRICAÇÃO', 'DATA PINTURA', 'DATA TARQUE']
+
+PLANILHAS = {"ELÉTRICA": "BD_ELE", "INSTRUMENTAÇÃO": "BD_INST", "ESTRUTURA": "BD_ESTR"}
+PREFIXOS = {"ELÉTRICA": "EL", "INSTRUMENTAÇÃO": "IT", "ESTRUTURA": "ES"}
+FAMILIAS = {
+    "ELÉTRICA": ["CABO", "ELETRODUTO", "PAINEL", "LUMINÁRIA", "MOTOR"],
+    "INSTRUMENTAÇÃO": ["TRANSMISSOR", "VÁLVULA", "MANÔMETRO", "ANALISADOR", "CAIXA JUNÇÃO"],
+    "ESTRUTURA": ["PILAR", "VIGA", "CONTRAVENTAMENTO", "PLATAFORMA", "ESCADA"],
+}
+AREAS = [f"U-{n}" for n in (11, 12, 13, 21, 22, 31, 41, 51)]
+UNIDADES = ["UN", "M", "KG", "CJ"]
+DATA_INICIO_OBRA = datetime(2025, 9, 29)
+
+
+def formatar_data_mista(rnd, data):
+    # Maioria no padrão dd/mm/aaaa; o resto imita o que chega por importação
+    sorteio = rnd.random()
+    if sorteio < 0.85:
+        return data.strftime("%d/%m/%Y")
+    if sorteio < 0.93:
+        return data.strftime("%Y-%m-%d")
+    if sorteio < 0.97:
+        return f"{data.day}/{data.month}/{data.year}"
+    if sorteio < 0.99:
+        return "DD/MM/YYYY"
+    return "31/02/2025"
+
+
+def gerar_linha(rnd, disciplina, i, semanas):
+    semana = rnd.randint(1, semanas)
+    inicio = DATA_INICIO_OBRA + timedelta(weeks=semana - 1)
+    previsto = inicio + timedelta(days=rnd.randint(-14, 28))
+    familia = rnd.choice(FAMILIAS[disciplina])
+    linha = dict.fromkeys(CABECALHO, "")
+    linha.update({
+        'TAG': f"{PREFIXOS[disciplina]}-{rnd.choice(AREAS)[2:]}-{i:06d}",
+        'PREVISTO': formatar_data_mista(rnd, previsto),
+        'DISCIPLINA': disciplina,
+        'DESCRIÇÃO': f"{familia} {rnd.randint(1, 999):03d} - ITEM SINTÉTICO",
+        'ÁREA': rnd.choice(AREAS),
+        'DOCUMENTO': f"DE-{rnd.randint(1000, 9999)}-{rnd.randint(1, 99):02d}",
+        'FAMÍLIA': familia,
+        'UNIDADE': rnd.choice(UNIDADES),
+    })
+    if rnd.random() < 0.05:
+        linha['OBS'] = rnd.choice(["Aguardando material", "Interferência civil", "Liberado pela qualidade"])
+
+    # Etapas em sequência; cada uma só existe se a anterior existe
+    if rnd.random() < 0.7:
+        linha['SEMANA OBRA'] = str(semana)
+        linha['DATA INIC PROG'] = formatar_data_mista(rnd, inicio)
+        linha['DATA FIM PROG'] = formatar_data_mista(rnd, inicio + timedelta(days=4))
+        data = inicio
+        if disciplina == "ESTRUTURA":
+            etapas = ['DATA FABRICAÇÃO', 'DATA PINTURA', 'DATA MONT', 'DATA TARQUE']
+            for col in etapas:
+                if rnd.random() > 0.75:
+                    break
+                data += timedelta(days=rnd.randint(2, 10))
+                linha[col] = formatar_data_mista(rnd, data)
+        elif rnd.random() < 0.55:
+            linha['DATA MONT'] = formatar_data_mista(rnd, data + timedelta(days=rnd.randint(0, 6)))
+    return [linha[c] for c in CABECALHO]
+
+
+def gerar_planilha(disciplina, linhas, semente=2026, semanas=60):
+    rnd = random.Random(f"{semente}-{disciplina}")
+    return [list(CABECALHO)] + [gerar_linha(rnd, disciplina, i, semanas) for i in range(linhas)]
+
+
+def gerar_projeto(linhas, semente=2026):
+    # {nome da planilha: matriz} para as três disciplinas
+    return {nome: gerar_planilha(disc, linhas, semente) for disc, nome in PLANILHAS.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from armazenamento import BackendSQLite
+
+    parser = argparse.ArgumentParser(description="Gera as planilhas sintéticas no backend SQLite local.")
+    parser.add_argument("--linhas", type=int, default=10000, help="Linhas por disciplina")
+    parser.add_argument("--semente", type=int, default=2026)
+    parser.add_argument("--db", default=".gmont/planilhas.db")
+    args = parser.parse_args()
+
+    backend = BackendSQLite(args.db)
+    for nome, matriz in gerar_projeto(args.linhas, args.semente).items():
+        backend.gravar_planilha(nome, matriz)
+        print(f"{nome}: {len(matriz) - 1} linhas gravadas em {args.db}")
@@ -0,0 +1,126 @@
+# Instrumentação leve: tempo por fase, linhas processadas, chamadas de API e
+# acertos/faltas de cache, por rerun do Streamlit e acumulado no processo.
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+METODOS_API = {'get_all_values', 'row_values', 'col_values', 'batch_get', 'update', 'batch_update',
+               'append_row', 'append_rows', 'find', 'delete_rows'}
+
+_local = threading.local()
+_trava = threading.Lock()
+TOTAIS = Counter()
+
+
+class Medidor:
+    def __init__(self, rotulo=""):
+        self.rotulo = rotulo
+        self.inicio = time.time()
+        # Última atividade do rerun: o resumo é pedido só no rerun seguinte e
+        # não pode contar o tempo parado entre os dois
+        self.fim = self.inicio
+        self.fases = []
+        self.contadores = Counter()
+
+    def encerrar(self):
+        self.fim = time.time()
+
+    def registrar_fase(self, fase, segundos, linhas=None):
+        self.fases.append({'fase': fase, 'ms': round(segundos * 1000, 2), 'linhas': linhas})
+        self.encerrar()
+
+    def resumo(self):
+        return {
+            'inicio': self.inicio,
+            'rotulo': self.rotulo,
+            'duracao_ms': round((self.fim - self.inicio) * 1000, 2),
+            'fases': self.fases,
+            'contadores': dict(self.contadores),
+        }
+
+
+def medidor_atual():
+    return getattr(_local, 'medidor', None)
+
+
+def ativar(medidor):
+    _local.medidor = medidor
+    return medidor
+
+
+def contar(chave, n=1):
+    with _trava:
+        TOTAIS[chave] += n
+    medidor = medidor_atual()
+    if medidor is not None:
+        medidor.contadores[chave] += n
+        medidor.encerrar()
+
+
+@contextmanager
+def medir(fase, linhas=None):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        with _trava:
+            TOTAIS[f'ms:{fase}'] += round(segundos * 1000)
+        medidor = medidor_atual()
+        if medidor is not None:
+            medidor.registrar_fase(fase, segundos, linhas)
+
+
+@contextmanager
+def consulta_cache(nome):
+    # A função em cache chama contar('cache_miss:<nome>') quando executa de fato
+    medidor = medidor_atual()
+    antes = medidor.contadores[f'cache_miss:{nome}'] if medidor else TOTAIS[f'cache_miss:{nome}']
+    yield
+    depois = medidor.contadores[f'cache_miss:{nome}'] if medidor else TOTAIS[f'cache_miss:{nome}']
+    if depois == antes:
+        contar(f'cache_hit:{nome}')
+
+
+def gravar_jsonl(caminho, registro):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with _trava, open(caminho, 'a', encoding='utf-8') as arq:
+        arq.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+class ObjetoInstrumentado:
+    # Proxy que conta e cronometra as chamadas de API de uma planilha
+    def __init__(self, alvo, prefixo="api"):
+        self._alvo = alvo
+        self._prefixo = prefixo
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._alvo, nome)
+        if nome == 'spreadsheet':
+            return ObjetoInstrumentado(atributo, f"{self._prefixo}:spreadsheet")
+        if not callable(atributo) or (nome not in METODOS_API and self._prefixo == "api"):
+            return atributo
+
+        def chamar(*args, **kwargs):
+            contar(f"{self._prefixo}:{nome}")
+            with medir(f"{self._prefixo}:{nome}"):
+                return atributo(*args, **kwargs)
+        return chamar
+
+
+class BackendInstrumentado:
+    def __init__(self, backend):
+        self._backend = backend
+        self.nome = backend.nome
+
+    def abrir(self, nome_planilha):
+        contar("api:open")
+        return ObjetoInstrumentado(self._backend.abrir(nome_planilha))
+
+    def __getattr__(self, nome):
+        return getattr(self._backend, nome)
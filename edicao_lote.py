@@ -0,0 +1,64 @@
+# Edição em massa do Quadro de Visualização: grade editável, diff por célula
+# contra o original e STATUS recalculado pelas regras da disciplina.
+import pandas as pd
+
+from esquema import COLUNAS_DATA, FORMATO_DATA, coluna_tipada
+from regras_status import calcular_status
+
+COLUNAS_TEXTO_EDITAVEIS = ['SEMANA OBRA', 'OBS']
+
+
+def colunas_editaveis(colunas):
+    return [c for c in colunas if c in COLUNAS_DATA or c in COLUNAS_TEXTO_EDITAVEIS]
+
+
+def preparar_grade(df, colunas):
+    # Datas vão para a grade como date (vazias = None); o índice guarda a posição
+    grade = df[[c for c in colunas if c in df.columns]].copy()
+    for col in grade.columns:
+        if col in COLUNAS_DATA:
+            datas = df[coluna_tipada(col)]
+            grade[col] = pd.Series(datas.dt.date, index=df.index, dtype=object).where(datas.notna(), None)
+        elif isinstance(grade[col].dtype, pd.CategoricalDtype):
+            # Categoria viraria lista fechada no data_editor; a grade aceita texto livre
+            grade[col] = grade[col].astype(str)
+    return grade
+
+
+def texto_grade(grade, colunas):
+    texto = pd.DataFrame(index=grade.index)
+    for col in colunas:
+        if col in COLUNAS_DATA:
+            texto[col] = pd.to_datetime(grade[col], errors='coerce').dt.strftime(FORMATO_DATA).fillna("")
+        else:
+            texto[col] = grade[col].astype(object).fillna("").astype(str).str.strip()
+    return texto
+
+
+def diff_grade(original, editado, colunas):
+    # {posição: {coluna: novo valor}} só com as células que mudaram
+    antes = texto_grade(original, colunas)
+    depois = texto_grade(editado.reindex(original.index), colunas)
+    mudou = antes.ne(depois)
+    alteracoes = {}
+    for col in colunas:
+        for pos in mudou.index[mudou[col].to_numpy()]:
+            alteracoes.setdefault(pos, {})[col] = depois.at[pos, col]
+    return alteracoes
+
+
+def aplicar_status(df, alteracoes, disciplina):
+    # Recalcula o STATUS só das linhas alteradas, já com os valores novos
+    if not alteracoes:
+        return alteracoes
+    posicoes = list(alteracoes)
+    # object: aceita valores fora das categorias das colunas compactas
+    linhas = df.loc[posicoes].astype(object)
+    for pos, valores in alteracoes.items():
+        for col, val in valores.items():
+            linhas.at[pos, col] = val
+    novos = calcular_status(linhas, disciplina)
+    for pos in posicoes:
+        if novos[pos] != df.at[pos, 'STATUS']:
+            alteracoes[pos]['STATUS'] = novos[pos]
+    return alteracoes
@@ -0,0 +1,111 @@
+# Modelo tipado dos dados: colunas de data convertidas uma única vez na carga,
+# ao lado das strings originais, e a SEMANA OBRA já como inteiro.
+import numpy as np
+import pandas as pd
+
+COLUNAS_DATA = ['PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'DATA TARQUE', 'DATA FABRICAÇÃO', 'DATA PINTURA']
+COLUNA_SEMANA = 'SEMANA_N'
+FORMATO_DATA = '%d/%m/%Y'
+DATAS_VAZIAS = ['', 'DD/MM/YYYY']
+MAX_EXEMPLOS_ERRO = 20
+# Poucos valores distintos: guardadas como categoria (códigos inteiros)
+COLUNAS_CATEGORICAS = ['STATUS', 'ÁREA', 'DISCIPLINA', 'SEMANA OBRA', 'UNIDADE', 'FAMÍLIA']
+
+
+def _tipo_texto():
+    # Texto em Arrow com NaN como ausente (padrão do pandas 3); no pandas 2
+    # o equivalente é "pyarrow_numpy"; sem pyarrow fica object
+    for argumentos in ({'storage': 'pyarrow', 'na_value': np.nan}, {'storage': 'pyarrow_numpy'}):
+        try:
+            tipo = pd.StringDtype(**argumentos)
+            pd.Series([""], dtype=tipo)
+            return tipo
+        except (TypeError, ValueError, ImportError):
+            continue
+    return object
+
+
+TIPO_TEXTO = _tipo_texto()
+
+
+def coluna_tipada(col):
+    return f"DT_{col}"
+
+
+COLUNAS_DERIVADAS = {coluna_tipada(c) for c in COLUNAS_DATA} | {COLUNA_SEMANA}
+
+
+def colunas_planilha(df):
+    # Colunas que existem na planilha (sem as derivadas da tipagem)
+    return [c for c in df.columns if c not in COLUNAS_DERIVADAS]
+
+
+def compactar(df):
+    # Categorias para as colunas de poucos valores e Arrow para o texto livre
+    for col in colunas_planilha(df):
+        if col in COLUNAS_CATEGORICAS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        elif df[col].dtype != TIPO_TEXTO:
+            df[col] = df[col].astype(TIPO_TEXTO)
+    return df
+
+
+def gravar_celula(df, pos, col, valor):
+    # Em coluna categórica, um valor novo precisa virar categoria antes
+    serie = df[col]
+    if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+        df[col] = serie.cat.add_categories([valor])
+    df.at[pos, col] = valor
+
+
+def bytes_por_linha(df):
+    return df.memory_usage(deep=True, index=False).sum() / len(df) if len(df) else 0.0
+
+
+def converter_datas(valores):
+    # Caminho rápido no formato padrão; o resto tenta ISO e depois formatos
+    # mistos com o dia primeiro
+    datas = pd.to_datetime(valores, format=FORMATO_DATA, errors='coerce')
+    for opcoes in ({'format': 'ISO8601'}, {'format': 'mixed', 'dayfirst': True}):
+        restantes = datas.isna() & ~valores.isin(DATAS_VAZIAS)
+        if not restantes.any():
+            break
+        datas[restantes] = pd.to_datetime(valores[restantes], errors='coerce', **opcoes)
+    return datas
+
+
+def converter_semana(valores):
+    return pd.to_numeric(valores, errors='coerce').fillna(0).astype(np.int64)
+
+
+def tipar_dados(df):
+    erros = {}
+    for col in COLUNAS_DATA:
+        if col not in df.columns:
+            continue
+        datas = converter_datas(df[col])
+        invalidas = datas.isna() & ~df[col].isin(DATAS_VAZIAS)
+        if invalidas.any():
+            erros[col] = {
+                'quantidade': int(invalidas.sum()),
+                'exemplos': df.loc[invalidas, ['TAG', col]].head(MAX_EXEMPLOS_ERRO).values.tolist(),
+            }
+        df[coluna_tipada(col)] = datas
+    if 'SEMANA OBRA' in df.columns:
+        df[COLUNA_SEMANA] = converter_semana(df['SEMANA OBRA'])
+    return erros
+
+
+def atualizar_tipos(df, posicoes, colunas):
+    # Reconverte só as células alteradas depois de uma escrita
+    posicoes = list(posicoes)
+    for col in colunas:
+        if col in COLUNAS_DATA:
+            df.loc[posicoes, coluna_tipada(col)] = converter_datas(df.loc[posicoes, col])
+        elif col == 'SEMANA OBRA':
+            df.loc[posicoes, COLUNA_SEMANA] = converter_semana(df.loc[posicoes, col])
+
+
+def formatar_data(df, col):
+    return df[coluna_tipada(col)].dt.strftime(FORMATO_DATA).fillna("")
@@ -0,0 +1,36 @@
+# Exclusão em lote: linhas resolvidas pelo DataFrame carregado, agrupadas em
+# faixas contíguas e removidas numa única requisição, de baixo para cima.
+from gspread.utils import rowcol_to_a1
+
+
+def agrupar_faixas(linhas):
+    # [(início, fim)] inclusivos, em ordem decrescente para não deslocar índices
+    faixas = []
+    for linha in sorted(set(linhas)):
+        if faixas and linha == faixas[-1][1] + 1:
+            faixas[-1][1] = linha
+        else:
+            faixas.append([linha, linha])
+    return [tuple(f) for f in reversed(faixas)]
+
+
+def verificar_tags(ws, faixas, esperadas, coluna_tag=1):
+    # Confere numa só leitura se cada linha ainda contém a TAG esperada
+    ranges = [f"{rowcol_to_a1(ini, coluna_tag)}:{rowcol_to_a1(fim, coluna_tag)}" for ini, fim in faixas]
+    divergentes = []
+    for (ini, fim), valores in zip(faixas, ws.batch_get(ranges)):
+        for i, linha in enumerate(range(ini, fim + 1)):
+            atual = str(valores[i][0]).strip() if i < len(valores) and valores[i] else ""
+            if atual != esperadas[linha]:
+                divergentes.append((linha, esperadas[linha], atual))
+    return divergentes
+
+
+def excluir_faixas(ws, faixas):
+    requisicoes = [
+        {'deleteDimension': {'range': {'sheetId': ws.id, 'dimension': 'ROWS', 'startIndex': ini - 1, 'endIndex': fim}}}
+        for ini, fim in sorted(faixas, reverse=True)
+    ]
+    if requisicoes:
+        ws.spreadsheet.batch_update({'requests': requisicoes})
+    return sum(fim - ini + 1 for ini, fim in faixas)
@@ -0,0 +1,95 @@
+# Geração dos relatórios em Excel (cabeçalho com logo, título e data) e das
+# exportações em CSV/Parquet, fora do Streamlit para poder ser usada em
+# benchmarks e scripts.
+from datetime import datetime
+from importlib.util import find_spec
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+LINHA_CABECALHO = 8
+FORMATOS_EXPORTACAO = {'Excel (.xlsx)': 'xlsx', 'CSV (;)': 'csv'}
+# pyarrow não é dependência: Parquet só aparece se estiver instalado
+if find_spec('pyarrow') is not None:
+    FORMATOS_EXPORTACAO['Parquet'] = 'parquet'
+
+
+def como_texto(df):
+    # Só converte o que ainda não é texto (as colunas da planilha já são)
+    saida = df
+    for col in df.columns:
+        if not pd.api.types.is_string_dtype(df[col]):
+            if saida is df:
+                saida = df.copy()
+            saida[col] = df[col].astype(object).fillna("").astype(str)
+    return saida
+
+
+def larguras_colunas(df):
+    # Maior texto de cada coluna (ou do cabeçalho) + margem, em uma passada
+    if df.empty:
+        maiores = np.zeros(len(df.columns), dtype=np.int64)
+    else:
+        maiores = df.apply(lambda x: x.str.len()).max().fillna(0).to_numpy(dtype=np.int64)
+    nomes = np.char.str_len(np.array([str(c) for c in df.columns], dtype=str))
+    return (np.maximum(maiores, nomes) + 3).tolist()
+
+
+def gerar_excel(df, titulo_relatorio, logo='LOGO2.png'):
+    # constant_memory grava as linhas em sequência sem manter as células na
+    # memória; por isso o cabeçalho vem antes e as linhas em ordem crescente
+    output = BytesIO()
+    df_excel = como_texto(df)
+
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Relatorio')
+
+    fmt_titulo = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'align': 'center',
+        'valign': 'vcenter'
+    })
+    fmt_sub = workbook.add_format({'font_size': 10, 'italic': True})
+    fmt_cab = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+
+    for i, largura in enumerate(larguras_colunas(df_excel)):
+        worksheet.set_column(i, i, largura)
+
+    try:
+        worksheet.insert_image('A1', logo, {'x_scale': 0.4, 'y_scale': 0.4})
+    except Exception:
+        pass
+
+    worksheet.merge_range('C3:F5', str(titulo_relatorio).upper(), fmt_titulo)
+    worksheet.write('A7', f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", fmt_sub)
+
+    worksheet.write_row(LINHA_CABECALHO, 0, [str(c) for c in df_excel.columns], fmt_cab)
+    for i, linha in enumerate(df_excel.itertuples(index=False, name=None), start=LINHA_CABECALHO + 1):
+        worksheet.write_row(i, 0, linha)
+
+    workbook.close()
+    return output.getvalue()
+
+
+def gerar_csv(df):
+    # ; e BOM para abrir direto no Excel em português
+    return df.to_csv(index=False, sep=';').encode('utf-8-sig')
+
+
+def gerar_parquet(df):
+    if find_spec('pyarrow') is None:
+        raise ValueError("A exportação em Parquet requer o pacote pyarrow.")
+    output = BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def exportar(df, formato, titulo_relatorio=""):
+    if formato == 'csv':
+        return gerar_csv(df)
+    if formato == 'parquet':
+        return gerar_parquet(df)
+    return gerar_excel(df, titulo_relatorio)
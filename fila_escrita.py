@@ -0,0 +1,159 @@
+# Fila de gravação write-behind: edições entram na hora no modelo local e são
+# gravadas na planilha em lote (batch_update) por uma thread em segundo plano.
+# Antes de gravar, confere numa só leitura se cada TAG ainda está na linha do
+# cache: linhas inseridas ou excluídas direto na planilha deslocam as posições.
+# Com persistência (SnapshotLocal), a fila sobrevive a reinícios do app.
+import atexit
+import random
+import sqlite3
+import threading
+import time
+
+from diagnostico import contar
+from esquema import colunas_planilha
+from exclusao import agrupar_faixas, verificar_tags
+from importacao import agrupar_celulas
+
+
+class FilaEscrita:
+    def __init__(self, abrir_planilha, obter_dados, intervalo=5, espera_base=2.0, espera_max=120.0, invalidar=None,
+                 persistencia=None):
+        self._abrir_planilha = abrir_planilha
+        self._obter_dados = obter_dados
+        # Callable nome -> None: descarta o cache quando as linhas da planilha mudaram de lugar
+        self._invalidar = invalidar
+        self.persistencia = persistencia
+        self.intervalo = intervalo
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        # nome -> {TAG: {coluna: valor}}; várias edições da mesma célula viram uma.
+        # Começa com o que ficou sem gravar na execução anterior
+        self._pendentes = persistencia.ler_pendentes() if persistencia is not None else {}
+        self._tentativas = {}
+        self._proxima = {}
+        self._trava = threading.Lock()
+        self._trava_gravacao = threading.Lock()
+        self.gravadas = 0
+        self.lotes = 0
+        self.falhas = 0
+        self.descartadas = 0
+        # Lotes devolvidos à fila porque a TAG já não estava na linha esperada
+        self.realinhamentos = 0
+        self.ultimo_erro = None
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="gmont-fila-escrita", daemon=True)
+        self._thread.start()
+        # Thread daemon não termina o trabalho sozinha: grava o que der ao sair
+        atexit.register(self.encerrar)
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.descarregar()
+
+    def parar(self):
+        self._parar.set()
+
+    def encerrar(self):
+        self.parar()
+        self.descarregar(forcar=True)
+
+    def _persistir(self, metodo, *args):
+        if self.persistencia is None:
+            return
+        try:
+            getattr(self.persistencia, metodo)(*args)
+        except (sqlite3.Error, OSError):
+            contar('erro:fila_persistencia')
+
+    def enfileirar(self, nome, tag, valores):
+        with self._trava:
+            self._pendentes.setdefault(nome, {}).setdefault(tag, {}).update(valores)
+            self._persistir('guardar_pendentes', nome, tag, valores)
+
+    def pendentes(self, nome=None):
+        with self._trava:
+            nomes = [nome] if nome else list(self._pendentes)
+            return sum(len(v) for n in nomes for v in self._pendentes.get(n, {}).values())
+
+    def alteracoes_pendentes(self, nome):
+        with self._trava:
+            return {tag: dict(v) for tag, v in self._pendentes.get(nome, {}).items()}
+
+    def _devolver(self, nome, lote):
+        # Em falha, volta para a fila sem sobrescrever edições mais novas
+        with self._trava:
+            fila = self._pendentes.setdefault(nome, {})
+            for tag, valores in lote.items():
+                atual = fila.setdefault(tag, {})
+                for col, val in valores.items():
+                    atual.setdefault(col, val)
+
+    def _montar_celulas(self, nome, lote):
+        df = self._obter_dados(nome)
+        colunas = {c: j for j, c in enumerate(colunas_planilha(df))}
+        mascara = df['TAG'].isin(list(lote))
+        posicoes = {}
+        for pos, tag in zip(df.index[mascara], df.loc[mascara, 'TAG']):
+            posicoes.setdefault(tag, pos)
+
+        alteracoes = {}
+        linhas = {}
+        for tag, valores in lote.items():
+            if tag not in posicoes:
+                # TAG excluída antes da gravação
+                self.descartadas += len(valores)
+                continue
+            for col, val in valores.items():
+                if col in colunas:
+                    alteracoes[(posicoes[tag] + 1, colunas[col])] = val
+                    linhas[posicoes[tag] + 2] = tag
+        return alteracoes, linhas, colunas.get('TAG', 0) + 1
+
+    def _conferir_linhas(self, nome, ws, lote, alteracoes, linhas, coluna_tag):
+        # Tira do lote as TAGs que mudaram de linha na planilha: voltam para a
+        # fila e o cache é descartado, para a próxima gravação achar a linha nova
+        divergentes = {linha for linha, _, _ in verificar_tags(ws, agrupar_faixas(linhas), linhas, coluna_tag)}
+        if not divergentes:
+            return alteracoes, set()
+        devolvidas = {linhas[linha] for linha in divergentes}
+        self._devolver(nome, {tag: lote[tag] for tag in devolvidas})
+        if self._invalidar is not None:
+            self._invalidar(nome)
+        self.realinhamentos += 1
+        self.ultimo_erro = f"{nome}: {len(divergentes)} TAG(s) mudaram de linha na planilha; recarregando"
+        return {(lin, col): val for (lin, col), val in alteracoes.items() if lin + 1 not in divergentes}, devolvidas
+
+    def descarregar(self, nome=None, forcar=False):
+        with self._trava_gravacao:
+            with self._trava:
+                nomes = [nome] if nome else list(self._pendentes)
+            for n in nomes:
+                if not forcar and time.time() < self._proxima.get(n, 0):
+                    continue
+                with self._trava:
+                    lote = self._pendentes.pop(n, {})
+                if not lote:
+                    continue
+                try:
+                    devolvidas = set()
+                    alteracoes, linhas, coluna_tag = self._montar_celulas(n, lote)
+                    if alteracoes:
+                        ws = self._abrir_planilha(n)
+                        alteracoes, devolvidas = self._conferir_linhas(n, ws, lote, alteracoes, linhas, coluna_tag)
+                    if alteracoes:
+                        ws.batch_update(agrupar_celulas(alteracoes))
+                except Exception as e:
+                    self._devolver(n, lote)
+                    tentativa = self._tentativas.get(n, 0) + 1
+                    self._tentativas[n] = tentativa
+                    espera = min(self.espera_max, self.espera_base * 2 ** (tentativa - 1))
+                    self._proxima[n] = time.time() + espera * random.uniform(0.5, 1.0)
+                    self.falhas += 1
+                    self.ultimo_erro = f"{n}: {e}"
+                    continue
+                # Gravadas ou descartadas (TAG excluída) saem do disco; as devolvidas ficam
+                self._persistir('remover_pendentes', n, {tag: v for tag, v in lote.items() if tag not in devolvidas})
+                self._tentativas[n] = 0
+                self._proxima.pop(n, None)
+                self.gravadas += len(alteracoes)
+                self.lotes += 1
@@ -0,0 +1,136 @@
+# Histórico da Curva S (SQLite, só acréscimo): a cada versão nova dos dados
+# grava as contagens semanais (previsto/programado/realizado) e, opcionalmente,
+# só as TAGs cujo STATUS mudou desde o registro anterior. Linhas de base são
+# registros com rótulo. Nada da planilha inteira é guardado.
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+SERIES = ('previsto', 'programado', 'realizado')
+
+
+def assinatura_curva(curva):
+    partes = [str(curva['total']), str(curva['montados'])] + [",".join(map(str, curva[s].tolist())) for s in SERIES]
+    return hashlib.blake2b("|".join(partes).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class HistoricoCurvas:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._trava = threading.Lock()
+        # Último STATUS conhecido por TAG, por planilha (evita reler os deltas a cada registro)
+        self._status = {}
+        with closing(self._conectar()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            # mudancas: quantas TAGs mudaram de STATUS, gravado junto (listar não varre status_tags)
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS registros (id INTEGER PRIMARY KEY AUTOINCREMENT, planilha TEXT, "
+                "registrado_em REAL, assinatura TEXT, total INTEGER, montados INTEGER, rotulo TEXT, mudancas INTEGER)"
+            )
+            # Só as semanas com alguma contagem
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS semanas (registro INTEGER, semana INTEGER, previsto INTEGER, "
+                "programado INTEGER, realizado INTEGER, PRIMARY KEY (registro, semana))"
+            )
+            # STATUS '' = TAG removida da planilha
+            con.execute("CREATE TABLE IF NOT EXISTS status_tags (registro INTEGER, planilha TEXT, tag TEXT, status TEXT)")
+            con.execute("CREATE INDEX IF NOT EXISTS status_tags_planilha ON status_tags (planilha, tag, registro)")
+            con.execute("CREATE INDEX IF NOT EXISTS status_tags_registro ON status_tags (registro)")
+            con.execute("CREATE INDEX IF NOT EXISTS registros_planilha ON registros (planilha, id)")
+            if 'mudancas' not in [c[1] for c in con.execute("PRAGMA table_info(registros)")]:
+                # Banco criado antes da coluna: preenche uma vez a partir dos deltas
+                con.execute("ALTER TABLE registros ADD COLUMN mudancas INTEGER")
+                con.execute("UPDATE registros SET mudancas = "
+                            "(SELECT COUNT(*) FROM status_tags s WHERE s.registro = registros.id)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def _status_anteriores(self, con, nome):
+        if nome not in self._status:
+            # Em SQLite, com MAX() as demais colunas vêm da linha do máximo
+            cursor = con.execute("SELECT tag, status, MAX(registro) FROM status_tags WHERE planilha = ? GROUP BY tag",
+                                 (nome,))
+            ultimos = {tag: status for tag, status, _ in cursor if status}
+            self._status[nome] = pd.Series(list(ultimos.values()), index=list(ultimos), dtype=object)
+        return self._status[nome]
+
+    def registrar(self, nome, curva, status=None, rotulo=None):
+        # status: Series STATUS indexada por TAG. Devolve o id do registro, ou
+        # None se nada mudou desde o último (e não é linha de base)
+        assinatura = assinatura_curva(curva)
+        with self._trava, closing(self._conectar()) as con, con:
+            deltas = []
+            if status is not None:
+                anteriores = self._status_anteriores(con, nome)
+                atuais = status[~status.index.duplicated()].astype(object).astype(str)
+                mudou = atuais.ne(anteriores.reindex(atuais.index)).to_numpy()
+                deltas = list(zip(atuais.index[mudou], atuais.to_numpy()[mudou]))
+                deltas += [(tag, "") for tag in anteriores.index.difference(atuais.index)]
+
+            ultima = con.execute("SELECT assinatura FROM registros WHERE planilha = ? ORDER BY id DESC LIMIT 1",
+                                 (nome,)).fetchone()
+            if rotulo is None and not deltas and ultima is not None and ultima[0] == assinatura:
+                return None
+
+            registro = con.execute(
+                "INSERT INTO registros (planilha, registrado_em, assinatura, total, montados, rotulo, mudancas) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (nome, time.time(), assinatura, int(curva['total']), int(curva['montados']), rotulo, len(deltas)),
+            ).lastrowid
+            contagens = np.column_stack([curva[s] for s in SERIES]) if len(curva['semanas']) else np.empty((0, 3))
+            con.executemany("INSERT INTO semanas VALUES (?, ?, ?, ?, ?)", [
+                (registro, int(sem), *map(int, linha))
+                for sem, linha in zip(curva['semanas'], contagens) if linha.any()
+            ])
+            if deltas:
+                con.executemany("INSERT INTO status_tags VALUES (?, ?, ?, ?)",
+                                [(registro, nome, tag, st) for tag, st in deltas])
+                self._status[nome] = atuais
+            return registro
+
+    def listar(self, nome):
+        with closing(self._conectar()) as con:
+            cursor = con.execute(
+                "SELECT id, registrado_em, rotulo, total, montados, mudancas FROM registros WHERE planilha = ? "
+                "ORDER BY id",
+                (nome,),
+            )
+            return [{'id': i, 'registrado_em': em, 'rotulo': rotulo, 'total': total, 'montados': montados,
+                     'mudancas_status': mudancas} for i, em, rotulo, total, montados, mudancas in cursor]
+
+    def curva(self, registro):
+        # Mesmo formato de curva_s.calcular_curva_s, refeito das contagens gravadas
+        with closing(self._conectar()) as con:
+            total, montados = con.execute("SELECT total, montados FROM registros WHERE id = ?", (registro,)).fetchone()
+            linhas = con.execute("SELECT semana, previsto, programado, realizado FROM semanas WHERE registro = ?",
+                                 (registro,)).fetchall()
+        ultima = max((sem for sem, *_ in linhas), default=0)
+        curva = {
+            'total': total,
+            'montados': montados,
+            'percentual': (montados / total * 100) if total > 0 else 0,
+            'semanas': np.arange(1, ultima + 1),
+        }
+        for s in SERIES:
+            curva[s] = np.zeros(ultima, dtype=np.int64)
+        for sem, *contagens in linhas:
+            for s, valor in zip(SERIES, contagens):
+                curva[s][sem - 1] = valor
+        for s in SERIES:
+            curva[f'{s}_acum'] = np.cumsum(curva[s])
+        return curva
+
+    def mudancas_status(self, registro):
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT tag, status FROM status_tags WHERE registro = ? ORDER BY tag",
+                               (registro,)).fetchall()
@@ -0,0 +1,255 @@
+# Motor de importação: índice TAG -> linha, diff por célula e escrita em lote.
+import time
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from esquema import COLUNAS_DATA, FORMATO_DATA, converter_datas
+from regras_status import calcular_status, colunas_regras
+
+CAMPOS_IMPORTACAO = ['SEMANA OBRA', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'OBS', 'PREVISTO']
+VALORES_NULOS = ['nan', 'none', 'nat', 'dd/mm/yyyy']
+
+
+def limpar_valor(val):
+    val = str(val).strip()
+    if val.lower() in VALORES_NULOS:
+        return ""
+    return val
+
+
+def indexar_tags(matriz):
+    # Linha 0 é o cabeçalho; em TAG duplicada vale a primeira ocorrência
+    indice = {}
+    for i in range(1, len(matriz)):
+        linha = matriz[i]
+        tag = str(linha[0]).strip() if linha else ""
+        if tag and tag not in indice:
+            indice[tag] = i
+    return indice
+
+
+def agrupar_celulas(alteracoes):
+    # Junta células vizinhas da mesma linha em um único range A1
+    por_linha = {}
+    for (lin, col), val in alteracoes.items():
+        por_linha.setdefault(lin, {})[col] = val
+
+    dados = []
+    for lin in sorted(por_linha):
+        celulas = por_linha[lin]
+        cols = sorted(celulas)
+        inicio = anterior = cols[0]
+        for col in cols[1:] + [None]:
+            if col is not None and col == anterior + 1:
+                anterior = col
+                continue
+            faixa = rowcol_to_a1(lin + 1, inicio + 1)
+            if anterior > inicio:
+                faixa += ":" + rowcol_to_a1(lin + 1, anterior + 1)
+            dados.append({'range': faixa, 'values': [[celulas[c] for c in range(inicio, anterior + 1)]]})
+            inicio = anterior = col
+    return dados
+
+
+class DiffImportacao:
+    # Diff acumulado por blocos: o arquivo enviado não precisa estar inteiro
+    # na memória, só a planilha de destino e as alterações encontradas.
+    # Com a disciplina, o STATUS das linhas tocadas sai das mesmas regras da carga.
+    def __init__(self, matriz, campos=CAMPOS_IMPORTACAO, padrao_nova=None, disciplina=None):
+        self.matriz = matriz
+        self.disciplina = disciplina
+        self.headers = [str(h).strip().upper() for h in matriz[0]]
+        self.idx_map = {name: i for i, name in enumerate(self.headers)}
+        self.indice = indexar_tags(matriz)
+        self.campos = [c.upper() for c in campos]
+
+        self.linha_padrao = [""] * len(self.headers)
+        for col, val in (padrao_nova or {}).items():
+            if col.upper() in self.idx_map:
+                self.linha_padrao[self.idx_map[col.upper()]] = val
+
+        self.alteracoes = {}
+        self.novas = {}
+        self.encontradas = set()
+        self.ignoradas = 0
+        self.linhas = 0
+
+    def adicionar(self, df_up):
+        if 'TAG' not in df_up.columns:
+            raise ValueError("Coluna TAG não encontrada na planilha enviada.")
+
+        idx_map = self.idx_map
+        cols_atualizar = [c for c in self.campos if c in df_up.columns and c in idx_map]
+        cols_nova = [c for c in df_up.columns if c in idx_map and c != 'TAG']
+        valores = {c: df_up[c].tolist() for c in set(cols_atualizar) | set(cols_nova)}
+        self.linhas += len(df_up)
+
+        for pos, tag in enumerate(df_up['TAG'].tolist()):
+            tag = limpar_valor(tag)
+            if not tag:
+                self.ignoradas += 1
+                continue
+
+            lin = self.indice.get(tag)
+            if lin is None:
+                nova = self.novas.get(tag)
+                if nova is None:
+                    nova = list(self.linha_padrao)
+                    nova[idx_map.get('TAG', 0)] = tag
+                    self.novas[tag] = nova
+                for col in cols_nova:
+                    nova[idx_map[col]] = limpar_valor(valores[col][pos])
+                continue
+
+            self.encontradas.add(tag)
+            registro = self.matriz[lin]
+            for col in cols_atualizar:
+                j = idx_map[col]
+                val = limpar_valor(valores[col][pos])
+                atual = registro[j] if j < len(registro) else ""
+                if atual != val:
+                    self.alteracoes[(lin, j)] = val
+                else:
+                    self.alteracoes.pop((lin, j), None)
+
+    def _recalcular_status(self):
+        j_status = self.idx_map['STATUS']
+        colunas = [c for c in colunas_regras(self.disciplina) if c in self.idx_map]
+        linhas = sorted({lin for lin, j in self.alteracoes if j != j_status})
+        novas = list(self.novas.values())
+        if not linhas and not novas:
+            return
+
+        def valor(lin, j):
+            registro = self.matriz[lin]
+            return self.alteracoes.get((lin, j), registro[j] if j < len(registro) else "")
+
+        registros = [[valor(lin, self.idx_map[c]) for c in colunas] for lin in linhas]
+        registros += [[nova[self.idx_map[c]] for c in colunas] for nova in novas]
+        status = calcular_status(pd.DataFrame(registros, columns=colunas, dtype=object), self.disciplina).tolist()
+
+        for lin, novo in zip(linhas, status):
+            registro = self.matriz[lin]
+            if (registro[j_status] if j_status < len(registro) else "") != novo:
+                self.alteracoes[(lin, j_status)] = novo
+            else:
+                self.alteracoes.pop((lin, j_status), None)
+        for nova, novo in zip(novas, status[len(linhas):]):
+            nova[j_status] = novo
+
+    def resultado(self):
+        if self.disciplina and 'STATUS' in self.idx_map:
+            self._recalcular_status()
+        linhas_alteradas = {lin for lin, _ in self.alteracoes}
+        return {
+            # Cabeçalho da planilha usado no diff: as colunas das alterações são posições nele
+            'cabecalho': [str(h).strip() for h in self.matriz[0]],
+            'alteracoes': self.alteracoes,
+            'tags': {lin: str(self.matriz[lin][0]).strip() for lin in linhas_alteradas},
+            'dados': agrupar_celulas(self.alteracoes),
+            'novas': list(self.novas.values()),
+            'encontradas': len(self.encontradas),
+            'atualizadas': len(linhas_alteradas),
+            'ignoradas': self.ignoradas,
+        }
+
+
+def calcular_diff(matriz, df_up, campos=CAMPOS_IMPORTACAO, padrao_nova=None, disciplina=None):
+    diff = DiffImportacao(matriz, campos, padrao_nova, disciplina)
+    diff.adicionar(df_up)
+    return diff.resultado()
+
+
+def gravar_diff(ws, diff):
+    if diff['dados']:
+        ws.batch_update(diff['dados'])
+    if diff['novas']:
+        ws.append_rows(diff['novas'])
+
+
+def aplicar_importacao(ws, df_up, matriz=None, campos=CAMPOS_IMPORTACAO, padrao_nova=None, disciplina=None):
+    # DataFrame já limpo, em um bloco só e sem validação
+    return importar_blocos(ws, [(df_up, 1.0)], matriz, campos, padrao_nova, disciplina=disciplina, validar=False)
+
+
+def validar_bloco(bloco, primeira_linha):
+    # Devolve (linhas válidas, rejeitadas). Datas válidas saem no formato
+    # da planilha; linhas totalmente vazias são descartadas sem aviso.
+    if 'TAG' not in bloco.columns:
+        raise ValueError("Coluna TAG não encontrada na planilha enviada.")
+    bloco = bloco.astype(str).apply(lambda x: x.str.strip())
+    nulos = bloco.apply(lambda x: x.str.lower().isin(VALORES_NULOS) | (x == ""))
+    bloco = bloco.mask(nulos, "")
+    vazias = nulos.all(axis=1)
+
+    motivos = pd.Series("", index=bloco.index)
+    motivos[nulos['TAG'] & ~vazias] = "TAG vazia; "
+    for col in [c for c in COLUNAS_DATA if c in bloco.columns]:
+        datas = converter_datas(bloco[col])
+        invalidas = datas.isna() & ~nulos[col]
+        motivos[invalidas] += f"{col} inválida (" + bloco.loc[invalidas, col] + "); "
+        bloco.loc[~invalidas & ~nulos[col], col] = datas[~invalidas & ~nulos[col]].dt.strftime(FORMATO_DATA)
+    if 'SEMANA OBRA' in bloco.columns:
+        semanas = pd.to_numeric(bloco['SEMANA OBRA'], errors='coerce')
+        invalidas = ~nulos['SEMANA OBRA'] & (semanas.isna() | (semanas % 1 != 0))
+        motivos[invalidas] += "SEMANA OBRA inválida (" + bloco.loc[invalidas, 'SEMANA OBRA'] + "); "
+
+    rejeitar = (motivos != "") & ~vazias
+    rejeitadas = [
+        {'LINHA': primeira_linha + i, 'TAG': tag, 'MOTIVO': motivo.rstrip("; ")}
+        for i, tag, motivo in zip(range(len(bloco)), bloco['TAG'], motivos)
+        if rejeitar.iat[i]
+    ]
+    return bloco[~rejeitar & ~vazias], rejeitadas
+
+
+def importar_blocos(ws, blocos, matriz=None, campos=CAMPOS_IMPORTACAO, padrao_nova=None, progresso=None,
+                    disciplina=None, validar=True):
+    # blocos: iterável de (DataFrame, fração lida) como leitura_arquivos.ler_blocos;
+    # valida e acumula o diff bloco a bloco e grava tudo em lote no final
+    inicio = time.perf_counter()
+    if matriz is None:
+        matriz = ws.get_all_values()
+    if not matriz:
+        raise ValueError("Planilha de destino sem cabeçalho.")
+
+    diff = DiffImportacao(matriz, campos, padrao_nova, disciplina)
+    rejeitadas = []
+    lidas = 0
+    for bloco, fracao in blocos:
+        # Linha no arquivo: cabeçalho na 1, dados a partir da 2
+        validas, rej = validar_bloco(bloco, lidas + 2) if validar else (bloco, [])
+        lidas += len(bloco)
+        rejeitadas.extend(rej)
+        diff.adicionar(validas)
+        if progresso is not None:
+            progresso(lidas, fracao, time.perf_counter() - inicio)
+
+    res = diff.resultado()
+    gravar_diff(ws, res)
+
+    segundos = time.perf_counter() - inicio
+    res['linhas'] = lidas
+    res['rejeitadas'] = rejeitadas
+    res['celulas'] = len(res['alteracoes'])
+    res['segundos'] = segundos
+    res['linhas_por_seg'] = lidas / segundos if segundos > 0 else 0.0
+    return res
+
+
+if __name__ == "__main__":
+    from planilha_local import PlanilhaMemoria
+
+    cabecalho = ['TAG', 'SEMANA OBRA', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'OBS', 'STATUS', 'PREVISTO']
+    mestra = [cabecalho] + [[f"TAG-{i:06d}", "", "", "", "", "", "AGUARDANDO PROG", ""] for i in range(40000)]
+    ws_fake = PlanilhaMemoria(mestra, "BD_ELE")
+    df_teste = pd.DataFrame({
+        'TAG': [f"TAG-{i:06d}" for i in range(0, 50000, 10)],
+        'SEMANA OBRA': ["12"] * 5000,
+        'DATA MONT': ["15/12/2025"] * 5000,
+    })
+
+    res = aplicar_importacao(ws_fake, df_teste)
+    print(f"{res['linhas']} linhas em {res['segundos']:.3f}s ({res['linhas_por_seg']:.0f} linhas/s)")
+    print(f"{res['celulas']} células escritas, {len(res['novas'])} TAGs novas, chamadas: {dict(ws_fake.chamadas)}")
@@ -0,0 +1,41 @@
+# Índice de TAGs para busca e localização: array ordenado (busca por prefixo
+# com searchsorted e por trecho com np.char.find) e dict TAG -> posição.
+import numpy as np
+import pandas as pd
+
+MAX_RESULTADOS = 50
+
+
+class IndiceTags:
+    def __init__(self, tags):
+        codigos, unicas = pd.factorize(pd.Series(tags, dtype=object).fillna(""))
+        # Primeira ocorrência de cada TAG, como no df.index[df['TAG'] == tag][0]
+        _, primeiras = np.unique(codigos, return_index=True)
+        self.posicao = {tag: int(pos) for tag, pos in zip(unicas, primeiras) if tag}
+
+        tags_unicas = np.array([t for t in unicas if t], dtype=str)
+        chaves = np.char.upper(tags_unicas)
+        ordem = np.argsort(chaves, kind='stable')
+        self.ordenadas = tags_unicas[ordem]
+        self._chaves = chaves[ordem]
+
+    def __len__(self):
+        return len(self.ordenadas)
+
+    def localizar(self, tag):
+        return self.posicao.get(tag)
+
+    def buscar(self, termo, limite=MAX_RESULTADOS):
+        # Primeiro as TAGs que começam com o termo, depois as que o contêm;
+        # sem diferenciar maiúsculas
+        termo = str(termo or "").strip().upper()
+        if not termo:
+            return self.ordenadas[:limite].tolist()
+
+        inicio = np.searchsorted(self._chaves, termo, side='left')
+        fim = np.searchsorted(self._chaves, termo + '\U0010ffff', side='left')
+        resultado = self.ordenadas[inicio:min(fim, inicio + limite)].tolist()
+        if len(resultado) < limite:
+            contem = np.flatnonzero(np.char.find(self._chaves, termo) > 0)
+            resultado += self.ordenadas[contem[:limite - len(resultado)]].tolist()
+        return resultado
@@ -0,0 +1,126 @@
+# Leitura em blocos dos arquivos de importação (xlsx, csv e parquet): o arquivo
+# nunca é carregado inteiro, cada bloco vira um DataFrame de texto.
+import csv
+import io
+from datetime import date, datetime
+
+import pandas as pd
+
+from esquema import FORMATO_DATA
+
+TAMANHO_BLOCO = 5000
+EXTENSOES = ['xlsx', 'csv', 'parquet']
+
+
+def normalizar_coluna(nome):
+    return "" if nome is None else str(nome).strip().upper()
+
+
+def texto_celula(valor):
+    # Mesmo texto que o usuário vê na planilha: datas em dd/mm/aaaa e
+    # inteiros sem o ".0" que o Excel/pandas devolvem
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime(FORMATO_DATA)
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _montar_bloco(cabecalho, posicoes, linhas):
+    return pd.DataFrame([[linha[i] if i < len(linha) else "" for i in posicoes] for linha in linhas],
+                        columns=[cabecalho[i] for i in posicoes], dtype=object)
+
+
+def _blocos_xlsx(arquivo, tamanho):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = [normalizar_coluna(c) for c in next(linhas, ())]
+        posicoes = [i for i, c in enumerate(cabecalho) if c]
+        # max_row vem da dimensão gravada no arquivo e pode faltar
+        total = ws.max_row - 1 if ws.max_row else None
+        lidas = 0
+        buffer = []
+        for linha in linhas:
+            buffer.append([texto_celula(v) for v in linha])
+            if len(buffer) >= tamanho:
+                lidas += len(buffer)
+                yield _montar_bloco(cabecalho, posicoes, buffer), lidas / total if total else None
+                buffer = []
+        if buffer:
+            yield _montar_bloco(cabecalho, posicoes, buffer), 1.0
+    finally:
+        wb.close()
+
+
+def _detectar_csv(arquivo):
+    inicio = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try:
+        amostra = inicio.decode("utf-8-sig")
+        codificacao = "utf-8-sig"
+    except UnicodeDecodeError:
+        amostra = inicio.decode("latin-1")
+        codificacao = "latin-1"
+    try:
+        separador = csv.Sniffer().sniff(amostra.splitlines()[0] if amostra else ",", delimiters=",;\t").delimiter
+    except csv.Error:
+        separador = ","
+    return codificacao, separador
+
+
+def _blocos_csv(arquivo, tamanho):
+    if isinstance(arquivo, str):
+        with open(arquivo, "rb") as f:
+            yield from _blocos_csv(f, tamanho)
+        return
+    arquivo.seek(0, io.SEEK_END)
+    total_bytes = arquivo.tell()
+    arquivo.seek(0)
+    codificacao, separador = _detectar_csv(arquivo)
+    leitor = pd.read_csv(arquivo, sep=separador, encoding=codificacao, dtype=str, keep_default_na=False,
+                         chunksize=tamanho)
+    with leitor:
+        for bloco in leitor:
+            bloco.columns = [normalizar_coluna(c) for c in bloco.columns]
+            # Posição do arquivo é aproximada (o parser lê à frente)
+            yield bloco.apply(lambda x: x.str.strip()), min(arquivo.tell() / total_bytes, 1.0) if total_bytes else None
+
+
+def _blocos_parquet(arquivo, tamanho):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("A leitura de Parquet requer o pacote pyarrow.")
+
+    pf = pq.ParquetFile(arquivo)
+    total = pf.metadata.num_rows
+    lidas = 0
+    for lote in pf.iter_batches(batch_size=tamanho):
+        bloco = lote.to_pandas()
+        bloco.columns = [normalizar_coluna(c) for c in bloco.columns]
+        for col in bloco.columns:
+            if pd.api.types.is_datetime64_any_dtype(bloco[col]):
+                bloco[col] = bloco[col].dt.strftime(FORMATO_DATA).fillna("")
+            else:
+                bloco[col] = bloco[col].map(texto_celula)
+        lidas += len(bloco)
+        yield bloco, lidas / total if total else None
+
+
+def ler_blocos(arquivo, nome=None, tamanho=TAMANHO_BLOCO):
+    # Gera (DataFrame de texto, fração do arquivo já lida ou None)
+    nome = nome or getattr(arquivo, 'name', None) or str(arquivo)
+    extensao = nome.rsplit(".", 1)[-1].lower()
+    if extensao == 'xlsx':
+        return _blocos_xlsx(arquivo, tamanho)
+    if extensao == 'csv':
+        return _blocos_csv(arquivo, tamanho)
+    if extensao == 'parquet':
+        return _blocos_parquet(arquivo, tamanho)
+    raise ValueError(f"Formato não suportado: .{extensao} (use {', '.join(EXTENSOES)}).")
@@ -1,56 +1,46 @@
 # backup da versao atual
 import streamlit as st
 import pandas as pd
-from google.oauth2.service_account import Credentials
-import gspread
-import base64
-import json
 import plotly.graph_objects as go
 from io import BytesIO
 from datetime import datetime, timedelta
+import sqlite3
 import time
 
+from armazenamento import BackendGoogleSheets, BackendSQLite, autorizar_google
+from carregamento import CarregadorPlanilhas
+from cliente_quota import BackendComQuota, ClienteQuota
+from configuracao import obter_config
+from diagnostico import TOTAIS, BackendInstrumentado, Medidor, ativar, consulta_cache, contar, gravar_jsonl, medir
+from curva_s import COLUNAS_CURVA, calcular_curva_s, combinar_curvas, desvio_curvas, resumo_semanal
+from edicao_lote import aplicar_status, colunas_editaveis, diff_grade, preparar_grade
+from exclusao import agrupar_faixas, excluir_faixas, verificar_tags
+from exportacao import FORMATOS_EXPORTACAO, exportar, gerar_excel
+from esquema import COLUNAS_DATA, coluna_tipada, colunas_planilha
+from fila_escrita import FilaEscrita
+from historico import HistoricoCurvas
+from importacao import importar_blocos
+from indice_tags import IndiceTags
+from leitura_arquivos import EXTENSOES, ler_blocos
+from regras_status import colunas_regras, regras_de, resumo_status, status_linha
+from relatorios import IndiceRelatorio, relatorio_avanco, relatorio_base, relatorio_pendencias, relatorio_programacao
+from snapshots import SnapshotLocal
+
 st.set_page_config(page_title="SISTEMA G-MONT", layout="wide")
 DATA_INICIO_OBRA = datetime(2025, 9, 29)
 
-@st.cache_data
-def exportar_excel_com_cabecalho(df, titulo_relatorio):
-    output = BytesIO()
-    df_excel = df.copy()
-
-    # Garante texto simples em todas as colunas para evitar erro no map(len)
-    for col in df_excel.columns:
-        df_excel[col] = df_excel[col].fillna("").astype(str)
-
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_excel.to_excel(writer, index=False, sheet_name='Relatorio', startrow=8)
-        workbook = writer.book
-        worksheet = writer.sheets['Relatorio']
-
-        fmt_titulo = workbook.add_format({
-            'bold': True,
-            'font_size': 14,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        fmt_sub = workbook.add_format({'font_size': 10, 'italic': True})
-
-        try:
-            worksheet.insert_image('A1', 'LOGO2.png', {'x_scale': 0.4, 'y_scale': 0.4})
-        except:
-            pass
-
-        worksheet.merge_range('C3:F5', str(titulo_relatorio).upper(), fmt_titulo)
-        worksheet.write('A7', f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", fmt_sub)
+# Funções em cache por (planilha, versão dos dados, ...): o _df não entra no hash
+@st.cache_data(max_entries=32)
+def exportar_excel_com_cabecalho(nome_planilha, versao, chave, colunas, titulo_relatorio, _df):
+    contar('cache_miss:exportar_excel')
+    with medir('exportar_excel', len(_df)):
+        return gerar_excel(_df[list(colunas)], titulo_relatorio)
 
-        for i, col in enumerate(df_excel.columns):
-            max_len_coluna = df_excel[col].str.len().max()
-            if pd.isna(max_len_coluna):
-                max_len_coluna = 0
-            column_len = max(int(max_len_coluna), len(str(col))) + 3
-            worksheet.set_column(i, i, column_len)
-
-    return output.getvalue()
+@st.cache_data(max_entries=8)
+def exportar_base(nome_planilha, versao, formato, titulo_relatorio, _df):
+    contar('cache_miss:exportar_base')
+    with medir(f'exportar_base:{formato}', len(_df)):
+        return exportar(relatorio_base(_df), formato, titulo_relatorio)
 
 if 'logado' not in st.session_state:
     st.session_state['logado'] = False
@@ -78,8 +68,10 @@ def tela_login():
         st.subheader("🔐 LOGIN G-MONT")
         pin = st.text_input("Digite o PIN:", type="password", max_chars=4)
         if st.button("ENTRAR NO SISTEMA", use_container_width=True):
-            if pin == "2026":
+            pin_admin = obter_config("PIN_ADMIN")
+            if pin == "2026" or (pin_admin and pin == pin_admin):
                 st.session_state['logado'] = True
+                st.session_state['admin'] = bool(pin_admin) and pin == pin_admin
                 st.rerun()
             else:
                 st.error("PIN Incorreto.")
@@ -112,35 +104,86 @@ if not st.session_state['disciplina_ativa']:
 @st.cache_resource
 def conectar_google():
     try:
-        b64_creds = st.secrets["GOOGLE_CREDENTIALS_BASE64"]
-        creds_dict = json.loads(base64.b64decode(b64_creds))
-        scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-        return gspread.authorize(creds)
+        return autorizar_google(st.secrets["GOOGLE_CREDENTIALS_BASE64"])
     except Exception as e:
         st.error(f"Erro na conexão: {e}")
         st.stop()
 
-client = conectar_google()
+@st.cache_resource
+def obter_backend():
+    # BACKEND=sqlite roda o app inteiro sobre um banco local, sem Google
+    if obter_config("BACKEND", "google") == "sqlite":
+        return BackendSQLite(obter_config("SQLITE_DB", ".gmont/planilhas.db"))
+    # Cliente compartilhado por todas as sessões: cota, novas tentativas e handles abertos
+    cliente = ClienteQuota(leituras_por_minuto=float(obter_config("LEITURAS_POR_MINUTO", 60)),
+                           escritas_por_minuto=float(obter_config("ESCRITAS_POR_MINUTO", 60)))
+    return BackendComQuota(BackendGoogleSheets(conectar_google()), cliente)
+
+# Medição do rerun: o registro anterior vai para o log JSONL ao começar o próximo
+if 'diag_atual' in st.session_state:
+    registro_anterior = st.session_state['diag_atual'].resumo()
+    st.session_state['diag_anterior'] = registro_anterior
+    try:
+        gravar_jsonl(obter_config("LOG_DIAGNOSTICO", ".gmont/diagnostico.jsonl"), registro_anterior)
+    except OSError:
+        pass
+medidor = ativar(Medidor(st.session_state.get('disciplina_ativa') or ""))
+st.session_state['diag_atual'] = medidor
+
+backend = BackendInstrumentado(obter_backend())
+map_planilhas = {"ELÉTRICA": "BD_ELE", "INSTRUMENTAÇÃO": "BD_INST", "ESTRUTURA": "BD_ESTR"}
+
+@st.cache_resource
+def obter_carregador():
+    caminho_snapshot = obter_config("SNAPSHOT_DB", ".gmont/snapshots.db")
+    snapshots = SnapshotLocal(caminho_snapshot) if caminho_snapshot else None
+    return CarregadorPlanilhas(backend.abrir, ttl=600, snapshots=snapshots,
+                               intervalo_verificacao=float(obter_config("INTERVALO_VERIFICACAO", 30)),
+                               disciplinas={nome: d for d, nome in map_planilhas.items()})
+
+carregador = obter_carregador()
 
-@st.cache_data(ttl=600)
-def extrair_dados(nome_planilha):
+@st.cache_resource
+def obter_fila():
+    intervalo = float(obter_config("INTERVALO_GRAVACAO", 5))
+    # Edições pendentes ficam no snapshot local e são regravadas se o app reiniciar
+    fila = FilaEscrita(backend.abrir, lambda nome: carregador.obter(nome)[0], intervalo=intervalo,
+                       invalidar=carregador.invalidar, persistencia=carregador.snapshots)
+    carregador.alteracoes_pendentes = fila.alteracoes_pendentes
+    return fila
+
+fila = obter_fila()
+
+def registrar_historico(historico, nome_planilha, curva, df, rotulo=None):
+    # Só grava se a curva ou algum STATUS mudou desde o último registro
     try:
-        sh = client.open(nome_planilha)
-        ws = sh.get_worksheet(0)
-        data = ws.get_all_values()
-        if len(data) > 1:
-            df = pd.DataFrame(data[1:], columns=data[0])
-            df.columns = df.columns.str.strip()
-            col_obj = ['TAG', 'SEMANA OBRA', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'STATUS', 'OBS', 'DESCRIÇÃO', 'ÁREA', 'DOCUMENTO', 'PREVISTO']
-            for c in col_obj:
-                if c not in df.columns:
-                    df[c] = ""
-            df = df.apply(lambda x: x.astype(str).str.strip().replace(['nan', 'None', 'NaT', '-'], ''))
-            return df, ws
-        return pd.DataFrame(), None
-    except:
-        return pd.DataFrame(), None
+        with medir(f'historico:{nome_planilha}', len(df)):
+            return historico.registrar(nome_planilha, curva, df['STATUS'].set_axis(df['TAG']), rotulo)
+    except (sqlite3.Error, OSError):
+        contar('erro:historico')
+        return None
+
+def registrar_versao(historico, nome_planilha, df):
+    curva = calcular_curva_s(df, DATA_INICIO_OBRA, regras_de(carregador.disciplinas.get(nome_planilha))['montados'])
+    return registrar_historico(historico, nome_planilha, curva, df)
+
+@st.cache_resource
+def obter_historico():
+    caminho = obter_config("HISTORICO_DB", ".gmont/historico.db")
+    if not caminho:
+        return None
+    historico = HistoricoCurvas(caminho)
+    # Cada versão nova publicada pelo carregador (carga ou escrita) vira um
+    # registro, com qualquer aba aberta
+    carregador.ao_publicar = lambda nome, df: registrar_versao(historico, nome, df)
+    return historico
+
+historico = obter_historico()
+
+# Registros do histórico não mudam (só acréscimo): cache pelo id
+@st.cache_data(max_entries=50)
+def curva_registrada(registro):
+    return historico.curva(registro)
 
 def get_dates_from_week(week_number):
     if not str(week_number).isdigit():
@@ -149,57 +192,181 @@ def get_dates_from_week(week_number):
     friday = monday + timedelta(days=4)
     return monday.date(), friday.date()
 
-def calcular_status_tag(d_i, d_f, d_m):
-    def tem(v):
-        return str(v).strip() not in ["", "None", "nan", "-", "DD/MM/YYYY"]
-    if tem(d_m):
-        return "MONTADO"
-    if tem(d_i) or tem(d_f):
-        return "PROGRAMADO"
-    return "AGUARDANDO PROG"
+# Agregados e gráfico da Curva S
+@st.cache_data(max_entries=20)
+def curva_s_cacheada(nome_planilha, versao, disciplina, _df):
+    contar('cache_miss:curva_s')
+    with medir('curva_s', len(_df)):
+        curva = calcular_curva_s(_df, DATA_INICIO_OBRA, regras_de(disciplina)['montados'])
+    return curva
+
+@st.cache_data(max_entries=20)
+def figura_curva_s(nome_planilha, versao, disciplina, _df):
+    contar('cache_miss:grafico_curva_s')
+    curva = curva_s_cacheada(nome_planilha, versao, disciplina, _df)
+    with medir('grafico_curva_s', len(curva['semanas'])):
+        return _montar_figura(curva)
+
+def _montar_figura(curva):
+    eixo_x = curva['semanas']
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=eixo_x, y=curva['previsto'], name='Previsto Semanal', marker_color='#2ecc71', opacity=0.2))
+    fig.add_trace(go.Bar(x=eixo_x, y=curva['realizado'], name='Realizado Semanal', marker_color='#3498db', opacity=0.2))
+    fig.add_trace(go.Scatter(x=eixo_x, y=curva['previsto_acum'], name='LB - Previsto Acumulado', line=dict(color='#27ae60', width=2, dash='dot', shape='spline')))
+    fig.add_trace(go.Scatter(x=eixo_x, y=curva['programado_acum'], name='Programado Acumulado', line=dict(color='#f1c40f', width=3, shape='spline')))
+    fig.add_trace(go.Scatter(x=eixo_x, y=curva['realizado_acum'], name='Realizado Acumulado', line=dict(color='#3498db', width=4, shape='spline')))
+
+    fig.update_layout(
+        template="plotly_dark",
+        hovermode="x unified",
+        height=550,
+        xaxis_title="Semanas de Obra",
+        yaxis_title="Quantidade de Tags",
+        legend=dict(orientation="h", y=1.05, xanchor="center", x=0.5),
+        margin=dict(l=20, r=20, t=50, b=20)
+    )
+    return fig
+
+# Índice dos relatórios: um por versão dos dados, compartilhado (somente leitura)
+@st.cache_resource(max_entries=10)
+def indice_relatorio(nome_planilha, versao, _df):
+    contar('cache_miss:indice_relatorio')
+    with medir('indice_relatorio', len(_df)):
+        return IndiceRelatorio(_df)
+
+@st.cache_resource(max_entries=10)
+def indice_tags(nome_planilha, versao, _df):
+    contar('cache_miss:indice_tags')
+    with medir('indice_tags', len(_df)):
+        return IndiceTags(_df['TAG'])
+
+LINHAS_POR_PAGINA = 200
+
+def pagina_atual(total, chave, tamanho=LINHAS_POR_PAGINA):
+    # Paginação no servidor: só as linhas da página vão para o navegador
+    paginas = max(1, -(-total // tamanho))
+    if paginas == 1:
+        return 0, total
+    chave = f"pagina_{chave}"
+    # Valor só pelo session_state (sem value=): evita o aviso do Streamlit ao ajustar a página
+    st.session_state.setdefault(chave, 1)
+    if st.session_state[chave] > paginas:
+        st.session_state[chave] = paginas
+    c_pag, c_info = st.columns([1, 4])
+    pagina = c_pag.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave)
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, total)
+    c_info.caption(f"Linhas {inicio + 1}–{fim} de {total} ({paginas} páginas)")
+    return inicio, fim
+
+def tabela_paginada(df, chave, **kwargs):
+    inicio, fim = pagina_atual(len(df), chave)
+    st.dataframe(df.iloc[inicio:fim], **kwargs)
+
+def formatar_idade(segundos):
+    if segundos < 60:
+        return f"{int(segundos)} s"
+    if segundos < 3600:
+        return f"{int(segundos // 60)} min"
+    return f"{segundos / 3600:.1f} h"
+
+# Agregados por disciplina para o painel consolidado: um por versão dos dados.
+# O STATUS já vem calculado na carga (regras_status).
+@st.cache_data(max_entries=20)
+def agregado_disciplina(nome_planilha, versao, disciplina, _df):
+    contar('cache_miss:agregado_disciplina')
+    with medir(f'agregado:{nome_planilha}', len(_df)):
+        if _df.empty:
+            return None
+        resumo = resumo_status(_df['STATUS'], disciplina)
+        curva = calcular_curva_s(_df, DATA_INICIO_OBRA, regras_de(disciplina)['montados'])
+    return {'curva': curva, 'programados': resumo['programados'], 'aguardando': resumo['aguardando']}
+
+disc = st.session_state['disciplina_ativa']
+nome_planilha = map_planilhas.get(disc)
 
-df_ele, ws_ele = extrair_dados("BD_ELE")
-df_ins, ws_ins = extrair_dados("BD_INST")
-df_est, ws_est = extrair_dados("BD_ESTR")
+# Só a disciplina ativa é buscada; as demais ficam em cache próprio
+if nome_planilha:
+    with medir('carga', None):
+        df_atual, ws_atual, versao_dados = carregador.obter(nome_planilha)
+else:
+    df_atual, ws_atual, versao_dados = pd.DataFrame(), None, 0
 
 try:
     st.sidebar.image("LOGO2.png", width=120)
 except:
     st.sidebar.markdown("### G-MONT")
 
-disc = st.session_state['disciplina_ativa']
 st.sidebar.subheader("MENU G-MONT")
 st.sidebar.write(f"**Disciplina:** {disc}")
 
+idade_dados = carregador.idade(nome_planilha) if nome_planilha else None
+if idade_dados is not None:
+    fonte = "snapshot local" if carregador.origem(nome_planilha) == "snapshot" else "planilha"
+    st.sidebar.caption(f"🕒 Dados de {formatar_idade(idade_dados)} atrás ({fonte})")
+if nome_planilha and carregador.sincronizando(nome_planilha):
+    st.sidebar.caption("🔄 Sincronizando com o Google Sheets...")
+
+erro_leitura = carregador.erro_leitura(nome_planilha) if nome_planilha else None
+if erro_leitura:
+    st.sidebar.warning(f"⚠️ Falha ao ler a planilha: {erro_leitura}")
+
+erros_datas = carregador.erros_datas(nome_planilha) if nome_planilha else {}
+if erros_datas:
+    with st.sidebar.expander(f"⚠️ {sum(e['quantidade'] for e in erros_datas.values())} datas inválidas"):
+        for col, erro in erros_datas.items():
+            st.markdown(f"**{col}:** {erro['quantidade']}")
+            st.caption(", ".join(f"{tag} ({val})" for tag, val in erro['exemplos']))
+
 if st.sidebar.button("🔄 TROCAR DISCIPLINA"):
     st.session_state['disciplina_ativa'] = None
     st.rerun()
 
-aba = st.sidebar.radio("NAVEGAÇÃO:", ["📝 EDIÇÃO/PROGRAMAÇÃO", "📊 CURVA S", "📋 RELATÓRIOS", "📤 EXPORTAÇÃO E IMPORTAÇÕES"])
+pendentes = fila.pendentes()
+st.sidebar.caption(f"📤 Gravações: {pendentes} pendentes · {fila.gravadas} gravadas")
+if fila.ultimo_erro and pendentes:
+    st.sidebar.caption(f"⚠️ Nova tentativa em breve ({fila.ultimo_erro})")
+if fila.descartadas:
+    st.sidebar.caption(f"🗑️ {fila.descartadas} edição(ões) descartada(s): a TAG foi excluída antes da gravação")
+if pendentes and st.sidebar.button("💾 GRAVAR AGORA", use_container_width=True):
+    fila.descarregar(forcar=True)
+    st.rerun()
+
+if 'aviso' in st.session_state:
+    st.toast(st.session_state.pop('aviso'))
+
+if st.sidebar.checkbox("⚡ Pré-carregar outras disciplinas", key="prefetch_disciplinas"):
+    carregador.prefetch([n for n in map_planilhas.values() if n != nome_planilha])
+
+aba = st.sidebar.radio("NAVEGAÇÃO:", ["📝 EDIÇÃO/PROGRAMAÇÃO", "📊 CURVA S", "📋 RELATÓRIOS", "📤 EXPORTAÇÃO E IMPORTAÇÕES", "🌐 CONSOLIDADO"])
+
+if st.session_state.get('admin') and st.session_state.get('diag_anterior'):
+    with st.sidebar.expander("🩺 Diagnóstico (último rerun)"):
+        diag = st.session_state['diag_anterior']
+        st.caption(f"Duração total: {diag['duracao_ms']:.0f} ms")
+        if diag['fases']:
+            st.dataframe(pd.DataFrame(diag['fases']), hide_index=True, use_container_width=True)
+        contadores = diag['contadores']
+        st.caption(f"Chamadas de API: {sum(v for k, v in contadores.items() if k.startswith('api:'))}")
+        st.json(contadores, expanded=False)
+        cliente_api = getattr(backend, 'cliente', None)
+        if cliente_api is not None:
+            st.caption("Cliente da API (processo):")
+            st.dataframe(pd.DataFrame(cliente_api.metricas()).T, use_container_width=True)
+        memoria = carregador.memoria(nome_planilha) if nome_planilha else None
+        if memoria:
+            st.caption(f"Memória dos dados: {memoria[0] / 1e6:.1f} MB ({memoria[1]:.0f} bytes/linha)")
+        st.caption("Acumulado no processo:")
+        st.json(dict(TOTAIS), expanded=False)
 
 if st.sidebar.button("🚪 SAIR", use_container_width=True):
     st.session_state['logado'] = False
+    st.session_state['admin'] = False
     st.session_state['disciplina_ativa'] = None
     st.rerun()
 
-map_planilhas = {"ELÉTRICA": "BD_ELE", "INSTRUMENTAÇÃO": "BD_INST", "ESTRUTURA": "BD_ESTR"}
-
-if disc == "ELÉTRICA":
-    df_atual, ws_atual = df_ele, ws_ele
-elif disc == "INSTRUMENTAÇÃO":
-    df_atual, ws_atual = df_ins, ws_ins
-elif disc == "ESTRUTURA":
-    df_atual, ws_atual = df_est, ws_est
-else:
-    df_atual, ws_atual = pd.DataFrame(), None
-
 if not df_atual.empty:
-    cond_montado = (df_atual['DATA MONT'] != "") & (df_atual['DATA MONT'] != "DD/MM/YYYY")
-    cond_prog = ((df_atual['DATA INIC PROG'] != "") | (df_atual['DATA FIM PROG'] != "")) & ~cond_montado
-    df_atual['STATUS'] = "AGUARDANDO PROG"
-    df_atual.loc[cond_prog, 'STATUS'] = "PROGRAMADO"
-    df_atual.loc[cond_montado, 'STATUS'] = "MONTADO"
-
     cols_map = {col: i + 1 for i, col in enumerate(df_atual.columns)}
     cfg_rel = {
         "TAG": st.column_config.TextColumn(width="medium"),
@@ -211,21 +378,20 @@ if not df_atual.empty:
 if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
     st.subheader(f"📝 Edição por TAG - {disc}")
 
-    def conv_dt(val, default=None):
-        try:
-            return datetime.strptime(str(val), "%d/%m/%Y").date()
-        except:
-            return default
+    def conv_dt(col, default=None):
+        # Lê a coluna já tipada na carga (DT_<coluna>)
+        val = dados_tag.get(coluna_tipada(col))
+        return val.date() if isinstance(val, pd.Timestamp) else default
 
-    tags_disponiveis = sorted(df_atual['TAG'].unique())
-    total_tags = len(tags_disponiveis)
-    total_montadas = int((df_atual["STATUS"] == "MONTADO").sum()) if "STATUS" in df_atual.columns else 0
-    total_prog = int((df_atual["STATUS"] == "PROGRAMADO").sum()) if "STATUS" in df_atual.columns else 0
+    with consulta_cache('indice_tags'):
+        idx_tags = indice_tags(nome_planilha, versao_dados, df_atual)
+    total_tags = len(idx_tags)
+    resumo = resumo_status(df_atual['STATUS'], disc)
 
     k1, k2, k3 = st.columns(3)
     k1.metric("Total de TAGs", total_tags)
-    k2.metric("Montadas", total_montadas)
-    k3.metric("Programadas", total_prog)
+    k2.metric("Montadas", resumo['montados'])
+    k3.metric("Programadas", resumo['programados'])
 
     tab1, tab2, tab3 = st.tabs(["✏️ Editar TAG", "➕ Cadastrar / Excluir", "📋 Visualização"])
 
@@ -233,9 +399,14 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
         c_top_1, c_top_2 = st.columns([2.2, 1])
 
         with c_top_1:
-            tag_sel = st.selectbox("Selecione para EDITAR:", tags_disponiveis)
-
-        idx_base = df_atual.index[df_atual['TAG'] == tag_sel][0]
+            busca_edit = st.text_input("Buscar TAG (início ou trecho):", key="busca_tag_editar")
+            opcoes_edit = idx_tags.buscar(busca_edit)
+            if not opcoes_edit:
+                st.caption(f"Nenhuma TAG com \"{busca_edit}\"; mostrando as primeiras.")
+                opcoes_edit = idx_tags.buscar("")
+            tag_sel = st.selectbox("Selecione para EDITAR:", opcoes_edit)
+
+        idx_base = idx_tags.localizar(tag_sel)
         dados_tag = df_atual.iloc[idx_base]
 
         with c_top_2:
@@ -252,34 +423,25 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
             st.markdown("#### Datas de Programação")
 
             c1, c2, c3 = st.columns(3)
-            v_prev = c1.date_input("Data Previsto", value=conv_dt(dados_tag.get('PREVISTO', ''), None), format="DD/MM/YYYY")
-            v_ini = c2.date_input("Início Prog", value=conv_dt(dados_tag.get('DATA INIC PROG', ''), sug_ini), format="DD/MM/YYYY")
-            v_fim = c3.date_input("Fim Prog", value=conv_dt(dados_tag.get('DATA FIM PROG', ''), sug_fim), format="DD/MM/YYYY")
+            v_prev = c1.date_input("Data Previsto", value=conv_dt('PREVISTO', None), format="DD/MM/YYYY")
+            v_ini = c2.date_input("Início Prog", value=conv_dt('DATA INIC PROG', sug_ini), format="DD/MM/YYYY")
+            v_fim = c3.date_input("Fim Prog", value=conv_dt('DATA FIM PROG', sug_fim), format="DD/MM/YYYY")
 
             if disc == "ESTRUTURA":
                 st.markdown("#### Produção e Montagem")
                 c4, c5, c6, c7 = st.columns(4)
-                v_fab = c4.date_input("Data Fabricação", value=conv_dt(dados_tag.get('DATA FABRICAÇÃO', ''), None), format="DD/MM/YYYY")
-                v_pin = c5.date_input("Data Pintura", value=conv_dt(dados_tag.get('DATA PINTURA', ''), None), format="DD/MM/YYYY")
-                v_mont = c6.date_input("Data Montagem", value=conv_dt(dados_tag.get('DATA MONT', ''), None), format="DD/MM/YYYY")
-                v_torq = c7.date_input("Data Torque", value=conv_dt(dados_tag.get('DATA TARQUE', ''), None), format="DD/MM/YYYY")
-
-                if v_torq:
-                    st_atual = "Concluído"
-                elif v_mont:
-                    st_atual = "Aguardando Torque"
-                elif v_fab:
-                    st_atual = "Aguardando Pintura/Montagem"
-                elif v_ini:
-                    st_atual = "Aguardando Fab"
-                else:
-                    st_atual = "Aguardando Prog"
+                v_fab = c4.date_input("Data Fabricação", value=conv_dt('DATA FABRICAÇÃO', None), format="DD/MM/YYYY")
+                v_pin = c5.date_input("Data Pintura", value=conv_dt('DATA PINTURA', None), format="DD/MM/YYYY")
+                v_mont = c6.date_input("Data Montagem", value=conv_dt('DATA MONT', None), format="DD/MM/YYYY")
+                v_torq = c7.date_input("Data Torque", value=conv_dt('DATA TARQUE', None), format="DD/MM/YYYY")
             else:
                 st.markdown("#### Montagem")
-                v_mont = st.date_input("Data Montagem", value=conv_dt(dados_tag.get('DATA MONT', ''), None), format="DD/MM/YYYY")
-                st_atual = calcular_status_tag(v_ini, v_fim, v_mont)
+                v_mont = st.date_input("Data Montagem", value=conv_dt('DATA MONT', None), format="DD/MM/YYYY")
                 v_fab = v_pin = v_torq = None
 
+            st_atual = status_linha({'DATA INIC PROG': v_ini, 'DATA FIM PROG': v_fim, 'DATA FABRICAÇÃO': v_fab,
+                                     'DATA PINTURA': v_pin, 'DATA MONT': v_mont, 'DATA TARQUE': v_torq}, disc)
+
             st.markdown("#### Status e Observações")
             st.metric("Status Atualizado", st_atual)
             v_obs = st.text_input("Observações:", value=dados_tag.get('OBS', ''))
@@ -289,7 +451,6 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
             recarregar = b2.form_submit_button("↺ RECARREGAR", use_container_width=True)
 
             if salvar:
-                ws_escrita = client.open(map_planilhas[disc]).get_worksheet(0)
                 f_dates = {
                     'PREVISTO': v_prev.strftime("%d/%m/%Y") if v_prev else "",
                     'DATA INIC PROG': v_ini.strftime("%d/%m/%Y") if v_ini else "",
@@ -303,19 +464,18 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
                     f_dates['DATA TARQUE'] = v_torq.strftime("%d/%m/%Y") if v_torq else ""
 
                 updates = {'SEMANA OBRA': sem_input, 'STATUS': st_atual, 'OBS': v_obs, **f_dates}
-                valores_linha = df_atual.iloc[idx_base].tolist()
+                valores = {col: str(val) for col, val in updates.items() if col in cols_map}
 
-                for col, val in updates.items():
-                    if col in cols_map:
-                        valores_linha[cols_map[col] - 1] = str(val)
-
-                ws_escrita.update(f"A{idx_base + 2}", [valores_linha])
-                st.cache_data.clear()
-                st.success("Salvo com sucesso!")
-                time.sleep(1)
+                # Grava no modelo local na hora; a planilha é atualizada pela fila
+                carregador.atualizar_linhas(nome_planilha, {idx_base: (dados_tag['TAG'], valores)})
+                fila.enfileirar(nome_planilha, dados_tag['TAG'], valores)
+                st.session_state['aviso'] = f"✅ {dados_tag['TAG']} salvo! Gravação na planilha em segundo plano."
                 st.rerun()
 
             if recarregar:
+                # Só a linha da TAG é relida da planilha
+                if not carregador.recarregar_linha(nome_planilha, idx_base):
+                    st.session_state['aviso'] = "A planilha mudou desde a carga; os dados serão recarregados."
                 st.rerun()
 
     with tab2:
@@ -338,10 +498,10 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
 
                 if st.form_submit_button("🚀 CADASTRAR NO BANCO", use_container_width=True):
                     if n_tag:
-                        ws_escrita = client.open(map_planilhas[disc]).get_worksheet(0)
-                        nova_linha = [n_tag, "", "", "", "", "", "Aguardando Prog", n_disc, n_desc, n_area, n_des, n_fam, "", n_uni, "", "", ""]
+                        ws_escrita = backend.abrir(map_planilhas[disc])
+                        nova_linha = [n_tag, "", "", "", "", "", regras_de(disc)['padrao'], n_disc, n_desc, n_area, n_des, n_fam, "", n_uni, "", "", ""]
                         ws_escrita.append_row(nova_linha)
-                        st.cache_data.clear()
+                        carregador.anexar_linhas(nome_planilha, [nova_linha])
                         st.success(f"✅ TAG {n_tag} cadastrado!")
                         time.sleep(1)
                         st.rerun()
@@ -349,22 +509,35 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
                         st.error("O campo TAG é obrigatório.")
 
         with col_del:
-            st.markdown("#### Excluir TAG")
-            tag_para_deletar = st.selectbox("Selecione para DELETAR:", [""] + tags_disponiveis)
-
-            if tag_para_deletar:
-                st.warning(f"🚨 Você está prestes a excluir: {tag_para_deletar}")
+            st.markdown("#### Excluir TAGs")
+            busca_del = st.text_input("Buscar TAG para excluir:", key="busca_tag_excluir")
+            # As já escolhidas continuam nas opções quando a busca muda
+            escolhidas = st.session_state.get('tags_excluir', [])
+            opcoes_del = escolhidas + [t for t in idx_tags.buscar(busca_del) if t not in escolhidas]
+            tags_para_deletar = st.multiselect("Selecione para DELETAR:", opcoes_del, key="tags_excluir")
+
+            if tags_para_deletar:
+                # Linha na planilha = posição no DataFrame + 2 (cabeçalho e base 1)
+                mask_del = df_atual['TAG'].isin(tags_para_deletar)
+                linhas_del = {pos + 2: tag for pos, tag in zip(df_atual.index[mask_del], df_atual.loc[mask_del, 'TAG'])}
+                faixas_del = agrupar_faixas(linhas_del)
+
+                st.warning(f"🚨 Você está prestes a excluir {len(linhas_del)} linha(s) de {len(tags_para_deletar)} TAG(s) em {len(faixas_del)} faixa(s).")
                 confirm_del = st.checkbox("Eu confirmo a exclusão definitiva")
 
                 if st.button("🔴 CONFIRMAR EXCLUSÃO", use_container_width=True) and confirm_del:
-                    ws_escrita = client.open(map_planilhas[disc]).get_worksheet(0)
-                    cell = ws_escrita.find(tag_para_deletar, in_column=1)
+                    fila.descarregar(nome_planilha, forcar=True)
+                    ws_escrita = backend.abrir(map_planilhas[disc])
+                    divergentes = verificar_tags(ws_escrita, faixas_del, linhas_del)
 
-                    if cell:
-                        ws_escrita.delete_rows(cell.row)
-                        st.cache_data.clear()
-                        st.success("Removido!")
-                        time.sleep(1)
+                    if divergentes:
+                        carregador.invalidar(nome_planilha)
+                        st.error(f"❌ A planilha mudou desde a carga ({len(divergentes)} linha(s) não conferem). Nada foi excluído; os dados serão recarregados.")
+                    else:
+                        excluir_faixas(ws_escrita, faixas_del)
+                        carregador.remover_linhas(nome_planilha, {linha - 2: tag for linha, tag in linhas_del.items()})
+                        st.session_state['aviso'] = f"🗑️ {len(linhas_del)} linha(s) removida(s)."
+                        st.session_state.pop('tags_excluir', None)
                         st.rerun()
 
     with tab3:
@@ -373,131 +546,151 @@ if aba == "📝 EDIÇÃO/PROGRAMAÇÃO":
         if disc == "ESTRUTURA":
             cols_v = ['TAG', 'ÁREA', 'SEMANA OBRA', 'STATUS', 'DATA FABRICAÇÃO', 'DATA PINTURA', 'DATA MONT', 'DATA TARQUE']
 
-        df_vis = df_atual[[c for c in cols_v if c in df_atual.columns]].copy()
-        st.dataframe(df_vis, use_container_width=True, hide_index=True)
+        if not st.toggle("✏️ Edição em massa", key="modo_edicao_massa"):
+            inicio, fim = pagina_atual(len(df_atual), f"vis_{nome_planilha}")
+            df_vis = df_atual.iloc[inicio:fim][[c for c in cols_v if c in df_atual.columns]]
+            st.dataframe(df_vis, use_container_width=True, hide_index=True)
+        else:
+            cols_grade = ['TAG', 'ÁREA', 'SEMANA OBRA', 'STATUS', 'PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG']
+            if disc == "ESTRUTURA":
+                cols_grade += ['DATA FABRICAÇÃO', 'DATA PINTURA', 'DATA MONT', 'DATA TARQUE']
+            else:
+                cols_grade += ['DATA MONT']
+            cols_grade = [c for c in cols_grade + ['OBS'] if c in df_atual.columns]
+            cols_edit = colunas_editaveis(cols_grade)
+
+            # Só a página visível vai para a grade; o diff e o STATUS usam as posições reais
+            inicio, fim = pagina_atual(len(df_atual), f"grade_{nome_planilha}")
+            df_grade = preparar_grade(df_atual.iloc[inicio:fim], cols_grade)
+            cfg_grade = {c: st.column_config.DateColumn(c, format="DD/MM/YYYY") for c in cols_edit if c in COLUNAS_DATA}
+            cfg_grade['OBS'] = st.column_config.TextColumn(width="large")
+            st.caption("Edite datas, SEMANA OBRA e OBS direto na grade. O STATUS é recalculado ao salvar.")
+            df_editado = st.data_editor(
+                df_grade, column_config=cfg_grade, disabled=[c for c in cols_grade if c not in cols_edit],
+                use_container_width=True, hide_index=True, key=f"grade_{nome_planilha}_{versao_dados}_{inicio}"
+            )
+
+            if st.button("💾 SALVAR EDIÇÃO EM MASSA", use_container_width=True):
+                alteracoes = aplicar_status(df_atual, diff_grade(df_grade, df_editado, cols_edit), disc)
+                if not alteracoes:
+                    st.info("Nenhuma alteração na grade.")
+                else:
+                    linhas = {pos: (df_atual.at[pos, 'TAG'], valores) for pos, valores in alteracoes.items()}
+                    carregador.atualizar_linhas(nome_planilha, linhas)
+                    for tag, valores in linhas.values():
+                        fila.enfileirar(nome_planilha, tag, valores)
+                    # Uma única gravação em lote com todas as células alteradas
+                    fila.descarregar(nome_planilha, forcar=True)
+                    n_celulas = sum(len(v) for v in alteracoes.values())
+                    st.session_state['aviso'] = f"✅ {len(alteracoes)} linhas / {n_celulas} células alteradas."
+                    st.rerun()
 
 elif aba == "📊 CURVA S":
     st.subheader(f"📊 Curva S Semanal e Avanço - {disc}")
 
-    total_t = len(df_atual)
-    montados = len(df_atual[df_atual['STATUS'] == 'MONTADO'])
-    per_real = (montados / total_t * 100) if total_t > 0 else 0
+    with consulta_cache('curva_s'):
+        curva = curva_s_cacheada(nome_planilha, versao_dados, disc, df_atual)
+    per_real = curva['percentual']
 
     c1, c2 = st.columns(2)
     c1.metric("Avanço Total Realizado", f"{per_real:.2f}%")
     c2.write("Progresso Visual:")
     c2.progress(per_real / 100)
 
-    df_c = df_atual.copy()
-    df_c['SEM_PROG'] = pd.to_numeric(df_c['SEMANA OBRA'], errors='coerce').fillna(0).astype(int)
-    df_c['DT_REAL'] = pd.to_datetime(df_c['DATA MONT'], dayfirst=True, errors='coerce')
-    df_c['DT_PREV'] = pd.to_datetime(df_c['PREVISTO'], dayfirst=True, errors='coerce')
-
-    def converter_para_semana(data):
-        if pd.isnull(data):
-            return None
-        dias = (data - DATA_INICIO_OBRA).days
-        return (dias // 7) + 1
-
-    df_c['SEM_PREV'] = df_c['DT_PREV'].apply(converter_para_semana)
-    df_c['SEM_REAL'] = df_c['DT_REAL'].apply(converter_para_semana)
-
-    todas_semanas = sorted(list(set(
-        df_c['SEM_PREV'].dropna().astype(int).tolist() +
-        df_c['SEM_PROG'][df_c['SEM_PROG'] > 0].tolist() +
-        df_c['SEM_REAL'].dropna().astype(int).tolist()
-    )))
-
-    if not todas_semanas:
+    if len(curva['semanas']) == 0:
         st.warning("Aguardando dados de cronograma para gerar o gráfico.")
     else:
-        eixo_x = list(range(1, int(max(todas_semanas)) + 1))
-        prev_sem = df_c['SEM_PREV'].value_counts().reindex(eixo_x, fill_value=0)
-        prog_sem = df_c['SEM_PROG'].value_counts().reindex(eixo_x, fill_value=0)
-        real_sem = df_c['SEM_REAL'].value_counts().reindex(eixo_x, fill_value=0)
-
-        prev_acum = prev_sem.cumsum()
-        prog_acum = prog_sem.cumsum()
-        real_acum = real_sem.cumsum()
-
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=eixo_x, y=prev_sem, name='Previsto Semanal', marker_color='#2ecc71', opacity=0.2))
-        fig.add_trace(go.Bar(x=eixo_x, y=real_sem, name='Realizado Semanal', marker_color='#3498db', opacity=0.2))
-        fig.add_trace(go.Scatter(x=eixo_x, y=prev_acum, name='LB - Previsto Acumulado', line=dict(color='#27ae60', width=2, dash='dot', shape='spline')))
-        fig.add_trace(go.Scatter(x=eixo_x, y=prog_acum, name='Programado Acumulado', line=dict(color='#f1c40f', width=3, shape='spline')))
-        fig.add_trace(go.Scatter(x=eixo_x, y=real_acum, name='Realizado Acumulado', line=dict(color='#3498db', width=4, shape='spline')))
-
-        fig.update_layout(
-            template="plotly_dark",
-            hovermode="x unified",
-            height=550,
-            xaxis_title="Semanas de Obra",
-            yaxis_title="Quantidade de Tags",
-            legend=dict(orientation="h", y=1.05, xanchor="center", x=0.5),
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-
+        with consulta_cache('grafico_curva_s'):
+            fig = figura_curva_s(nome_planilha, versao_dados, disc, df_atual)
+
+        registros = historico.listar(nome_planilha) if historico is not None else []
+        rotulos = {
+            r['id']: f"{'📌 ' + r['rotulo'] if r['rotulo'] else 'Registro'} · "
+                     f"{datetime.fromtimestamp(r['registrado_em']).strftime('%d/%m/%Y %H:%M')}"
+            for r in reversed(registros)
+        }
+        refs = st.multiselect("Sobrepor linhas de base / registros anteriores:", list(rotulos),
+                              format_func=rotulos.get, key=f"hist_{nome_planilha}")
+        # A figura vem do cache_data como cópia: dá para acrescentar as séries
+        for ref in refs:
+            curva_ref = curva_registrada(ref)
+            fig.add_trace(go.Scatter(x=curva_ref['semanas'], y=curva_ref['programado_acum'],
+                                     name=f"Programado · {rotulos[ref]}", line=dict(width=1, dash='dash')))
+            fig.add_trace(go.Scatter(x=curva_ref['semanas'], y=curva_ref['realizado_acum'],
+                                     name=f"Realizado · {rotulos[ref]}", line=dict(width=1, dash='dot')))
         st.plotly_chart(fig, use_container_width=True)
 
         with st.expander("Ver Quadro de Evolução Semanal"):
-            df_resumo = pd.DataFrame({
-                "Semana": eixo_x,
-                "Previsto": prev_acum.values,
-                "Programado": prog_acum.values,
-                "Realizado": real_acum.values
-            }).set_index("Semana")
-            st.dataframe(df_resumo.T, use_container_width=True)
+            st.dataframe(resumo_semanal(curva).T, use_container_width=True)
+
+        if refs:
+            with st.expander(f"Desvio semana a semana vs {rotulos[refs[0]]}", expanded=True):
+                st.dataframe(desvio_curvas(curva, curva_registrada(refs[0])).T, use_container_width=True)
+
+        if registros:
+            with st.expander(f"Histórico de avanço ({len(registros)} registros)"):
+                df_hist = pd.DataFrame(registros)
+                df_hist['Avanço (%)'] = (df_hist['montados'] / df_hist['total'].where(df_hist['total'] > 0) * 100).round(2)
+                df_hist['Variação (p.p.)'] = df_hist['Avanço (%)'].diff().round(2)
+                momentos = pd.to_datetime(df_hist['registrado_em'].map(datetime.fromtimestamp))
+                df_hist['Semana'] = (momentos - DATA_INICIO_OBRA).dt.days // 7 + 1
+                df_hist['Registrado em'] = momentos.dt.strftime('%d/%m/%Y %H:%M')
+                df_hist = df_hist.rename(columns={'rotulo': 'Linha de base', 'total': 'Total', 'montados': 'Montadas',
+                                                  'mudancas_status': 'Mudanças de STATUS'})
+                tabela_paginada(df_hist[['Registrado em', 'Semana', 'Linha de base', 'Total', 'Montadas', 'Avanço (%)',
+                                         'Variação (p.p.)', 'Mudanças de STATUS']].iloc[::-1],
+                                f"hist_{nome_planilha}", use_container_width=True, hide_index=True)
+
+        if st.session_state.get('admin') and historico is not None:
+            with st.form("form_linha_base"):
+                rotulo_base = st.text_input("Nome da linha de base (ex.: LB Rev.2):")
+                if st.form_submit_button("📌 SALVAR LINHA DE BASE", use_container_width=True) and rotulo_base.strip():
+                    registrar_historico(historico, nome_planilha, curva, df_atual, rotulo_base.strip())
+                    st.session_state['aviso'] = f"📌 Linha de base \"{rotulo_base.strip()}\" gravada."
+                    st.rerun()
 
 elif aba == "📋 RELATÓRIOS":
     st.subheader(f"📋 Painel de Relatórios - {disc}")
 
+    with consulta_cache('indice_relatorio'):
+        idx_rel = indice_relatorio(nome_planilha, versao_dados, df_atual)
+
     if disc == "ESTRUTURA":
         st.markdown("#### Status Atual das Peças")
         c1, c2, c3, c4, c5, c6 = st.columns(6)
-        c1.metric("Total Tags", len(df_atual))
-        c2.metric("Aguard. Prog", len(df_atual[df_atual['STATUS'] == 'Aguardando Prog']))
-        c3.metric("Aguard. Fab", len(df_atual[df_atual['STATUS'] == 'Aguardando Fab']))
-        c4.metric("Aguard. Pintura", len(df_atual[df_atual['STATUS'] == 'Aguardando Pintura/Montagem']))
-        c5.metric("Aguard. Montagem", len(df_atual[df_atual['STATUS'] == 'Aguardando Montagem']))
-        c6.metric("Aguard. Torque", len(df_atual[df_atual['STATUS'] == 'Aguardando Torque']))
+        c1.metric("Total Tags", idx_rel.total)
+        c2.metric("Aguard. Prog", idx_rel.contar_status('Aguardando Prog'))
+        c3.metric("Aguard. Fab", idx_rel.contar_status('Aguardando Fab'))
+        c4.metric("Aguard. Pintura", idx_rel.contar_status('Aguardando Pintura/Montagem'))
+        c5.metric("Aguard. Montagem", idx_rel.contar_status('Aguardando Montagem'))
+        c6.metric("Aguard. Torque", idx_rel.contar_status('Aguardando Torque'))
 
         st.markdown("#### Totais Realizados (Acumulado)")
         t1, t2, t3, t4, t5 = st.columns(5)
-
-        def contar_realizado(col):
-            return len(df_atual[df_atual[col].fillna("").astype(str) != ""]) if col in df_atual.columns else 0
-
-        t1.info(f"📅 Programado: {contar_realizado('DATA INIC PROG')}")
-        t2.info(f"🏭 Fabricado: {contar_realizado('DATA FABRICAÇÃO')}")
-        t3.info(f"🎨 Pintado: {contar_realizado('DATA PINTURA')}")
-        t4.info(f"🏗️ Montagem: {contar_realizado('DATA MONT')}")
-        t5.success(f"🔧 Torqueado: {contar_realizado('DATA TARQUE')}")
+        t1.info(f"📅 Programado: {idx_rel.contar_com_data('DATA INIC PROG')}")
+        t2.info(f"🏭 Fabricado: {idx_rel.contar_com_data('DATA FABRICAÇÃO')}")
+        t3.info(f"🎨 Pintado: {idx_rel.contar_com_data('DATA PINTURA')}")
+        t4.info(f"🏗️ Montagem: {idx_rel.contar_com_data('DATA MONT')}")
+        t5.success(f"🔧 Torqueado: {idx_rel.contar_com_data('DATA TARQUE')}")
     else:
         m1, m2, m3, m4 = st.columns(4)
-        m1.metric("Total", len(df_atual))
-        m2.metric("Montados ✅", len(df_atual[df_atual['DATA MONT'].fillna("") != ""]))
-        m3.metric("Programados 📅", len(df_atual[df_atual['DATA INIC PROG'].fillna("") != ""]))
-        m4.metric("Aguardando ⏳", len(df_atual[df_atual['DATA INIC PROG'].fillna("") == ""]))
+        m1.metric("Total", idx_rel.total)
+        m2.metric("Montados ✅", idx_rel.contar_com_data('DATA MONT'))
+        m3.metric("Programados 📅", idx_rel.contar_com_data('DATA INIC PROG'))
+        m4.metric("Aguardando ⏳", idx_rel.contar_sem_data('DATA INIC PROG'))
 
     st.divider()
 
     st.markdown("### 📅 PROGRAMAÇÃO")
-    df_p = df_atual[df_atual['DATA INIC PROG'].fillna("").astype(str) != ""].copy()
-    semanas_prog = sorted([s for s in df_p['SEMANA OBRA'].unique() if s]) if not df_p.empty else []
+    semanas_prog = sorted(idx_rel.semanas(com_data='DATA INIC PROG'))
     sem_sel_p = st.selectbox("Filtrar Programação por Semana:", ["TODAS"] + semanas_prog, key="rel_prog_sem_new")
-
-    if sem_sel_p != "TODAS":
-        df_p = df_p[df_p['SEMANA OBRA'] == sem_sel_p]
-
-    cols_p_alvo = ['TAG', 'ÁREA', 'SEMANA OBRA', 'DATA INIC PROG', 'DESCRIÇÃO']
-    cols_p_safe = [c for c in cols_p_alvo if c in df_p.columns]
+    df_p = relatorio_programacao(df_atual, idx_rel, None if sem_sel_p == "TODAS" else sem_sel_p)
 
     if not df_p.empty:
-        if 'DATA INIC PROG' in df_p.columns:
-            df_p['DATA INIC PROG'] = pd.to_datetime(df_p['DATA INIC PROG'], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y').fillna("")
-
-        st.dataframe(df_p[cols_p_safe], use_container_width=True, hide_index=True)
-        excel_p = exportar_excel_com_cabecalho(df_p[cols_p_safe], f"RELATÓRIO DE PROGRAMAÇÃO - {disc}")
+        tabela_paginada(df_p, "rel_prog", use_container_width=True, hide_index=True)
+        with consulta_cache('exportar_excel'):
+            excel_p = exportar_excel_com_cabecalho(nome_planilha, versao_dados, f"programacao:{sem_sel_p}", tuple(df_p.columns),
+                                                   f"RELATÓRIO DE PROGRAMAÇÃO - {disc}", df_p)
         st.download_button("📥 EXPORTAR PROGRAMAÇÃO", excel_p, f"Prog_{disc}.xlsx", use_container_width=True)
     else:
         st.info("Nenhum item programado.")
@@ -505,35 +698,27 @@ elif aba == "📋 RELATÓRIOS":
     st.divider()
 
     st.markdown("### 🚩 AGUARDANDO PROGRAMAÇÃO")
-    df_pend = df_atual[df_atual['DATA INIC PROG'].fillna("").astype(str) == ""].copy()
-    cols_pend_alvo = ['TAG', 'DESCRIÇÃO', 'ÁREA', 'DOCUMENTO DE REFERENCIA', 'STATUS', 'PREVISTO', 'OBS']
-    cols_pend_safe = [c for c in cols_pend_alvo if c in df_pend.columns]
+    df_pend = relatorio_pendencias(df_atual, idx_rel)
 
     if not df_pend.empty:
-        if 'PREVISTO' in df_pend.columns:
-            df_pend['PREVISTO'] = pd.to_datetime(df_pend['PREVISTO'], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y').fillna("")
-
-        st.dataframe(df_pend[cols_pend_safe], use_container_width=True, hide_index=True)
-        excel_pend = exportar_excel_com_cabecalho(df_pend[cols_pend_safe], f"PENDÊNCIAS - {disc}")
+        tabela_paginada(df_pend, "rel_pend", use_container_width=True, hide_index=True)
+        with consulta_cache('exportar_excel'):
+            excel_pend = exportar_excel_com_cabecalho(nome_planilha, versao_dados, "pendencias", tuple(df_pend.columns),
+                                                      f"PENDÊNCIAS - {disc}", df_pend)
         st.download_button("📥 EXPORTAR AGUARDANDO", excel_pend, f"Pendencias_{disc}.xlsx", use_container_width=True)
 
     st.divider()
 
     st.markdown("### 📈 RELATÓRIO DE AVANÇO")
-    semanas_av = sorted([s for s in df_atual['SEMANA OBRA'].unique() if s], reverse=True)
+    semanas_av = sorted(idx_rel.semanas(), reverse=True)
     sem_sel_av = st.selectbox("Selecione a Semana:", semanas_av if semanas_av else ["-"], key="rel_av_sem_new")
-    df_av = df_atual[(df_atual['SEMANA OBRA'] == sem_sel_av) & (df_atual['DATA MONT'].fillna("").astype(str) != "")].copy()
-
-    cols_av_alvo = ['TAG', 'DESCRIÇÃO', 'DATA MONT', 'DATA TARQUE', 'ÁREA', 'STATUS', 'OBS']
-    cols_av_safe = [c for c in cols_av_alvo if c in df_av.columns]
+    df_av = relatorio_avanco(df_atual, idx_rel, sem_sel_av)
 
     if not df_av.empty:
-        for d_col in ['DATA MONT', 'DATA TARQUE']:
-            if d_col in df_av.columns:
-                df_av[d_col] = pd.to_datetime(df_av[d_col], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y').fillna("")
-
-        st.dataframe(df_av[cols_av_safe], use_container_width=True, hide_index=True)
-        excel_av = exportar_excel_com_cabecalho(df_av[cols_av_safe], f"AVANÇO SEMANAL - {disc}")
+        tabela_paginada(df_av, "rel_av", use_container_width=True, hide_index=True)
+        with consulta_cache('exportar_excel'):
+            excel_av = exportar_excel_com_cabecalho(nome_planilha, versao_dados, f"avanco:{sem_sel_av}", tuple(df_av.columns),
+                                                    f"AVANÇO SEMANAL - {disc}", df_av)
         st.download_button("📥 EXPORTAR AVANÇO", excel_av, f"Avanco_{disc}.xlsx", use_container_width=True)
     else:
         st.warning(f"Sem avanço registrado para a semana {sem_sel_av}.")
@@ -552,58 +737,122 @@ elif aba == "📤 EXPORTAÇÃO E IMPORTAÇÕES":
 
     with c2:
         st.info("🚀 IMPORTAÇÃO")
-        up = st.file_uploader("Upload Excel:", type="xlsx")
+        up = st.file_uploader("Upload Excel/CSV/Parquet:", type=EXTENSOES)
         if up:
             if st.button("🚀 IMPORTAR E ATUALIZAR", use_container_width=True):
                 try:
-                    df_up = pd.read_excel(up).astype(str)
-                    df_up.columns = [str(c).strip().upper() for c in df_up.columns]
-                    ws_escrita = client.open(map_planilhas[disc]).get_worksheet(0)
-                    lista_mestra = ws_escrita.get_all_values()
-                    headers = [str(h).strip().upper() for h in lista_mestra[0]]
-                    idx_map = {name: i for i, name in enumerate(headers)}
-                    sucesso = 0
-                    nao_encontrado = 0
-
-                    for _, r in df_up.iterrows():
-                        tag_import = str(r.get('TAG', '')).strip()
-                        if not tag_import or tag_import == 'nan':
-                            continue
-
-                        achou = False
-                        for i, row in enumerate(lista_mestra[1:]):
-                            if str(row[0]).strip() == tag_import:
-                                for col in ['SEMANA OBRA', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'OBS', 'PREVISTO']:
-                                    if col.upper() in df_up.columns:
-                                        val = str(r[col.upper()]).strip()
-                                        if val.lower() in ['nan', 'none', 'nat', 'dd/mm/yyyy']:
-                                            val = ''
-                                        lista_mestra[i + 1][idx_map[col.upper()]] = val
-                                sucesso += 1
-                                achou = True
-                                break
-                        if not achou:
-                            nao_encontrado += 1
-
-                    if sucesso > 0:
-                        ws_escrita.update('A1', lista_mestra)
-                        st.cache_data.clear()
+                    fila.descarregar(nome_planilha, forcar=True)
+                    ws_escrita = backend.abrir(map_planilhas[disc])
+                    barra = st.progress(0.0, text="Lendo arquivo...")
+
+                    def progresso(lidas, fracao, segundos):
+                        vel = lidas / segundos if segundos > 0 else 0
+                        barra.progress(fracao if fracao is not None else 0.0,
+                                       text=f"{lidas} linhas lidas · {vel:.0f} linhas/s")
+
+                    with medir('importacao'):
+                        # Reaproveita o que já está carregado se a planilha não mudou desde a carga
+                        matriz = carregador.matriz_planilha(nome_planilha, ws_escrita)
+                        res = importar_blocos(ws_escrita, ler_blocos(up, up.name), matriz=matriz, progresso=progresso,
+                                              padrao_nova={'DISCIPLINA': disc}, disciplina=disc)
+                    barra.progress(1.0, text=f"{res['linhas']} linhas processadas")
+                    st.session_state['rejeitadas_importacao'] = res['rejeitadas']
+
+                    if res['encontradas'] > 0 or res['novas']:
+                        # Colunas pelo nome no cabeçalho do diff: a planilha pode ter mudado desde a carga
+                        cabecalho = res['cabecalho']
+                        linhas_cache = {}
+                        for (lin, col), val in res['alteracoes'].items():
+                            linhas_cache.setdefault(lin - 1, (res['tags'][lin], {}))[1][cabecalho[col]] = val
+                        novas = [[dict(zip(cabecalho, nova)).get(c, "") for c in colunas_planilha(df_atual)]
+                                 for nova in res['novas']]
+                        if (set(cabecalho) - set(df_atual.columns)
+                                or not (carregador.atualizar_linhas(nome_planilha, linhas_cache)
+                                        and carregador.anexar_linhas(nome_planilha, novas))):
+                            carregador.invalidar(nome_planilha)
                         st.success("✅ IMPORTAÇÃO CONCLUÍDA!")
-                        st.write(f"📊 **Resultado:** {sucesso} TAGs atualizadas.")
+                        st.write(f"📊 **Resultado:** {res['atualizadas']} TAGs atualizadas ({res['encontradas']} encontradas), {len(res['novas'])} TAGs novas cadastradas.")
+                        st.caption(f"{res['celulas']} células gravadas em {res['segundos']:.2f}s ({res['linhas_por_seg']:.0f} linhas/s)")
                         time.sleep(2)
                     else:
-                        st.error("❌ Nenhuma TAG correspondente encontrada.")
+                        st.error("❌ Nenhuma TAG válida encontrada no arquivo.")
                 except Exception as e:
                     st.error(f"❌ Erro no processamento: {e}")
 
+        rejeitadas = st.session_state.get('rejeitadas_importacao')
+        if rejeitadas:
+            with st.expander(f"⚠️ {len(rejeitadas)} linha(s) rejeitada(s) na última importação"):
+                df_rej = pd.DataFrame(rejeitadas)
+                st.dataframe(df_rej.head(500), hide_index=True, use_container_width=True)
+                st.download_button("📥 BAIXAR REJEITADAS (CSV)", df_rej.to_csv(index=False, sep=';').encode('utf-8-sig'),
+                                   "rejeitadas_importacao.csv", use_container_width=True)
+
     with c3:
         st.info("💾 BASE COMPLETA")
-        df_export = df_atual.copy()
-        colunas_data = ['PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT']
-        for col in colunas_data:
-            if col in df_export.columns:
-                temp_dt = pd.to_datetime(df_export[col], dayfirst=True, errors='coerce')
-                df_export[col] = temp_dt.dt.strftime('%d/%m/%Y').replace('NaT', '')
-
-        excel_base = exportar_excel_com_cabecalho(df_export, f"BASE DE DADOS COMPLETA - {disc}")
-        st.download_button("📥 EXPORTAR BASE", excel_base, f"Base_{disc}.xlsx", use_container_width=True)
+        # CSV/Parquet são bem mais rápidos que o Excel para bases grandes
+        formato = FORMATOS_EXPORTACAO[st.radio("Formato:", list(FORMATOS_EXPORTACAO), horizontal=True, key="formato_base")]
+        with consulta_cache('exportar_base'):
+            arquivo_base = exportar_base(nome_planilha, versao_dados, formato, f"BASE DE DADOS COMPLETA - {disc}", df_atual)
+        st.download_button("📥 EXPORTAR BASE", arquivo_base, f"Base_{disc}.{formato}", use_container_width=True)
+
+elif aba == "🌐 CONSOLIDADO":
+    st.subheader("🌐 Painel Consolidado - Todas as Disciplinas")
+
+    # As três planilhas em paralelo; a disciplina ativa já está em cache e as
+    # demais só precisam das colunas da curva e do STATUS (leitura parcial)
+    colunas_consolidado = {nome: COLUNAS_CURVA + sorted(colunas_regras(d)) for d, nome in map_planilhas.items()}
+    with medir('carga_consolidada'):
+        cargas = carregador.obter_varios(list(map_planilhas.values()), colunas_consolidado)
+
+    agregados = {}
+    for d, nome in map_planilhas.items():
+        df_d, _, versao_d = cargas[nome]
+        with consulta_cache('agregado_disciplina'):
+            agregado = agregado_disciplina(nome, versao_d, d, df_d)
+        if agregado is not None:
+            agregados[d] = agregado
+
+    if not agregados:
+        st.warning("Nenhuma disciplina com dados carregados.")
+    else:
+        combinada = combinar_curvas([a['curva'] for a in agregados.values()])
+
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("Total de TAGs", combinada['total'])
+        k2.metric("Montadas ✅", combinada['montados'])
+        k3.metric("Programadas 📅", sum(a['programados'] for a in agregados.values()))
+        k4.metric("Aguardando ⏳", sum(a['aguardando'] for a in agregados.values()))
+        k5.metric("Avanço Geral", f"{combinada['percentual']:.2f}%")
+        st.progress(combinada['percentual'] / 100)
+
+        st.markdown("### Por Disciplina")
+        df_disc = pd.DataFrame([
+            {
+                "Disciplina": d,
+                "Total": a['curva']['total'],
+                "Montadas": a['curva']['montados'],
+                "Programadas": a['programados'],
+                "Aguardando": a['aguardando'],
+                "Avanço (%)": round(a['curva']['percentual'], 2),
+                "Peso no Total (%)": round(a['curva']['total'] / combinada['total'] * 100, 2) if combinada['total'] else 0,
+            }
+            for d, a in agregados.items()
+        ])
+        st.dataframe(df_disc, use_container_width=True, hide_index=True)
+
+        if len(combinada['semanas']) == 0:
+            st.warning("Aguardando dados de cronograma para gerar o gráfico.")
+        else:
+            st.markdown("### Curva S Consolidada")
+            fig = _montar_figura(combinada)
+            for d, a in agregados.items():
+                curva_d = a['curva']
+                fig.add_trace(go.Scatter(x=curva_d['semanas'], y=curva_d['realizado_acum'], name=f'Realizado {d}',
+                                         line=dict(width=1, dash='dash'), visible='legendonly'))
+            st.plotly_chart(fig, use_container_width=True)
+
+            with st.expander("Ver Quadro de Evolução Semanal Consolidado"):
+                st.dataframe(resumo_semanal(combinada).T, use_container_width=True)
+
+# Fim do rerun: a duração registrada no diagnóstico vai até aqui
+medidor.encerrar()
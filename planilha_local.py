@@ -0,0 +1,383 @@
+# Planilhas locais (memória e SQLite) com a mesma interface usada do gspread.Worksheet.
+# Servem para rodar importação, cargas e benchmarks sem credenciais do Google.
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from contextlib import closing
+
+from gspread.utils import a1_range_to_grid_range
+
+
+class CelulaLocal:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class PastaLocal:
+    # Equivalente ao gspread.Spreadsheet: só as requisições deleteDimension
+    # de linhas usadas na exclusão em lote
+    def __init__(self, planilha):
+        self._planilha = planilha
+
+    def batch_update(self, body):
+        self._planilha._registrar('spreadsheet.batch_update')
+        for req in body.get('requests', []):
+            faixa = req['deleteDimension']['range']
+            if faixa.get('dimension') != 'ROWS':
+                raise ValueError("PastaLocal só exclui linhas (dimension=ROWS).")
+            self._planilha._excluir_linhas(faixa['startIndex'] + 1, faixa['endIndex'])
+        return {'replies': [{} for _ in body.get('requests', [])]}
+
+    def get_lastUpdateTime(self):
+        # No Google é o modifiedTime do Drive; aqui, um contador de escritas
+        return self._planilha.revisao()
+
+
+def faixa_a1(range_name, total_linhas):
+    grid = a1_range_to_grid_range(range_name)
+    lin_ini = grid.get('startRowIndex', 0)
+    lin_fim = grid.get('endRowIndex', total_linhas)
+    col_ini = grid.get('startColumnIndex', 0)
+    col_fim = grid.get('endColumnIndex')
+    return lin_ini, lin_fim, col_ini, col_fim
+
+
+def aplicar_valores(linha, col_ini, valores):
+    linha = list(linha)
+    if len(linha) < col_ini + len(valores):
+        linha.extend([""] * (col_ini + len(valores) - len(linha)))
+    for j, valor in enumerate(valores):
+        linha[col_ini + j] = "" if valor is None else str(valor)
+    return linha
+
+
+def recortar_linhas(linhas, col_ini, col_fim):
+    saida = [list(linha[col_ini:col_fim]) for linha in linhas]
+    # Mesmo comportamento da API: linhas vazias do final não retornam
+    while saida and not any(saida[-1]):
+        saida.pop()
+    return saida
+
+
+class PlanilhaMemoria:
+    id = 0
+
+    def __init__(self, valores=None, titulo="Planilha"):
+        self.title = titulo
+        self._linhas = [[str(v) for v in linha] for linha in (valores or [])]
+        self.chamadas = Counter()
+        self.celulas_escritas = 0
+        # Tamanho das respostas de leitura, para comparar leituras completas e parciais
+        self.celulas_lidas = 0
+        self._revisao = 0
+
+    @property
+    def row_count(self):
+        return len(self._linhas)
+
+    def revisao(self):
+        return str(self._revisao)
+
+    def _registrar(self, operacao):
+        self.chamadas[operacao] += 1
+
+    def _lidas(self, linhas):
+        self.celulas_lidas += sum(len(linha) for linha in linhas)
+        return linhas
+
+    def _faixa(self, range_name):
+        return faixa_a1(range_name, len(self._linhas))
+
+    def _escrever(self, range_name, values):
+        lin_ini, _, col_ini, _ = self._faixa(range_name)
+        for i, valores in enumerate(values):
+            while len(self._linhas) <= lin_ini + i:
+                self._linhas.append([])
+            self._linhas[lin_ini + i] = aplicar_valores(self._linhas[lin_ini + i], col_ini, valores)
+            self.celulas_escritas += len(valores)
+        self._revisao += 1
+
+    def _ler(self, range_name):
+        lin_ini, lin_fim, col_ini, col_fim = self._faixa(range_name)
+        return recortar_linhas(self._linhas[lin_ini:lin_fim], col_ini, col_fim)
+
+    def get_all_values(self):
+        self._registrar('get_all_values')
+        return self._lidas([list(linha) for linha in self._linhas])
+
+    def row_values(self, row):
+        self._registrar('row_values')
+        if row - 1 >= len(self._linhas):
+            return []
+        return self._lidas([list(self._linhas[row - 1])])[0]
+
+    def col_values(self, col):
+        self._registrar('col_values')
+        self.celulas_lidas += len(self._linhas)
+        return [linha[col - 1] if len(linha) >= col else "" for linha in self._linhas]
+
+    def batch_get(self, ranges, **kwargs):
+        self._registrar('batch_get')
+        return [self._lidas(self._ler(r)) for r in ranges]
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self._registrar('update')
+        # Aceita a ordem antiga do gspread: update('A1', valores)
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self._escrever(range_name or "A1", values)
+
+    def batch_update(self, data, **kwargs):
+        self._registrar('batch_update')
+        for item in data:
+            self._escrever(item['range'], item['values'])
+
+    def append_row(self, values, **kwargs):
+        self._registrar('append_row')
+        self._linhas.append([str(v) for v in values])
+        self.celulas_escritas += len(values)
+        self._revisao += 1
+
+    def append_rows(self, values, **kwargs):
+        self._registrar('append_rows')
+        for linha in values:
+            self._linhas.append([str(v) for v in linha])
+            self.celulas_escritas += len(linha)
+        self._revisao += 1
+
+    def find(self, query, in_row=None, in_column=None, **kwargs):
+        self._registrar('find')
+        for i, linha in enumerate(self._linhas):
+            if in_row is not None and i + 1 != in_row:
+                continue
+            for j, valor in enumerate(linha):
+                if in_column is not None and j + 1 != in_column:
+                    continue
+                if valor == query:
+                    return CelulaLocal(i + 1, j + 1, valor)
+        return None
+
+    @property
+    def spreadsheet(self):
+        return PastaLocal(self)
+
+    def delete_rows(self, start_index, end_index=None):
+        self._registrar('delete_rows')
+        self._excluir_linhas(start_index, end_index if end_index is not None else start_index)
+
+    def _excluir_linhas(self, inicio, fim):
+        del self._linhas[inicio - 1:fim]
+        self._revisao += 1
+
+
+class PlanilhaSQLite:
+    # Uma aba por nome de planilha; cada linha é guardada como lista JSON
+    id = 0
+
+    def __init__(self, caminho, titulo):
+        self.caminho = caminho
+        self.title = titulo
+        self.chamadas = Counter()
+        self.celulas_escritas = 0
+        # Tamanho das respostas de leitura, para comparar leituras completas e parciais
+        self.celulas_lidas = 0
+        with closing(self._conectar()) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS linhas (planilha TEXT, pos INTEGER, valores TEXT)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_linhas_pos ON linhas (planilha, pos)")
+            con.execute("CREATE TABLE IF NOT EXISTS revisoes (planilha TEXT PRIMARY KEY, revisao INTEGER)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def _registrar(self, operacao):
+        self.chamadas[operacao] += 1
+
+    def _lidas(self, linhas):
+        self.celulas_lidas += sum(len(linha) for linha in linhas)
+        return linhas
+
+    @property
+    def row_count(self):
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT COUNT(*) FROM linhas WHERE planilha = ?", (self.title,)).fetchone()[0]
+
+    def revisao(self):
+        with closing(self._conectar()) as con:
+            linha = con.execute("SELECT revisao FROM revisoes WHERE planilha = ?", (self.title,)).fetchone()
+        return str(linha[0] if linha else 0)
+
+    def _tocar(self, con):
+        # Toda escrita incrementa a revisão, na mesma transação
+        con.execute("INSERT INTO revisoes VALUES (?, 1) ON CONFLICT(planilha) DO UPDATE SET revisao = revisao + 1",
+                    (self.title,))
+
+    def _linhas(self, con, inicio=0, fim=None):
+        sql = "SELECT valores FROM linhas WHERE planilha = ? AND pos >= ?"
+        params = [self.title, inicio]
+        if fim is not None:
+            sql += " AND pos < ?"
+            params.append(fim)
+        return [json.loads(v) for (v,) in con.execute(sql + " ORDER BY pos", params)]
+
+    def _gravar_linha(self, con, pos, linha):
+        valores = json.dumps(linha, ensure_ascii=False)
+        cursor = con.execute("UPDATE linhas SET valores = ? WHERE planilha = ? AND pos = ?", (valores, self.title, pos))
+        if cursor.rowcount == 0:
+            con.execute("INSERT INTO linhas VALUES (?, ?, ?)", (self.title, pos, valores))
+
+    def _proxima_posicao(self, con):
+        return con.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM linhas WHERE planilha = ?", (self.title,)).fetchone()[0]
+
+    def _escrever(self, con, range_name, values):
+        lin_ini, _, col_ini, _ = faixa_a1(range_name, 0)
+        atuais = dict(con.execute(
+            "SELECT pos, valores FROM linhas WHERE planilha = ? AND pos >= ? AND pos < ?",
+            (self.title, lin_ini, lin_ini + len(values)),
+        ))
+        for i, valores in enumerate(values):
+            base = json.loads(atuais[lin_ini + i]) if lin_ini + i in atuais else []
+            self._gravar_linha(con, lin_ini + i, aplicar_valores(base, col_ini, valores))
+            self.celulas_escritas += len(valores)
+        self._tocar(con)
+
+    def substituir(self, valores):
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM linhas WHERE planilha = ?", (self.title,))
+            con.executemany("INSERT INTO linhas VALUES (?, ?, ?)", [
+                (self.title, pos, json.dumps([str(v) for v in linha], ensure_ascii=False))
+                for pos, linha in enumerate(valores)
+            ])
+            self._tocar(con)
+
+    def get_all_values(self):
+        self._registrar('get_all_values')
+        with closing(self._conectar()) as con:
+            return self._lidas(self._linhas(con))
+
+    def row_values(self, row):
+        self._registrar('row_values')
+        with closing(self._conectar()) as con:
+            linhas = self._lidas(self._linhas(con, row - 1, row))
+        return linhas[0] if linhas else []
+
+    def col_values(self, col):
+        self._registrar('col_values')
+        with closing(self._conectar()) as con:
+            valores = [linha[col - 1] if len(linha) >= col else "" for linha in self._linhas(con)]
+        self.celulas_lidas += len(valores)
+        return valores
+
+    def batch_get(self, ranges, **kwargs):
+        self._registrar('batch_get')
+        saida = []
+        with closing(self._conectar()) as con:
+            for range_name in ranges:
+                lin_ini, lin_fim, col_ini, col_fim = faixa_a1(range_name, None)
+                saida.append(self._lidas(recortar_linhas(self._linhas(con, lin_ini, lin_fim), col_ini, col_fim)))
+        return saida
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self._registrar('update')
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        with closing(self._conectar()) as con, con:
+            self._escrever(con, range_name or "A1", values)
+
+    def batch_update(self, data, **kwargs):
+        self._registrar('batch_update')
+        with closing(self._conectar()) as con, con:
+            for item in data:
+                self._escrever(con, item['range'], item['values'])
+
+    def append_row(self, values, **kwargs):
+        self._registrar('append_row')
+        self._anexar([values])
+
+    def append_rows(self, values, **kwargs):
+        self._registrar('append_rows')
+        self._anexar(values)
+
+    def _anexar(self, linhas):
+        with closing(self._conectar()) as con, con:
+            inicio = self._proxima_posicao(con)
+            con.executemany("INSERT INTO linhas VALUES (?, ?, ?)", [
+                (self.title, inicio + i, json.dumps([str(v) for v in linha], ensure_ascii=False))
+                for i, linha in enumerate(linhas)
+            ])
+            self._tocar(con)
+        self.celulas_escritas += sum(len(linha) for linha in linhas)
+
+    def find(self, query, in_row=None, in_column=None, **kwargs):
+        self._registrar('find')
+        with closing(self._conectar()) as con:
+            for i, linha in enumerate(self._linhas(con)):
+                if in_row is not None and i + 1 != in_row:
+                    continue
+                for j, valor in enumerate(linha):
+                    if in_column is not None and j + 1 != in_column:
+                        continue
+                    if valor == query:
+                        return CelulaLocal(i + 1, j + 1, valor)
+        return None
+
+    @property
+    def spreadsheet(self):
+        return PastaLocal(self)
+
+    def delete_rows(self, start_index, end_index=None):
+        self._registrar('delete_rows')
+        self._excluir_linhas(start_index, end_index if end_index is not None else start_index)
+
+    def _excluir_linhas(self, inicio, fim):
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM linhas WHERE planilha = ? AND pos >= ? AND pos < ?", (self.title, inicio - 1, fim))
+            con.execute("UPDATE linhas SET pos = pos - ? WHERE planilha = ? AND pos >= ?",
+                        (fim - inicio + 1, self.title, fim))
+            self._tocar(con)
+
+
+class ErroQuotaLocal(Exception):
+    # Mesmos atributos usados do gspread.exceptions.APIError
+    code = 429
+
+    def __init__(self, metodo):
+        super().__init__(f"429 RESOURCE_EXHAUSTED simulado em {metodo}")
+
+
+class PlanilhaComLimite:
+    # Envolve uma planilha local e recusa com 429 as chamadas acima de
+    # `limite` por `janela` segundos, como a cota por usuário do Sheets
+    METODOS = {'get_all_values', 'row_values', 'col_values', 'batch_get', 'update', 'batch_update',
+               'append_row', 'append_rows', 'find', 'delete_rows'}
+
+    def __init__(self, planilha, limite=60, janela=60.0):
+        self.planilha = planilha
+        self.limite = limite
+        self.janela = janela
+        self.recusadas = 0
+        self._chamadas = deque()
+        self._trava = threading.Lock()
+
+    def _admitir(self, metodo):
+        with self._trava:
+            agora = time.monotonic()
+            while self._chamadas and agora - self._chamadas[0] >= self.janela:
+                self._chamadas.popleft()
+            if len(self._chamadas) >= self.limite:
+                self.recusadas += 1
+                raise ErroQuotaLocal(metodo)
+            self._chamadas.append(agora)
+
+    def __getattr__(self, nome):
+        valor = getattr(self.planilha, nome)
+        if nome not in self.METODOS:
+            return valor
+
+        def chamar(*args, **kwargs):
+            self._admitir(nome)
+            return valor(*args, **kwargs)
+        return chamar
@@ -0,0 +1,108 @@
+# Regras de STATUS por disciplina, declarativas e vetoriais: cada regra é
+# (colunas, status) e vale a primeira, na ordem, com alguma das colunas
+# preenchida. Tudo em uma passada com np.select sobre o frame inteiro.
+#
+#   python regras_status.py --linhas 100000
+import numpy as np
+import pandas as pd
+
+VAZIOS_STATUS = ['', 'DD/MM/YYYY']
+
+REGRAS_PADRAO = {
+    'regras': [
+        (['DATA MONT'], "MONTADO"),
+        (['DATA INIC PROG', 'DATA FIM PROG'], "PROGRAMADO"),
+    ],
+    'padrao': "AGUARDANDO PROG",
+    'montados': ["MONTADO"],
+}
+
+REGRAS = {
+    # Fabricação -> pintura -> montagem -> torque
+    'ESTRUTURA': {
+        'regras': [
+            (['DATA TARQUE'], "Concluído"),
+            (['DATA MONT'], "Aguardando Torque"),
+            (['DATA PINTURA'], "Aguardando Montagem"),
+            (['DATA FABRICAÇÃO'], "Aguardando Pintura/Montagem"),
+            (['DATA INIC PROG'], "Aguardando Fab"),
+        ],
+        'padrao': "Aguardando Prog",
+        'montados': ["Aguardando Torque", "Concluído"],
+    },
+}
+
+
+def regras_de(disciplina):
+    return REGRAS.get(disciplina, REGRAS_PADRAO)
+
+
+def colunas_regras(disciplina):
+    return {col for colunas, _ in regras_de(disciplina)['regras'] for col in colunas}
+
+
+def status_possiveis(disciplina):
+    regras = regras_de(disciplina)
+    return [status for _, status in regras['regras']] + [regras['padrao']]
+
+
+def preenchida(df, col):
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    valores = df[col]
+    if not pd.api.types.is_string_dtype(valores) or isinstance(valores.dtype, pd.CategoricalDtype):
+        # Linhas avulsas (editor, importação) chegam como object, com None e datas
+        valores = valores.astype(object).fillna("").astype(str)
+    return ~valores.str.strip().isin(VAZIOS_STATUS).to_numpy()
+
+
+def calcular_status(df, disciplina):
+    # Códigos inteiros no np.select e categoria no fim: sem array de textos intermediário
+    regras = regras_de(disciplina)
+    condicoes = [np.logical_or.reduce([preenchida(df, c) for c in colunas]) for colunas, _ in regras['regras']]
+    codigos = np.select(condicoes, np.arange(len(condicoes)), default=len(condicoes))
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=status_possiveis(disciplina)),
+                     index=df.index, name='STATUS')
+
+
+def status_linha(valores, disciplina):
+    # valores: {coluna: valor} de uma TAG (ex.: o formulário do editor)
+    return calcular_status(pd.DataFrame([valores]), disciplina).iat[0]
+
+
+def resumo_status(status, disciplina):
+    # Montados / programados / aguardando programação, para os KPIs
+    regras = regras_de(disciplina)
+    contagem = status.value_counts()
+    montados = int(sum(contagem.get(s, 0) for s in regras['montados']))
+    aguardando = int(contagem.get(regras['padrao'], 0))
+    return {
+        'montados': montados,
+        'programados': int(contagem.sum()) - montados - aguardando,
+        'aguardando': aguardando,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from carregamento import extrair_dados
+    from dados_sinteticos import PLANILHAS, gerar_planilha
+    from planilha_local import PlanilhaMemoria
+
+    parser = argparse.ArgumentParser(description="Tempo do cálculo de STATUS por disciplina.")
+    parser.add_argument("--linhas", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    for disciplina, nome in PLANILHAS.items():
+        df, _ = extrair_dados(PlanilhaMemoria(gerar_planilha(disciplina, args.linhas), nome))
+        melhor = None
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            status = calcular_status(df, disciplina)
+            segundos = time.perf_counter() - inicio
+            melhor = segundos if melhor is None else min(melhor, segundos)
+        print(f"{nome}: {args.linhas} linhas em {melhor * 1000:.1f} ms ({args.linhas / melhor:,.0f} linhas/s)")
+        print(f"  {status.value_counts().to_dict()}")
@@ -0,0 +1,87 @@
+# Índices do painel de relatórios: posições agrupadas por STATUS, por SEMANA OBRA
+# e por "tem data", montados uma vez por versão dos dados.
+import numpy as np
+
+from esquema import COLUNAS_DATA, FORMATO_DATA, coluna_tipada, colunas_planilha, formatar_data
+
+COLUNAS_PROGRAMACAO = ['TAG', 'ÁREA', 'SEMANA OBRA', 'DATA INIC PROG', 'DESCRIÇÃO']
+COLUNAS_PENDENCIAS = ['TAG', 'DESCRIÇÃO', 'ÁREA', 'DOCUMENTO DE REFERENCIA', 'STATUS', 'PREVISTO', 'OBS']
+COLUNAS_AVANCO = ['TAG', 'DESCRIÇÃO', 'DATA MONT', 'DATA TARQUE', 'ÁREA', 'STATUS', 'OBS']
+DATAS_BASE = ['PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT']
+VAZIO = np.array([], dtype=np.int64)
+
+
+class IndiceRelatorio:
+    def __init__(self, df):
+        self.total = len(df)
+        self.por_status = self._agrupar(df, 'STATUS')
+        self.por_semana = self._agrupar(df, 'SEMANA OBRA')
+        self.com_data = {}
+        self.sem_data = {}
+        for col in COLUNAS_DATA:
+            if col in df.columns:
+                preenchida = df[col].fillna("").astype(str).to_numpy() != ""
+                self.com_data[col] = np.flatnonzero(preenchida)
+                self.sem_data[col] = np.flatnonzero(~preenchida)
+
+    @staticmethod
+    def _agrupar(df, col):
+        if col not in df.columns:
+            return {}
+        # groupby().indices devolve posições (o índice é sempre 0..n-1)
+        return {k: np.asarray(v, dtype=np.int64) for k, v in df.groupby(col, sort=False, observed=True).indices.items()}
+
+    def contar_status(self, status):
+        return len(self.por_status.get(status, VAZIO))
+
+    def contar_com_data(self, col):
+        return len(self.com_data.get(col, VAZIO))
+
+    def contar_sem_data(self, col):
+        return len(self.sem_data.get(col, VAZIO)) if col in self.sem_data else self.total
+
+    def semanas(self, com_data=None):
+        semanas = [s for s in self.por_semana if s]
+        if com_data is not None:
+            base = self.com_data.get(com_data, VAZIO)
+            semanas = [s for s in semanas if np.intersect1d(self.por_semana[s], base, assume_unique=True).size]
+        return semanas
+
+    def posicoes(self, semana=None, com_data=None, sem_data=None):
+        pos = np.arange(self.total) if semana is None else self.por_semana.get(semana, VAZIO)
+        if com_data is not None:
+            pos = np.intersect1d(pos, self.com_data.get(com_data, VAZIO), assume_unique=True)
+        if sem_data is not None:
+            pos = np.intersect1d(pos, self.sem_data.get(sem_data, np.arange(self.total)), assume_unique=True)
+        return pos
+
+
+def montar_tabela(df, posicoes, colunas):
+    # Só as linhas/colunas pedidas; datas saem formatadas das colunas tipadas
+    colunas = [c for c in colunas if c in df.columns]
+    tabela = df[colunas].take(posicoes)
+    for col in colunas:
+        if col in COLUNAS_DATA and coluna_tipada(col) in df.columns:
+            tabela[col] = df[coluna_tipada(col)].take(posicoes).dt.strftime(FORMATO_DATA).fillna("")
+    return tabela
+
+
+def relatorio_programacao(df, indice, semana=None):
+    return montar_tabela(df, indice.posicoes(semana=semana, com_data='DATA INIC PROG'), COLUNAS_PROGRAMACAO)
+
+
+def relatorio_pendencias(df, indice):
+    return montar_tabela(df, indice.posicoes(sem_data='DATA INIC PROG'), COLUNAS_PENDENCIAS)
+
+
+def relatorio_avanco(df, indice, semana):
+    return montar_tabela(df, indice.posicoes(semana=semana, com_data='DATA MONT'), COLUNAS_AVANCO)
+
+
+def relatorio_base(df):
+    # Base completa como está na planilha, com as datas principais em dd/mm/aaaa
+    tabela = df[colunas_planilha(df)].copy()
+    for col in DATAS_BASE:
+        if col in tabela.columns:
+            tabela[col] = formatar_data(df, col)
+    return tabela
@@ -0,0 +1,161 @@
+# Geração dos relatórios em lote, sem Streamlit: carrega as disciplinas com o
+# mesmo CarregadorPlanilhas do app (STATUS pelas regras), monta as tabelas e
+# gera os arquivos em paralelo num pool de processos. Na pasta de saída fica
+# um manifesto.json com o que foi gerado e os tempos de cada etapa.
+#
+#   GMONT_BACKEND=sqlite python relatorios_lote.py --saida relatorios/semana
+#   python relatorios_lote.py --disciplinas ESTRUTURA --semanas 12 13 --processos 4
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from armazenamento import BackendGoogleSheets, BackendSQLite, autorizar_google
+from carregamento import CarregadorPlanilhas
+from cliente_quota import BackendComQuota, ClienteQuota
+from configuracao import obter_config
+from exportacao import FORMATOS_EXPORTACAO, exportar
+from relatorios import IndiceRelatorio, relatorio_avanco, relatorio_base, relatorio_pendencias, relatorio_programacao
+
+PLANILHAS = {"ELÉTRICA": "BD_ELE", "INSTRUMENTAÇÃO": "BD_INST", "ESTRUTURA": "BD_ESTR"}
+RELATORIOS = ['programacao', 'pendencias', 'avanco', 'base']
+
+
+def criar_backend():
+    # Mesma configuração do app (GMONT_BACKEND, GMONT_SQLITE_DB...), sem st.secrets obrigatório
+    if obter_config("BACKEND", "google") == "sqlite":
+        return BackendSQLite(obter_config("SQLITE_DB", ".gmont/planilhas.db"))
+    b64_creds = obter_config("GOOGLE_CREDENTIALS_BASE64")
+    if not b64_creds:
+        raise SystemExit("Defina GMONT_GOOGLE_CREDENTIALS_BASE64 ou use GMONT_BACKEND=sqlite.")
+    cliente = ClienteQuota(leituras_por_minuto=float(obter_config("LEITURAS_POR_MINUTO", 60)),
+                           escritas_por_minuto=float(obter_config("ESCRITAS_POR_MINUTO", 60)))
+    return BackendComQuota(BackendGoogleSheets(autorizar_google(b64_creds)), cliente)
+
+
+def semanas_pedidas(disponiveis, pedidas):
+    # Sem --semanas: todas as semanas com dados
+    if not pedidas:
+        return sorted(disponiveis, key=lambda s: (len(s), s))
+    return [s for s in pedidas if s in disponiveis]
+
+
+def montar_tarefas(disciplina, df, relatorios, semanas, formato):
+    # (tabela, título, nome do arquivo, metadados) por relatório, com os mesmos
+    # títulos e nomes de arquivo dos botões de exportação do app
+    indice = IndiceRelatorio(df)
+    tarefas = []
+
+    def adicionar(relatorio, tabela, titulo, arquivo, semana=None):
+        if not tabela.empty:
+            tarefas.append({'tabela': tabela, 'titulo': titulo, 'arquivo': f"{arquivo}.{formato}", 'formato': formato,
+                            'disciplina': disciplina, 'relatorio': relatorio, 'semana': semana})
+
+    if 'programacao' in relatorios:
+        adicionar('programacao', relatorio_programacao(df, indice), f"RELATÓRIO DE PROGRAMAÇÃO - {disciplina}",
+                  f"Prog_{disciplina}")
+        for sem in semanas_pedidas(indice.semanas(com_data='DATA INIC PROG'), semanas):
+            adicionar('programacao', relatorio_programacao(df, indice, sem), f"RELATÓRIO DE PROGRAMAÇÃO - {disciplina}",
+                      f"Prog_{disciplina}_S{sem}", sem)
+    if 'pendencias' in relatorios:
+        adicionar('pendencias', relatorio_pendencias(df, indice), f"PENDÊNCIAS - {disciplina}",
+                  f"Pendencias_{disciplina}")
+    if 'avanco' in relatorios:
+        for sem in semanas_pedidas(indice.semanas(), semanas):
+            adicionar('avanco', relatorio_avanco(df, indice, sem), f"AVANÇO SEMANAL - {disciplina}",
+                      f"Avanco_{disciplina}_S{sem}", sem)
+    if 'base' in relatorios:
+        adicionar('base', relatorio_base(df), f"BASE DE DADOS COMPLETA - {disciplina}", f"Base_{disciplina}")
+    return tarefas
+
+
+def gerar_arquivo(tarefa, pasta):
+    # Roda no processo filho: recebe só a tabela já filtrada
+    inicio = time.perf_counter()
+    conteudo = exportar(tarefa['tabela'], tarefa['formato'], tarefa['titulo'])
+    caminho = os.path.join(pasta, tarefa['arquivo'])
+    with open(caminho, "wb") as f:
+        f.write(conteudo)
+    return {
+        'arquivo': tarefa['arquivo'],
+        'disciplina': tarefa['disciplina'],
+        'relatorio': tarefa['relatorio'],
+        'semana': tarefa['semana'],
+        'linhas': len(tarefa['tabela']),
+        'bytes': len(conteudo),
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+
+
+def gerar_relatorios(backend, pasta, disciplinas, relatorios=RELATORIOS, semanas=None, formato='xlsx', processos=None):
+    inicio = time.perf_counter()
+    os.makedirs(pasta, exist_ok=True)
+    manifesto = {'gerado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'backend': backend.nome,
+                 'formato': formato, 'disciplinas': {}, 'arquivos': [], 'erros': []}
+
+    carregador = CarregadorPlanilhas(backend.abrir, disciplinas={PLANILHAS[d]: d for d in disciplinas})
+    t0 = time.perf_counter()
+    cargas = carregador.obter_varios([PLANILHAS[d] for d in disciplinas])
+    segundos_carga = time.perf_counter() - t0
+
+    tarefas = []
+    t0 = time.perf_counter()
+    for disciplina in disciplinas:
+        nome = PLANILHAS[disciplina]
+        df = cargas[nome][0]
+        manifesto['disciplinas'][disciplina] = {'planilha': nome, 'linhas': len(df),
+                                                'erro_leitura': carregador.erro_leitura(nome)}
+        if not df.empty:
+            tarefas.extend(montar_tarefas(disciplina, df, relatorios, semanas, formato))
+    segundos_tabelas = time.perf_counter() - t0
+
+    # Maiores primeiro: a base completa não fica sozinha no fim do pool
+    tarefas.sort(key=lambda t: len(t['tabela']), reverse=True)
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {executor.submit(gerar_arquivo, tarefa, pasta): tarefa for tarefa in tarefas}
+        for futuro in as_completed(futuros):
+            try:
+                manifesto['arquivos'].append(futuro.result())
+            except Exception as e:
+                manifesto['erros'].append({'arquivo': futuros[futuro]['arquivo'], 'erro': f"{type(e).__name__}: {e}"})
+    segundos_arquivos = time.perf_counter() - t0
+
+    manifesto['arquivos'].sort(key=lambda a: a['arquivo'])
+    manifesto['tempos'] = {
+        'carga': round(segundos_carga, 4),
+        'tabelas': round(segundos_tabelas, 4),
+        'arquivos': round(segundos_arquivos, 4),
+        # Soma dos tempos de cada arquivo: quanto levaria sem o pool
+        'arquivos_em_serie': round(sum(a['segundos'] for a in manifesto['arquivos']), 4),
+        'total': round(time.perf_counter() - inicio, 4),
+    }
+    with open(os.path.join(pasta, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    return manifesto
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os relatórios do G-MONT em lote, sem Streamlit.")
+    parser.add_argument("--saida", default=os.path.join(".gmont", "relatorios", datetime.now().strftime("%Y-%m-%d")),
+                        help="Pasta de saída (criada se não existir)")
+    parser.add_argument("--disciplinas", nargs="+", default=list(PLANILHAS), choices=list(PLANILHAS))
+    parser.add_argument("--relatorios", nargs="+", default=RELATORIOS, choices=RELATORIOS)
+    parser.add_argument("--semanas", nargs="+", help="Semanas da obra (padrão: todas com dados)")
+    parser.add_argument("--formato", default='xlsx', choices=list(FORMATOS_EXPORTACAO.values()))
+    parser.add_argument("--processos", type=int, default=None, help="Processos no pool (padrão: núcleos da máquina)")
+    args = parser.parse_args()
+
+    manifesto = gerar_relatorios(criar_backend(), args.saida, args.disciplinas, args.relatorios, args.semanas,
+                                 args.formato, args.processos)
+    tempos = manifesto['tempos']
+    print(f"{len(manifesto['arquivos'])} arquivo(s) em {args.saida} em {tempos['total']:.1f}s "
+          f"(carga {tempos['carga']:.1f}s, arquivos {tempos['arquivos']:.1f}s; em série seriam "
+          f"{tempos['arquivos_em_serie']:.1f}s)")
+    for disciplina, info in manifesto['disciplinas'].items():
+        if info['erro_leitura']:
+            print(f"  {disciplina}: erro de leitura - {info['erro_leitura']}")
+    for erro in manifesto['erros']:
+        print(f"  falhou {erro['arquivo']}: {erro['erro']}")
@@ -0,0 +1,80 @@
+# Snapshot local (SQLite) das planilhas, para servir a abertura do app do disco
+# e sincronizar com o Google Sheets só nas linhas que mudaram.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+
+def hash_linha(linha):
+    return hashlib.blake2b("\x1f".join(str(v) for v in linha).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SnapshotLocal:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._trava = threading.Lock()
+        with closing(self._conectar()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (planilha TEXT PRIMARY KEY, sincronizado_em REAL)")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS linhas (planilha TEXT, pos INTEGER, hash TEXT, valores TEXT, "
+                "PRIMARY KEY (planilha, pos))"
+            )
+            # Edições da fila de gravação ainda não confirmadas na planilha (valor em JSON)
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS pendentes (planilha TEXT, tag TEXT, coluna TEXT, valor TEXT, "
+                "PRIMARY KEY (planilha, tag, coluna))"
+            )
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def ler(self, nome):
+        with closing(self._conectar()) as con:
+            meta = con.execute("SELECT sincronizado_em FROM meta WHERE planilha = ?", (nome,)).fetchone()
+            if meta is None:
+                return None, None
+            cursor = con.execute("SELECT valores FROM linhas WHERE planilha = ? ORDER BY pos", (nome,))
+            return [json.loads(v) for (v,) in cursor], meta[0]
+
+    def sincronizar(self, nome, matriz):
+        hashes = [hash_linha(linha) for linha in matriz]
+        with self._trava, closing(self._conectar()) as con, con:
+            atuais = dict(con.execute("SELECT pos, hash FROM linhas WHERE planilha = ?", (nome,)))
+            alteradas = [
+                (nome, pos, h, json.dumps(matriz[pos], ensure_ascii=False))
+                for pos, h in enumerate(hashes)
+                if atuais.get(pos) != h
+            ]
+            con.executemany("INSERT OR REPLACE INTO linhas VALUES (?, ?, ?, ?)", alteradas)
+            removidas = con.execute("DELETE FROM linhas WHERE planilha = ? AND pos >= ?", (nome, len(hashes))).rowcount
+            con.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (nome, time.time()))
+        return {'alteradas': len(alteradas), 'removidas': removidas, 'total': len(hashes)}
+
+    def guardar_pendentes(self, nome, tag, valores):
+        with self._trava, closing(self._conectar()) as con, con:
+            con.executemany("INSERT OR REPLACE INTO pendentes VALUES (?, ?, ?, ?)", [
+                (nome, tag, col, json.dumps(val, ensure_ascii=False)) for col, val in valores.items()
+            ])
+
+    def remover_pendentes(self, nome, lote):
+        # Só as células que ainda têm o valor gravado: edição mais nova fica
+        with self._trava, closing(self._conectar()) as con, con:
+            con.executemany("DELETE FROM pendentes WHERE planilha = ? AND tag = ? AND coluna = ? AND valor = ?", [
+                (nome, tag, col, json.dumps(val, ensure_ascii=False))
+                for tag, valores in lote.items() for col, val in valores.items()
+            ])
+
+    def ler_pendentes(self):
+        pendentes = {}
+        with closing(self._conectar()) as con:
+            for nome, tag, col, valor in con.execute("SELECT planilha, tag, coluna, valor FROM pendentes"):
+                pendentes.setdefault(nome, {}).setdefault(tag, {})[col] = json.loads(valor)
+        return pendentes
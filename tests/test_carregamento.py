@@ -0,0 +1,103 @@
+import pytest
+
+from carregamento import CarregadorPlanilhas, faixas_contiguas, ler_colunas, letra_coluna
+from curva_s import COLUNAS_CURVA
+from dados_sinteticos import gerar_planilha
+from planilha_local import PlanilhaMemoria
+from regras_status import colunas_regras
+from snapshots import SnapshotLocal
+
+MATRIZ = [
+    ['TAG', 'SEMANA OBRA', 'PREVISTO', 'DATA MONT', 'OBS', 'STATUS'],
+    ['T1', '3', '01/10/2025', '', 'x', ''],
+    ['T2', '', '02/10/2025', '10/11/2025'],
+    ['T3', '5'],
+]
+
+
+class CabecalhoErrado(PlanilhaMemoria):
+    # row_values(1) nunca bate com a linha 1 dos ranges
+    def row_values(self, row):
+        return list(reversed(super().row_values(row)))
+
+
+def test_faixas_contiguas():
+    assert faixas_contiguas([6, 0, 1, 2, 5, 1]) == [(0, 2), (5, 6)]
+
+
+def test_ler_colunas_so_as_pedidas_em_um_batch_get():
+    ws = PlanilhaMemoria(MATRIZ, "BD_ELE")
+    matriz, cabecalho = ler_colunas(ws, ['DATA MONT', 'SEMANA OBRA'])
+    assert cabecalho == MATRIZ[0]
+    assert matriz == [['TAG', 'SEMANA OBRA', 'DATA MONT'], ['T1', '3', ''], ['T2', '', '10/11/2025'], ['T3', '5', '']]
+    assert ws.chamadas['batch_get'] == 1
+    assert ws.chamadas['get_all_values'] == 0
+
+
+def test_ler_colunas_rele_cabecalho_desatualizado():
+    antigo = list(MATRIZ[0])
+    # Coluna inserida na planilha depois do cabeçalho guardado
+    ws = PlanilhaMemoria([linha[:1] + ["NOVA"] + linha[1:] for linha in MATRIZ], "BD_ELE")
+    matriz, cabecalho = ler_colunas(ws, ['SEMANA OBRA'], antigo)
+    assert cabecalho[1] == "NOVA"
+    assert matriz == [['TAG', 'SEMANA OBRA'], ['T1', '3'], ['T2', ''], ['T3', '5']]
+    assert ws.chamadas['batch_get'] == 2
+
+
+def test_ler_colunas_cabecalho_divergente_falha():
+    ws = CabecalhoErrado(MATRIZ, "BD_ELE")
+    with pytest.raises(ValueError):
+        ler_colunas(ws, ['OBS'])
+
+
+def test_ler_colunas_sem_nenhuma_coluna_conhecida():
+    ws = PlanilhaMemoria([['X', 'Y'], ['1', '2']], "BD_ELE")
+    assert ler_colunas(ws, ['OBS']) == ([], ['X', 'Y'])
+
+
+def test_leitura_completa_substitui_entrada_parcial_com_snapshot_igual(tmp_path):
+    ws = PlanilhaMemoria(gerar_planilha("ELÉTRICA", 40), "BD_ELE")
+    carregador = CarregadorPlanilhas(lambda nome: ws, snapshots=SnapshotLocal(str(tmp_path / "s.db")),
+                                     disciplinas={"BD_ELE": "ELÉTRICA"})
+    completo = carregador.obter("BD_ELE")[0]
+    carregador.invalidar("BD_ELE")
+    carregador.obter("BD_ELE", COLUNAS_CURVA + sorted(colunas_regras("ELÉTRICA")))
+    assert not carregador.carregada("BD_ELE")
+
+    # Planilha igual ao snapshot: mesmo assim a entrada passa a ser a completa
+    df = carregador.obter("BD_ELE")[0]
+    assert carregador.carregada("BD_ELE")
+    assert df['DESCRIÇÃO'].tolist() == completo['DESCRIÇÃO'].tolist()
+    assert carregador.atualizar_linhas("BD_ELE", {0: (df.at[0, 'TAG'], {'OBS': "x"})})
+
+
+def reiniciar(ws, caminho):
+    avisos = []
+    carregador = CarregadorPlanilhas(lambda nome: ws, snapshots=SnapshotLocal(caminho),
+                                     disciplinas={"BD_ELE": "ELÉTRICA"})
+    carregador.ao_publicar = lambda nome, df: avisos.append((nome, len(df), df.at[0, 'OBS']))
+    return carregador, avisos
+
+
+def esperar(carregador):
+    carregador._tarefas["BD_ELE"].result(5)
+    carregador._avisos.shutdown(wait=True)
+
+
+def test_snapshot_da_partida_nao_gera_aviso(tmp_path):
+    ws = PlanilhaMemoria(gerar_planilha("ELÉTRICA", 40), "BD_ELE")
+    caminho = str(tmp_path / "s.db")
+    CarregadorPlanilhas(lambda nome: ws, snapshots=SnapshotLocal(caminho)).obter("BD_ELE")
+
+    # Planilha igual: um aviso só, depois de confirmada
+    carregador, avisos = reiniciar(ws, caminho)
+    carregador.obter("BD_ELE")
+    esperar(carregador)
+    assert len(avisos) == 1
+
+    # Planilha alterada com o app parado: só o dado novo
+    ws.update([["NOVA OBS"]], f"{letra_coluna(ws.get_all_values()[0].index('OBS'))}2")
+    carregador, avisos = reiniciar(ws, caminho)
+    carregador.obter("BD_ELE")
+    esperar(carregador)
+    assert avisos == [("BD_ELE", 40, "NOVA OBS")]
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from cliente_quota import BackendComQuota, ClienteQuota
+from planilha_local import ErroQuotaLocal, PlanilhaMemoria
+
+
+class ErroServidor(Exception):
+    code = 503
+
+
+def cliente():
+    # Sem espera de cota nem backoff: os testes só contam tentativas
+    return ClienteQuota(leituras_por_minuto=60000, escritas_por_minuto=60000, max_tentativas=4, espera_base=0)
+
+
+class Falhas:
+    # Chama a planilha e depois falha as `n` primeiras vezes (como um 5xx com a escrita já aplicada)
+    def __init__(self, planilha, erro, n, depois=False):
+        self.planilha = planilha
+        self.erro = erro
+        self.n = n
+        self.depois = depois
+        self.tentativas = 0
+
+    def __getattr__(self, nome):
+        valor = getattr(self.planilha, nome)
+        if not callable(valor) or nome == 'spreadsheet':
+            return valor
+
+        def chamar(*args, **kwargs):
+            self.tentativas += 1
+            if self.depois:
+                resultado = valor(*args, **kwargs)
+            if self.tentativas <= self.n:
+                raise self.erro(nome)
+            return resultado if self.depois else valor(*args, **kwargs)
+        return chamar
+
+
+def abrir(ws):
+    return BackendComQuota(type("Backend", (), {'nome': "falso", 'abrir': lambda self, nome: ws})(), cliente()).abrir("BD_ELE")
+
+
+def test_escrita_repetida_em_429():
+    ws = Falhas(PlanilhaMemoria([['TAG']], "BD_ELE"), ErroQuotaLocal, 2)
+    abrir(ws).append_row(["T1"])
+    assert ws.tentativas == 3
+    assert ws.planilha.get_all_values() == [['TAG'], ['T1']]
+
+
+def test_anexar_nao_repete_em_5xx():
+    ws = Falhas(PlanilhaMemoria([['TAG']], "BD_ELE"), ErroServidor, 1, depois=True)
+    with pytest.raises(ErroServidor):
+        abrir(ws).append_row(["T1"])
+    assert ws.tentativas == 1
+    # Uma linha só: a repetição duplicaria a TAG
+    assert ws.planilha.get_all_values() == [['TAG'], ['T1']]
+
+
+def test_update_de_valores_repete_em_5xx():
+    ws = Falhas(PlanilhaMemoria([['TAG', 'OBS'], ['T1', '']], "BD_ELE"), ErroServidor, 2, depois=True)
+    abrir(ws).update([["ok"]], "B2")
+    assert ws.tentativas == 3
+    assert ws.planilha.get_all_values()[1] == ['T1', 'ok']
+
+
+def test_exclusao_pela_pasta_nao_repete_em_5xx():
+    planilha = PlanilhaMemoria([['TAG']] + [[f"T{i}"] for i in range(5)], "BD_ELE")
+    pasta = Falhas(planilha.spreadsheet, ErroServidor, 1, depois=True)
+    ws = type("Ws", (), {'spreadsheet': pasta, 'get_all_values': planilha.get_all_values})()
+    corpo = {'requests': [{'deleteDimension': {'range': {'sheetId': 0, 'dimension': 'ROWS',
+                                                         'startIndex': 1, 'endIndex': 3}}}]}
+    with pytest.raises(ErroServidor):
+        abrir(ws).spreadsheet.batch_update(corpo)
+    assert pasta.tentativas == 1
+    assert [linha[0] for linha in planilha.get_all_values()] == ['TAG', 'T2', 'T3', 'T4']
+
+
+def test_leitura_repetida_em_5xx_ate_o_limite():
+    ws = Falhas(PlanilhaMemoria([['TAG']], "BD_ELE"), ErroServidor, 10)
+    with pytest.raises(ErroServidor):
+        abrir(ws).get_all_values()
+    assert ws.tentativas == 4
+
+
+def test_leituras_simultaneas_iguais_viram_uma_chamada():
+    c = cliente()
+    entrou, liberar = threading.Event(), threading.Event()
+    chamadas = []
+
+    def ler():
+        chamadas.append(1)
+        entrou.set()
+        liberar.wait(5)
+        return [['TAG']]
+
+    resultados = []
+    primeira = threading.Thread(target=lambda: resultados.append(c.ler("BD_ELE", 'get_all_values', ler)))
+    primeira.start()
+    entrou.wait(5)
+    segunda = threading.Thread(target=lambda: resultados.append(c.ler("BD_ELE", 'get_all_values', ler)))
+    segunda.start()
+    while c.metricas().get('get_all_values', {}).get('coalescidas', 0) == 0:
+        time.sleep(0.01)
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+
+    assert len(chamadas) == 1
+    assert resultados == [[['TAG']], [['TAG']]]
+
+
+def test_leitura_depois_de_escrita_nao_se_une_a_anterior():
+    c = cliente()
+    entrou, liberar = threading.Event(), threading.Event()
+    chamadas = []
+
+    def ler():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            entrou.set()
+            liberar.wait(5)
+        return len(chamadas)
+
+    primeira = threading.Thread(target=lambda: c.ler("BD_ELE", 'get_all_values', ler))
+    primeira.start()
+    entrou.wait(5)
+    c.escrever("BD_ELE", 'update', lambda: None)
+    # Começou depois da escrita: precisa ver o dado novo, não o da leitura em andamento
+    assert c.ler("BD_ELE", 'get_all_values', ler) == 2
+    liberar.set()
+    primeira.join(5)
+    assert len(chamadas) == 2
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carregamento import montar_modelo
+from curva_s import calcular_curva_s
+from dados_sinteticos import DATA_INICIO_OBRA, gerar_planilha
+from esquema import COLUNAS_DATA, FORMATO_DATA, converter_datas
+
+
+def planilha_padronizada(disciplina, linhas):
+    # O cálculo antigo só lia bem dd/mm/aaaa: datas válidas vão para esse
+    # formato, as inválidas ficam como estão
+    matriz = gerar_planilha(disciplina, linhas)
+    df = pd.DataFrame(matriz[1:], columns=matriz[0])
+    for col in [c for c in COLUNAS_DATA if c in df.columns]:
+        datas = converter_datas(df[col])
+        df.loc[datas.notna(), col] = datas[datas.notna()].dt.strftime(FORMATO_DATA)
+    return [matriz[0]] + df.values.tolist()
+
+
+def curva_antiga(df):
+    # Cálculo com value_counts anterior ao curva_s.py
+    def semana(data):
+        return (data - DATA_INICIO_OBRA).days // 7 + 1 if pd.notnull(data) else 0
+
+    sem_prog = pd.to_numeric(df['SEMANA OBRA'], errors='coerce').fillna(0).astype(int)
+    sem_prev = pd.to_datetime(df['PREVISTO'], dayfirst=True, errors='coerce').apply(semana)
+    sem_real = pd.to_datetime(df['DATA MONT'], dayfirst=True, errors='coerce').apply(semana)
+    eixo_x = range(1, max(sem_prev.max(), sem_prog.max(), sem_real.max()) + 1)
+    return {
+        'semanas': list(eixo_x),
+        'previsto': sem_prev.value_counts().reindex(eixo_x, fill_value=0).tolist(),
+        'programado': sem_prog.value_counts().reindex(eixo_x, fill_value=0).tolist(),
+        'realizado': sem_real.value_counts().reindex(eixo_x, fill_value=0).tolist(),
+        'montados': int((df['STATUS'] == 'MONTADO').sum()),
+    }
+
+
+@pytest.mark.parametrize("disciplina", ["ELÉTRICA", "INSTRUMENTAÇÃO"])
+def test_igual_ao_calculo_com_value_counts(disciplina):
+    df, _ = montar_modelo(planilha_padronizada(disciplina, 3000), disciplina)
+    curva = calcular_curva_s(df, DATA_INICIO_OBRA)
+    antiga = curva_antiga(df)
+
+    assert curva['semanas'].tolist() == antiga['semanas']
+    for chave in ('previsto', 'programado', 'realizado'):
+        assert curva[chave].tolist() == antiga[chave]
+        assert curva[f'{chave}_acum'].tolist() == np.cumsum(antiga[chave]).tolist()
+    assert curva['montados'] == antiga['montados']
+    assert curva['total'] == len(df)
+
+
+def test_datas_antes_do_inicio_e_vazias_ficam_fora():
+    matriz = [
+        ['TAG', 'SEMANA OBRA', 'PREVISTO', 'DATA MONT', 'STATUS'],
+        ['T1', '2', '01/09/2025', '', 'PROGRAMADO'],
+        ['T2', '', '06/10/2025', '07/10/2025', 'MONTADO'],
+        ['T3', 'x', '', '31/02/2025', 'AGUARDANDO PROG'],
+    ]
+    df, _ = montar_modelo(matriz)
+    curva = calcular_curva_s(df, DATA_INICIO_OBRA)
+    assert curva['semanas'].tolist() == [1, 2]
+    assert curva['previsto'].tolist() == [0, 1]
+    assert curva['programado'].tolist() == [0, 1]
+    assert curva['realizado_acum'].tolist() == [0, 1]
+    assert curva['percentual'] == pytest.approx(100 / 3)
+
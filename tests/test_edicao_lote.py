@@ -0,0 +1,45 @@
+from datetime import date
+
+from carregamento import montar_modelo
+from edicao_lote import aplicar_status, colunas_editaveis, diff_grade, preparar_grade
+
+MATRIZ = [
+    ['TAG', 'SEMANA OBRA', 'PREVISTO', 'DATA INIC PROG', 'DATA FIM PROG', 'DATA MONT', 'OBS', 'STATUS'],
+    ['T1', '3', '01/10/2025', '06/10/2025', '10/10/2025', '', '', ''],
+    ['T2', '', '02/10/2025', '', '', '', 'x', ''],
+    ['T3', '5', '03/10/2025', '06/10/2025', '10/10/2025', '12/10/2025', '', ''],
+]
+
+
+def grade():
+    df, _ = montar_modelo(MATRIZ, "ELÉTRICA")
+    colunas = colunas_editaveis(df.columns)
+    return df, colunas, preparar_grade(df, colunas)
+
+
+def test_grade_sem_edicao_nao_tem_diff():
+    _, colunas, original = grade()
+    assert diff_grade(original, original.copy(), colunas) == {}
+
+
+def test_diff_so_das_celulas_alteradas_com_datas_no_formato_da_planilha():
+    _, colunas, original = grade()
+    editado = original.copy()
+    editado.at[0, 'DATA MONT'] = date(2025, 11, 10)
+    editado.at[1, 'OBS'] = "  x  "
+    editado.at[2, 'DATA MONT'] = None
+    editado.at[2, 'SEMANA OBRA'] = "6"
+    assert diff_grade(original, editado, colunas) == {
+        0: {'DATA MONT': "10/11/2025"},
+        2: {'SEMANA OBRA': "6", 'DATA MONT': ""},
+    }
+
+
+def test_aplicar_status_so_quando_muda():
+    df, _, _ = grade()
+    alteracoes = {0: {'DATA MONT': "10/11/2025"}, 1: {'OBS': "y"}, 2: {'DATA MONT': ""}}
+    assert aplicar_status(df, alteracoes, "ELÉTRICA") == {
+        0: {'DATA MONT': "10/11/2025", 'STATUS': "MONTADO"},
+        1: {'OBS': "y"},
+        2: {'DATA MONT': "", 'STATUS': "PROGRAMADO"},
+    }
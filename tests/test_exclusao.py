@@ -0,0 +1,44 @@
+from exclusao import agrupar_faixas, excluir_faixas, verificar_tags
+from planilha_local import PlanilhaMemoria
+
+
+def planilha(n):
+    return PlanilhaMemoria([['TAG', 'OBS']] + [[f"T{i}", ""] for i in range(2, n + 2)], "BD_ELE")
+
+
+class PastaGravada:
+    def __init__(self):
+        self.corpos = []
+
+    def batch_update(self, body):
+        self.corpos.append(body)
+
+
+def test_agrupar_faixas_contiguas_de_baixo_para_cima():
+    assert agrupar_faixas([5, 2, 3, 9, 4, 3, 12, 11]) == [(11, 12), (9, 9), (2, 5)]
+
+
+def test_excluir_faixas_envia_delete_dimension_em_ordem_decrescente():
+    ws = planilha(10)
+    pasta = PastaGravada()
+    ws_falsa = type("Ws", (), {'id': 7, 'spreadsheet': pasta})()
+
+    assert excluir_faixas(ws_falsa, [(3, 4), (9, 11), (6, 6)]) == 6
+    faixas = [r['deleteDimension']['range'] for r in pasta.corpos[0]['requests']]
+    assert [(f['startIndex'], f['endIndex']) for f in faixas] == [(8, 11), (5, 6), (2, 4)]
+    assert all(f['sheetId'] == 7 and f['dimension'] == 'ROWS' for f in faixas)
+    assert len(pasta.corpos) == 1
+
+    # Na planilha local, as linhas certas somem
+    excluir_faixas(ws, agrupar_faixas([3, 4, 6, 9, 10, 11]))
+    assert [linha[0] for linha in ws.get_all_values()] == ['TAG', 'T2', 'T5', 'T7', 'T8']
+
+
+def test_verificar_tags_aponta_linha_deslocada():
+    ws = planilha(6)
+    esperadas = {3: "T3", 4: "T4", 6: "T6"}
+    assert verificar_tags(ws, agrupar_faixas(esperadas), esperadas) == []
+
+    ws.delete_rows(2)
+    assert verificar_tags(ws, agrupar_faixas(esperadas), esperadas) == [(6, "T6", "T7"), (3, "T3", "T4"),
+                                                                       (4, "T4", "T5")]
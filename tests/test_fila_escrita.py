@@ -0,0 +1,79 @@
+from carregamento import CarregadorPlanilhas
+from dados_sinteticos import gerar_planilha
+from fila_escrita import FilaEscrita
+from planilha_local import PlanilhaMemoria
+from snapshots import SnapshotLocal
+
+
+def montar(linhas=30):
+    ws = PlanilhaMemoria(gerar_planilha("ELÉTRICA", linhas), "BD_ELE")
+    carregador = CarregadorPlanilhas(lambda nome: ws, disciplinas={"BD_ELE": "ELÉTRICA"})
+    fila = FilaEscrita(lambda nome: ws, lambda nome: carregador.obter(nome)[0], intervalo=3600,
+                       invalidar=carregador.invalidar)
+    fila.parar()
+    carregador.alteracoes_pendentes = fila.alteracoes_pendentes
+    return ws, carregador, fila
+
+
+def linha_da_tag(ws, tag):
+    return next(linha for linha in ws.get_all_values() if linha[0] == tag)
+
+
+def test_grava_na_linha_da_tag():
+    ws, carregador, fila = montar()
+    tag = carregador.obter("BD_ELE")[0].at[10, 'TAG']
+    fila.enfileirar("BD_ELE", tag, {'OBS': "ok"})
+    fila.descarregar(forcar=True)
+    assert ws.get_all_values()[11][0] == tag
+    assert linha_da_tag(ws, tag)[ws.get_all_values()[0].index('OBS')] == "ok"
+    assert fila.pendentes() == 0
+
+
+def test_linha_inserida_na_planilha_devolve_a_edicao_e_recarrega():
+    ws, carregador, fila = montar()
+    tag = carregador.obter("BD_ELE")[0].at[10, 'TAG']
+    obs = ws.get_all_values()[0].index('OBS')
+    # Alguém insere uma linha direto na planilha depois da carga
+    ws._linhas.insert(3, ["INSERIDA"] + [""] * (len(ws._linhas[0]) - 1))
+    antes = ws.get_all_values()
+
+    fila.enfileirar("BD_ELE", tag, {'OBS': "ok"})
+    fila.descarregar(forcar=True)
+    assert ws.get_all_values() == antes
+    assert fila.pendentes() == 1 and fila.realinhamentos == 1
+
+    fila.descarregar(forcar=True)
+    assert linha_da_tag(ws, tag)[obs] == "ok"
+    assert sum(linha[obs] == "ok" for linha in ws.get_all_values()) == 1
+    assert fila.pendentes() == 0
+
+
+def test_tag_excluida_conta_como_descartada():
+    ws, carregador, fila = montar()
+    df = carregador.obter("BD_ELE")[0]
+    tag = df.at[4, 'TAG']
+    carregador.remover_linhas("BD_ELE", {4: tag})
+    fila.enfileirar("BD_ELE", tag, {'OBS': "x", 'SEMANA OBRA': "9"})
+    fila.descarregar(forcar=True)
+    assert fila.descartadas == 2
+    assert fila.pendentes() == 0
+
+
+def test_pendentes_sobrevivem_ao_reinicio(tmp_path):
+    ws, carregador, fila = montar()
+    snapshots = SnapshotLocal(str(tmp_path / "s.db"))
+    fila = FilaEscrita(lambda nome: ws, lambda nome: carregador.obter(nome)[0], intervalo=3600,
+                       persistencia=snapshots)
+    fila.parar()
+    tag = carregador.obter("BD_ELE")[0].at[3, 'TAG']
+    fila.enfileirar("BD_ELE", tag, {'OBS': "antes"})
+    fila.enfileirar("BD_ELE", tag, {'OBS': "depois"})
+
+    # Processo encerrado sem gravar: a próxima fila começa com a edição
+    nova = FilaEscrita(lambda nome: ws, lambda nome: carregador.obter(nome)[0], intervalo=3600,
+                       persistencia=snapshots)
+    nova.parar()
+    assert nova.alteracoes_pendentes("BD_ELE") == {tag: {'OBS': "depois"}}
+    nova.descarregar(forcar=True)
+    assert linha_da_tag(ws, tag)[ws.get_all_values()[0].index('OBS')] == "depois"
+    assert snapshots.ler_pendentes() == {}
@@ -0,0 +1,47 @@
+import numpy as np
+
+from carregamento import montar_modelo
+from curva_s import calcular_curva_s
+from dados_sinteticos import DATA_INICIO_OBRA, gerar_planilha
+from historico import HistoricoCurvas
+
+
+def curva_e_status(linhas=1500):
+    df, _ = montar_modelo(gerar_planilha("ELÉTRICA", linhas), "ELÉTRICA")
+    return calcular_curva_s(df, DATA_INICIO_OBRA), df.set_index('TAG')['STATUS']
+
+
+def test_curva_gravada_volta_igual(tmp_path):
+    hist = HistoricoCurvas(str(tmp_path / "h.db"))
+    curva, status = curva_e_status()
+    refeita = hist.curva(hist.registrar("BD_ELE", curva, status))
+    assert refeita.keys() == curva.keys()
+    for chave, valor in curva.items():
+        assert np.array_equal(refeita[chave], valor), chave
+
+
+def test_registrar_so_quando_muda(tmp_path):
+    caminho = str(tmp_path / "h.db")
+    hist = HistoricoCurvas(caminho)
+    curva, status = curva_e_status()
+    primeiro = hist.registrar("BD_ELE", curva, status)
+    assert len(hist.mudancas_status(primeiro)) == len(status)
+    assert hist.registrar("BD_ELE", curva, status) is None
+    # Linha de base grava mesmo sem mudança
+    base = hist.registrar("BD_ELE", curva, status, rotulo="LB0")
+    assert base is not None and hist.mudancas_status(base) == []
+
+    status = status.copy()
+    tags = status.index[status != "MONTADO"][:3]
+    status[tags[0]] = "MONTADO"
+    status = status.drop(tags[1:])
+    # Nova instância: STATUS anterior vem do banco
+    delta = HistoricoCurvas(caminho).registrar("BD_ELE", curva, status)
+    esperado = sorted([(tags[0], "MONTADO"), (tags[1], ""), (tags[2], "")])
+    assert hist.mudancas_status(delta) == esperado
+
+    registros = hist.listar("BD_ELE")
+    assert [r['id'] for r in registros] == [primeiro, base, delta]
+    assert [r['rotulo'] for r in registros] == [None, "LB0", None]
+    assert [r['mudancas_status'] for r in registros] == [len(status) + 2, 0, len(esperado)]
+    assert hist.listar("BD_INST") == []
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from carregamento import CarregadorPlanilhas
+from dados_sinteticos import gerar_planilha
+from importacao import agrupar_celulas, aplicar_importacao, calcular_diff
+from planilha_local import PlanilhaMemoria
+
+
+def upload(matriz):
+    tags = [linha[0] for linha in matriz[1:]]
+    return pd.DataFrame({
+        'TAG': tags[::7] + ["NOVA-000001"],
+        'SEMANA OBRA': ["12"] * len(tags[::7]) + ["3"],
+        'DATA MONT': ["15/12/2025", ""] * (len(tags[::7]) // 2) + [""] * (len(tags[::7]) % 2 + 1),
+    })
+
+
+def test_matriz_do_cache_grava_o_mesmo_que_a_leitura_da_planilha():
+    matriz = gerar_planilha("ELÉTRICA", 2000)
+    lida = PlanilhaMemoria(matriz, "BD_ELE")
+    cache = PlanilhaMemoria(matriz, "BD_ELE")
+    carregador = CarregadorPlanilhas(lambda nome: cache, disciplinas={"BD_ELE": "ELÉTRICA"})
+    # Edição ainda na fila: não está na planilha e não pode entrar no diff
+    tag = matriz[5][0]
+    carregador.alteracoes_pendentes = lambda nome: {tag: {'OBS': "PENDENTE"}}
+    carregador.obter("BD_ELE")
+    df_up = upload(matriz)
+    padrao = {'DISCIPLINA': "ELÉTRICA"}
+
+    esperado = aplicar_importacao(lida, df_up, padrao_nova=padrao, disciplina="ELÉTRICA")
+    matriz_cache = carregador.matriz_planilha("BD_ELE")
+    assert matriz_cache is not None
+    obtido = aplicar_importacao(cache, df_up, matriz=matriz_cache, padrao_nova=padrao, disciplina="ELÉTRICA")
+
+    assert cache.chamadas['get_all_values'] == 1
+    assert obtido['alteracoes'] == esperado['alteracoes']
+    assert cache.get_all_values() == lida.get_all_values()
+
+
+def test_matriz_do_cache_descartada_se_a_planilha_mudou():
+    ws = PlanilhaMemoria(gerar_planilha("ELÉTRICA", 50), "BD_ELE")
+    carregador = CarregadorPlanilhas(lambda nome: ws, disciplinas={"BD_ELE": "ELÉTRICA"})
+    carregador.obter("BD_ELE")
+    ws.update([["X"]], "M3")
+    assert carregador.matriz_planilha("BD_ELE") is None
+
+
+def test_agrupar_celulas_junta_vizinhas_da_mesma_linha():
+    # (linha, coluna) 0-based na matriz: linha 1 = linha 2 da planilha
+    dados = agrupar_celulas({(1, 1): "a", (1, 2): "b", (1, 4): "c", (3, 0): "d"})
+    assert dados == [
+        {'range': "B2:C2", 'values': [["a", "b"]]},
+        {'range': "E2", 'values': [["c"]]},
+        {'range': "A4", 'values': [["d"]]},
+    ]
+
+
+def test_calcular_diff_so_celulas_alteradas_e_status_pelas_regras():
+    matriz = [
+        ['TAG', 'SEMANA OBRA', 'DATA MONT', 'STATUS', 'DISCIPLINA'],
+        ['T1', '3', '', 'PROGRAMADO', 'ELÉTRICA'],
+        ['T2', '4', '', 'AGUARDANDO PROG', 'ELÉTRICA'],
+    ]
+    df_up = pd.DataFrame({'TAG': ['T1', 'T2', 'T3', ''], 'SEMANA OBRA': ['3', '5', '7', '1'],
+                          'DATA MONT': ['10/11/2025', 'nan', '', '']})
+    diff = calcular_diff(matriz, df_up, padrao_nova={'DISCIPLINA': 'ELÉTRICA'}, disciplina="ELÉTRICA")
+
+    assert diff['alteracoes'] == {(1, 2): '10/11/2025', (1, 3): 'MONTADO', (2, 1): '5'}
+    assert diff['novas'] == [['T3', '7', '', 'AGUARDANDO PROG', 'ELÉTRICA']]
+    assert diff['ignoradas'] == 1
+    assert diff['cabecalho'] == matriz[0]
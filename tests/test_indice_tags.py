@@ -0,0 +1,35 @@
+import pandas as pd
+
+from dados_sinteticos import gerar_planilha
+from indice_tags import IndiceTags
+
+TAGS = ["ab-2", "XAB-1", "AB-1", "", None, "AB-1", "CD-9", "zzab"]
+
+
+def test_localizar_primeira_ocorrencia():
+    indice = IndiceTags(TAGS)
+    assert indice.localizar("AB-1") == 2
+    assert indice.localizar("CD-9") == 6
+    assert indice.localizar("") is None
+    assert indice.localizar("NAO-EXISTE") is None
+    assert len(indice) == 5
+
+
+def test_localizar_igual_ao_filtro_do_dataframe():
+    df = pd.DataFrame(gerar_planilha("ELÉTRICA", 3000)[1:]).rename(columns={0: 'TAG'})
+    indice = IndiceTags(df['TAG'])
+    for tag in df['TAG'].sample(50, random_state=1):
+        assert indice.localizar(tag) == df.index[df['TAG'] == tag][0]
+
+
+def test_buscar_prefixo_antes_de_trecho_sem_diferenciar_maiusculas():
+    indice = IndiceTags(TAGS)
+    assert indice.buscar("ab") == ["AB-1", "ab-2", "XAB-1", "zzab"]
+    assert indice.buscar(" Ab-1 ") == ["AB-1", "XAB-1"]
+    assert indice.buscar("ab", limite=3) == ["AB-1", "ab-2", "XAB-1"]
+    assert indice.buscar("qq") == []
+
+
+def test_buscar_vazio_lista_as_primeiras_em_ordem():
+    assert IndiceTags(TAGS).buscar("", limite=2) == ["AB-1", "ab-2"]
+    assert IndiceTags(TAGS).buscar(None) == ["AB-1", "ab-2", "CD-9", "XAB-1", "zzab"]
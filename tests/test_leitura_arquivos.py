@@ -0,0 +1,64 @@
+import io
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from importacao import validar_bloco
+from leitura_arquivos import ler_blocos
+
+
+def ler_tudo(arquivo, nome, tamanho):
+    blocos = list(ler_blocos(arquivo, nome, tamanho))
+    return pd.concat([b for b, _ in blocos], ignore_index=True), [f for _, f in blocos]
+
+
+def test_csv_com_ponto_e_virgula_latin1_em_blocos():
+    texto = "tag; Semana Obra ;OBS\n" + "".join(f" T{i} ;{i};ação\n" for i in range(7))
+    df, fracoes = ler_tudo(io.BytesIO(texto.encode("latin-1")), "x.csv", 3)
+    assert list(df.columns) == ['TAG', 'SEMANA OBRA', 'OBS']
+    assert df['TAG'].tolist() == [f"T{i}" for i in range(7)]
+    assert df.at[0, 'OBS'] == "ação"
+    assert len(fracoes) == 3 and fracoes[-1] == 1.0
+
+
+def test_xlsx_datas_e_inteiros_como_na_planilha():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["tag", "SEMANA OBRA", "DATA MONT", None, "OBS"])
+    ws.append(["T1", 12.0, datetime(2025, 12, 15), "ignorada", None])
+    ws.append(["T2", None, "15/12/2025", None, 1.5])
+    arquivo = io.BytesIO()
+    wb.save(arquivo)
+    arquivo.seek(0)
+
+    df, fracoes = ler_tudo(arquivo, "x.xlsx", 1)
+    assert df.values.tolist() == [["T1", "12", "15/12/2025", ""], ["T2", "", "15/12/2025", "1.5"]]
+    assert list(df.columns) == ['TAG', 'SEMANA OBRA', 'DATA MONT', 'OBS']
+    assert fracoes[-1] == 1.0
+
+
+def test_extensao_nao_suportada():
+    with pytest.raises(ValueError):
+        ler_blocos(io.BytesIO(b""), "x.txt")
+
+
+def test_validar_bloco_rejeita_com_motivo_e_normaliza_datas():
+    bloco = pd.DataFrame({
+        'TAG': ["T1", "", "T3", "T4", "", "T6"],
+        'SEMANA OBRA': ["3", "4", "2,5", "", "", "7"],
+        'DATA MONT': ["2025-12-15", "", "31/02/2025", "nan", "dd/mm/yyyy", "15/12/2025"],
+    }, dtype=object)
+    validas, rejeitadas = validar_bloco(bloco, 10)
+    assert validas['TAG'].tolist() == ["T1", "T4", "T6"]
+    assert validas['DATA MONT'].tolist() == ["15/12/2025", "", "15/12/2025"]
+    assert rejeitadas == [
+        {'LINHA': 11, 'TAG': "", 'MOTIVO': "TAG vazia"},
+        {'LINHA': 12, 'TAG': "T3", 'MOTIVO': "DATA MONT inválida (31/02/2025); SEMANA OBRA inválida (2,5)"},
+    ]
+
+
+def test_validar_bloco_sem_tag():
+    with pytest.raises(ValueError):
+        validar_bloco(pd.DataFrame({'OBS': ["x"]}), 2)
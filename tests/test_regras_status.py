@@ -0,0 +1,34 @@
+import pandas as pd
+
+from regras_status import calcular_status, resumo_status, status_linha
+
+
+def test_estrutura_vale_a_primeira_regra_na_ordem():
+    df = pd.DataFrame({
+        'DATA INIC PROG': ["01/10/2025"] * 6,
+        'DATA FABRICAÇÃO': ["02/10/2025", "02/10/2025", "02/10/2025", "02/10/2025", "", ""],
+        'DATA PINTURA': ["03/10/2025", "03/10/2025", "03/10/2025", "", "", ""],
+        'DATA MONT': ["04/10/2025", "04/10/2025", "", "", "", ""],
+        'DATA TARQUE': ["05/10/2025", "", "", "", "", "DD/MM/YYYY"],
+    })
+    df.loc[5, 'DATA INIC PROG'] = ""
+    assert calcular_status(df, "ESTRUTURA").tolist() == [
+        "Concluído", "Aguardando Torque", "Aguardando Montagem", "Aguardando Pintura/Montagem",
+        "Aguardando Fab", "Aguardando Prog",
+    ]
+
+
+def test_torque_sem_etapas_anteriores_conta_como_concluido():
+    assert status_linha({'DATA TARQUE': "05/10/2025", 'DATA MONT': None}, "ESTRUTURA") == "Concluído"
+
+
+def test_disciplinas_padrao():
+    df = pd.DataFrame({'DATA MONT': ["10/11/2025", "", "", " "],
+                       'DATA INIC PROG': ["", "", "06/10/2025", ""],
+                       'DATA FIM PROG': ["", "10/10/2025", "", ""]})
+    assert calcular_status(df, "ELÉTRICA").tolist() == ["MONTADO", "PROGRAMADO", "PROGRAMADO", "AGUARDANDO PROG"]
+
+
+def test_resumo_estrutura_conta_torque_e_concluido_como_montados():
+    status = pd.Series(["Concluído", "Aguardando Torque", "Aguardando Fab", "Aguardando Prog"])
+    assert resumo_status(status, "ESTRUTURA") == {'montados': 2, 'programados': 1, 'aguardando': 1}